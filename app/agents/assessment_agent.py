@@ -1,16 +1,8 @@
-import os
-from dotenv import load_dotenv
-from google.generativeai import GenerativeModel
-import google.generativeai as genai
+from app.agents.llm_client import generate_text, stream_text, TextStream
 
-load_dotenv()
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-genai.configure(api_key=GOOGLE_API_KEY)
-model = genai.GenerativeModel("gemini-1.5-flash")
-
-def generate_assessment(course_name: str, unit_name: str, num_questions: int, question_type: str, bloom_level: str) -> str:
-    # ✅ Improved Prompt
-    prompt = f"""
+# ✅ Improved Prompt
+def build_assessment_prompt(course_name: str, unit_name: str, num_questions: int, question_type: str, bloom_level: str) -> str:
+    return f"""
 You are an expert academic content creator.
 
 Generate exactly {num_questions} {question_type.upper()} questions for the following details:
@@ -28,9 +20,16 @@ Note:
 - Avoid repetition and ensure clarity.
 """
 
+def generate_assessment(course_name: str, unit_name: str, num_questions: int, question_type: str, bloom_level: str) -> str:
+    prompt = build_assessment_prompt(course_name, unit_name, num_questions, question_type, bloom_level)
+
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return generate_text(prompt)
     except Exception as e:
         # ⚠️ Error Handling: catches and reports AI-related issues
         return f"❌ Error generating assessment: {str(e)}"
+
+# Streaming variant: yields the questions as they are generated
+def stream_assessment(course_name: str, unit_name: str, num_questions: int, question_type: str, bloom_level: str) -> TextStream:
+    prompt = build_assessment_prompt(course_name, unit_name, num_questions, question_type, bloom_level)
+    return stream_text(prompt, error_message="❌ Error generating assessment")
@@ -0,0 +1,179 @@
+import os
+import io
+import csv
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from app.agents.assessment_agent import build_assessment_prompt
+from app.agents.llm_client import generate_text, DEFAULT_MODEL
+from app.utils.file_exporter import export_to_docx
+from app.utils.artifact_store import artifact_store, ASSESSMENT
+
+# Batch question-bank generation for many units from a CSV/YAML manifest.
+#
+# Manifest rows need: course, unit, type (MCQs / Short Answer / ...), bloom (Remember ... Create)
+# and optionally num_questions (default 10). CSV uses a header row; YAML is a list of mappings
+# (or a mapping with a "units" list). Finished units are recorded in a checkpoint file, so
+# re-running the same manifest after a failure only generates what is still missing.
+#
+#   python -m app.agents.assessment_batch units.csv --workers 4
+
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+DEFAULT_NUM_QUESTIONS = 10
+
+# Accept a few spellings of each column
+_COLUMN_ALIASES = {
+    "course": ("course", "course_name"),
+    "unit": ("unit", "unit_name", "module"),
+    "question_type": ("type", "question_type"),
+    "bloom_level": ("bloom", "bloom_level", "level"),
+    "num_questions": ("num_questions", "questions", "count"),
+}
+
+def _normalize_row(raw: dict, line: int) -> dict:
+    lowered = {str(k).strip().lower(): v for k, v in raw.items() if k is not None}
+    row = {}
+    for field, aliases in _COLUMN_ALIASES.items():
+        value = next((lowered[a] for a in aliases if lowered.get(a) not in (None, "")), None)
+        row[field] = str(value).strip() if value is not None else ""
+    missing = [f for f in ("course", "unit", "question_type", "bloom_level") if not row[f]]
+    if missing:
+        raise ValueError(f"Manifest row {line} is missing: {', '.join(missing)}")
+    row["num_questions"] = int(row["num_questions"] or DEFAULT_NUM_QUESTIONS)
+    return row
+
+# Parse manifest text; fmt is "csv" or "yaml"
+def parse_manifest(text: str, fmt: str) -> list:
+    if fmt == "csv":
+        raw_rows = list(csv.DictReader(io.StringIO(text)))
+    elif fmt in ("yaml", "yml"):
+        import yaml  # PyYAML, only needed for YAML manifests
+
+        data = yaml.safe_load(text) or []
+        raw_rows = data.get("units", []) if isinstance(data, dict) else data
+    else:
+        raise ValueError("Unsupported manifest format. Use CSV or YAML.")
+    return [_normalize_row(raw, line) for line, raw in enumerate(raw_rows, start=1)]
+
+def load_manifest(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_manifest(f.read(), os.path.splitext(path)[1].lstrip(".").lower())
+
+# Identity of a unit in the checkpoint file
+def unit_key(row: dict) -> str:
+    return "|".join(str(row[f]) for f in ("course", "unit", "question_type", "bloom_level", "num_questions"))
+
+def unit_filename(row: dict) -> str:
+    parts = (row["course"], row["unit"], row["question_type"], row["bloom_level"])
+    return "_".join(p.replace(" ", "_") for p in parts) + "_assessment.docx"
+
+def load_checkpoint(path: str) -> dict:
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            try:
+                return json.load(f)
+            except json.JSONDecodeError:
+                return {}
+    return {}
+
+def _save_checkpoint(path: str, data: dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+# Generate and export one unit (also recorded in the artifact library under `owner`);
+# errors propagate so the unit is not checkpointed
+def generate_unit(row: dict, folder: str = "app/memory", owner: str = None) -> dict:
+    start = time.perf_counter()
+    questions = generate_text(build_assessment_prompt(
+        row["course"], row["unit"], row["num_questions"], row["question_type"], row["bloom_level"]
+    ))
+    export_to_docx(
+        title=f"{row['course']} – Assessment Bank ({row['unit']})",
+        content=questions,
+        filename=unit_filename(row),
+        subheading=f"{row['question_type']} · Bloom's level: {row['bloom_level']}",
+        folder=folder,
+        persist=True
+    )
+    artifact_store.save(
+        ASSESSMENT, questions, row["course"], owner=owner,
+        title=f"{row['course']} – Assessment Bank ({row['unit']})",
+        params={"course_name": row["course"], "unit_name": row["unit"], "num_questions": row["num_questions"],
+                "question_type": row["question_type"], "bloom_level": row["bloom_level"]},
+        model=DEFAULT_MODEL,
+        generation_s=time.perf_counter() - start
+    )
+    return {"file": os.path.join(folder, unit_filename(row)), "latency": time.perf_counter() - start}
+
+# Run a whole manifest with bounded parallelism, resuming from the checkpoint.
+# progress_callback(done, total, row, outcome) is called on the calling thread.
+def run_batch(rows: list, checkpoint_path: str, max_workers: int = BATCH_WORKERS,
+              folder: str = "app/memory", progress_callback=None, owner: str = None) -> dict:
+    checkpoint = load_checkpoint(checkpoint_path)
+    checkpoint_lock = threading.Lock()
+    pending = [row for row in rows if unit_key(row) not in checkpoint]
+    report = {
+        "total": len(rows),
+        "skipped": len(rows) - len(pending),
+        "completed": [],
+        "failed": [],
+    }
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {pool.submit(generate_unit, row, folder, owner): row for row in pending}
+        for done, future in enumerate(as_completed(futures), start=report["skipped"] + 1):
+            row = futures[future]
+            try:
+                outcome = future.result()
+            except Exception as e:
+                outcome = {"error": str(e)}
+                report["failed"].append({**row, "error": str(e)})
+            else:
+                report["completed"].append({**row, **outcome})
+                with checkpoint_lock:
+                    checkpoint[unit_key(row)] = outcome
+                    _save_checkpoint(checkpoint_path, checkpoint)
+            if progress_callback:
+                progress_callback(done, len(rows), row, outcome)
+
+    elapsed = time.perf_counter() - start
+    latencies = sorted(unit["latency"] for unit in report["completed"])
+    report["elapsed"] = elapsed
+    report["units_per_min"] = len(latencies) / elapsed * 60 if elapsed and latencies else 0.0
+    report["latency_p50"] = latencies[len(latencies) // 2] if latencies else None
+    report["latency_max"] = latencies[-1] if latencies else None
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate assessment banks for every unit in a CSV/YAML manifest")
+    parser.add_argument("manifest", help="CSV or YAML manifest of course/unit/type/bloom rows")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <manifest>.checkpoint.json)")
+    parser.add_argument("--folder", default="app/memory", help="where the .docx files are written")
+    args = parser.parse_args()
+
+    rows = load_manifest(args.manifest)
+    checkpoint_path = args.checkpoint or args.manifest + ".checkpoint.json"
+
+    def show(done, total, row, outcome):
+        status = f"❌ {outcome['error']}" if "error" in outcome else f"✅ {outcome['latency']:.1f}s → {outcome['file']}"
+        print(f"[{done}/{total}] {row['course']} / {row['unit']}: {status}")
+
+    report = run_batch(rows, checkpoint_path, args.workers, args.folder, show)
+    print(
+        f"\n{len(report['completed'])} generated, {report['skipped']} already done, {len(report['failed'])} failed "
+        f"in {report['elapsed']:.1f}s ({report['units_per_min']:.1f} units/min)"
+    )
+    if report["latency_p50"] is not None:
+        print(f"Per-unit latency: p50 {report['latency_p50']:.1f}s, max {report['latency_max']:.1f}s")
+    if report["failed"]:
+        print("Re-run the same command to retry the failed units.")
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,17 @@
-import os
-from dotenv import load_dotenv
-from google.generativeai import GenerativeModel
-
-import google.generativeai as genai
-
-load_dotenv()
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-genai.configure(api_key=GOOGLE_API_KEY)
-model = genai.GenerativeModel("gemini-1.5-flash")
-
-def get_copilot_response(query: str) -> str:
-    if not query.strip():
-        return "⚠️ Please enter a valid teaching-related query."
-
-    prompt = f"""
+from app.agents.llm_client import generate_text, stream_text, TextStream
+
+# Earlier turns as "Educator: ... / Co-Pilot: ..." lines
+def format_turns(turns) -> str:
+    return "\n\n".join(f"Educator: {turn['user']}\nCo-Pilot: {turn['ai']}" for turn in turns)
+
+# summary: rolling summary of older turns; recent_turns: the latest turns, sent verbatim
+def build_copilot_prompt(query: str, summary: str = "", recent_turns=()) -> str:
+    context = ""
+    if summary:
+        context += f"\n🧾 Summary of the Conversation So Far:\n{summary}\n"
+    if recent_turns:
+        context += f"\n💬 Most Recent Messages:\n{format_turns(recent_turns)}\n"
+    return f"""
 🎓 You are an expert AI Teaching Co-Pilot designed to support educators.
 
 ✅ Your goals:
@@ -21,15 +19,43 @@ def get_copilot_response(query: str) -> str:
 - Suggest engaging classroom activities
 - Support lesson planning and teaching strategies
 - Explain complex concepts in simple language
-
+{context}
 📩 Educator's Query:
 {query}
 
-📘 Respond with empathy, clarity, and professional tone. Use bullet points or formatting if needed.
+📘 Respond with empathy, clarity, and professional tone. Use bullet points or formatting if needed.{" Use the conversation above for context when the query refers to it." if context else ""}
 """
 
+def build_summary_prompt(summary: str, turns, max_words: int) -> str:
+    return f"""
+🧾 You keep a running summary of a conversation between an educator and an AI Teaching Co-Pilot.
+
+Update the current summary with the new messages below. Keep what the educator told you (courses, topics, student level, constraints, preferences), what was decided or suggested, and any open questions. Drop greetings and repetition.
+
+📋 Current Summary:
+{summary or "(none yet)"}
+
+💬 New Messages:
+{format_turns(turns)}
+
+✍️ Return only the updated summary as short bullet points, at most {max_words} words.
+"""
+
+def get_copilot_response(query: str, summary: str = "", recent_turns=()) -> str:
+    if not query.strip():
+        return "⚠️ Please enter a valid teaching-related query."
+
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return generate_text(build_copilot_prompt(query, summary, recent_turns))
     except Exception as e:
         return f"❌ Error fetching copilot response: {str(e)}"
+
+# Streaming variant: yields the reply as it is generated
+def stream_copilot_response(query: str, summary: str = "", recent_turns=()) -> TextStream:
+    if not query.strip():
+        return TextStream.from_text("⚠️ Please enter a valid teaching-related query.")
+    return stream_text(build_copilot_prompt(query, summary, recent_turns), error_message="❌ Error fetching copilot response")
+
+# Fold turns into the rolling summary (raises on API errors, so the turns stay unfolded)
+def summarize_conversation(summary: str, turns, max_words: int) -> str:
+    return generate_text(build_summary_prompt(summary, turns, max_words)).strip()
@@ -0,0 +1,144 @@
+import os
+import threading
+from dotenv import load_dotenv
+from app.agents.copilot_agent import build_copilot_prompt, format_turns, summarize_conversation
+from app.utils.conversation_store import conversation_store
+
+# Conversation memory for the AI Co-Pilot. The last COPILOT_RECENT_TURNS turns go into the
+# prompt verbatim; older turns are folded into a rolling summary COPILOT_FOLD_TURNS at a
+# time, by a background Gemini call after a reply is saved (so no question waits for it). Prompts are
+# held to COPILOT_PROMPT_TOKENS: if the summary is lagging or replies are long, the oldest
+# verbatim turns are left out first. Each saved turn records its prompt size next to what
+# sending the whole history verbatim would have cost.
+
+load_dotenv()
+COPILOT_RECENT_TURNS = int(os.getenv("COPILOT_RECENT_TURNS", "6"))
+COPILOT_PROMPT_TOKENS = int(os.getenv("COPILOT_PROMPT_TOKENS", "2000"))
+COPILOT_SUMMARY_WORDS = int(os.getenv("COPILOT_SUMMARY_WORDS", "200"))
+COPILOT_FOLD_TURNS = int(os.getenv("COPILOT_FOLD_TURNS", "4"))  # turns per summary update
+COPILOT_TURN_TOKENS = 400  # a long reply is cut to this many tokens in the verbatim part
+
+
+# Word-based estimate, as in the RAG context builder (without loading the PDF stack)
+def count_tokens(text: str) -> int:
+    return -(-len(text.split()) * 4 // 3)
+
+# First `budget` tokens' worth of words
+def _clip(text: str, budget: int) -> str:
+    words = text.split()
+    limit = budget * 3 // 4
+    return text if len(words) <= limit else " ".join(words[:limit]) + " …"
+
+
+class ConversationManager:
+    def __init__(self, store=conversation_store, summarize_fn=summarize_conversation, recent_turns=COPILOT_RECENT_TURNS,
+                 token_budget=COPILOT_PROMPT_TOKENS, summary_words=COPILOT_SUMMARY_WORDS, fold_turns=COPILOT_FOLD_TURNS,
+                 background=True):
+        self.store = store
+        self.summarize_fn = summarize_fn
+        self.recent_turns = recent_turns
+        self.token_budget = token_budget
+        self.summary_words = summary_words
+        self.fold_turns = max(1, fold_turns)
+        self.background = background
+        self._lock = threading.Lock()
+        self._folding = set()  # conversations with a summary update in flight
+
+    def conversation(self, owner):
+        return self.store.active_conversation(owner)
+
+    # The latest `limit` turns of the owner's conversation, oldest first
+    def history(self, owner, limit=None):
+        conversation_id = self.conversation(owner)
+        if limit is None:
+            return self.store.turns(conversation_id)
+        return self.store.latest_turns(conversation_id, limit)
+
+    # Prompt for a new query: {"conversation_id", "prompt", "summary", "recent_turns" (as sent),
+    # "prompt_tokens", "full_history_tokens", "turns_verbatim", "turns_left_out", "summarized"}
+    def prepare(self, owner, query):
+        conversation_id = self.conversation(owner)
+        summary, summarized_through = self.store.summary(conversation_id)
+        # Everything not yet in the summary (normally fewer than recent_turns + fold_turns turns)
+        pending = [
+            dict(turn, ai=_clip(turn["ai"], COPILOT_TURN_TOKENS)) for turn in self.store.turns(conversation_id, summarized_through)
+        ]
+
+        base_tokens = count_tokens(build_copilot_prompt(query))
+        if summary and base_tokens + count_tokens(summary) > self.token_budget:
+            summary = _clip(summary, max(0, self.token_budget - base_tokens))
+        used = base_tokens + (count_tokens(summary) + 8 if summary else 0)
+        verbatim = []
+        for turn in reversed(pending):
+            tokens = count_tokens(format_turns([turn])) + 2
+            if used + tokens > self.token_budget:
+                break
+            verbatim.insert(0, turn)
+            used += tokens
+
+        prompt = build_copilot_prompt(query, summary, verbatim)
+        return {
+            "conversation_id": conversation_id,
+            "prompt": prompt,
+            "summary": summary,
+            "recent_turns": verbatim,
+            "prompt_tokens": count_tokens(prompt),
+            "full_history_tokens": self._full_history_tokens(query, conversation_id),
+            "turns_verbatim": len(verbatim),
+            "turns_left_out": len(pending) - len(verbatim),
+            "summarized": summarized_through > 0,
+        }
+
+    # Size of the prompt with every turn of the conversation verbatim (from stored per-turn counts)
+    def _full_history_tokens(self, query, conversation_id):
+        history_tokens = self.store.history_tokens(conversation_id)
+        if not history_tokens:
+            return count_tokens(build_copilot_prompt(query))
+        empty_turn = {"user": "", "ai": ""}
+        return count_tokens(build_copilot_prompt(query, recent_turns=[empty_turn])) - count_tokens(format_turns([empty_turn])) + history_tokens
+
+    # Save a finished turn (with the token counts from prepare()) and fold older turns into
+    # the summary
+    def record(self, prepared, query, reply, time=None):
+        turn = self.store.add_turn(
+            prepared["conversation_id"], query, reply,
+            tokens=count_tokens(format_turns([{"user": query, "ai": reply}])),
+            prompt_tokens=prepared["prompt_tokens"],
+            full_history_tokens=prepared["full_history_tokens"],
+            time=time
+        )
+        self.fold(prepared["conversation_id"])
+        return turn
+
+    # Summarize turns older than the verbatim window (in the background unless disabled)
+    def fold(self, conversation_id):
+        with self._lock:
+            if conversation_id in self._folding:
+                return
+            self._folding.add(conversation_id)
+        if self.background:
+            threading.Thread(target=self._fold, args=(conversation_id,), daemon=True).start()
+        else:
+            self._fold(conversation_id)
+
+    def _fold(self, conversation_id):
+        try:
+            summary, summarized_through = self.store.summary(conversation_id)
+            pending = self.store.turns(conversation_id, summarized_through)
+            older = pending[:-self.recent_turns] if self.recent_turns else pending
+            if len(older) >= self.fold_turns:
+                summary = self.summarize_fn(summary, older, self.summary_words)
+                self.store.set_summary(conversation_id, summary, older[-1]["id"])
+        except Exception:
+            pass  # the turns stay unfolded and are retried after the next reply
+        finally:
+            with self._lock:
+                self._folding.discard(conversation_id)
+
+    # Start a fresh conversation; the old one is kept, archived
+    def clear(self, owner):
+        self.store.archive(self.conversation(owner))
+
+
+# Shared manager used by the Co-Pilot tab
+copilot_memory = ConversationManager()
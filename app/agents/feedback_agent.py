@@ -1,23 +1,8 @@
-import os
-from dotenv import load_dotenv
-from google.generativeai import GenerativeModel
-import google.generativeai as genai
+from app.agents.llm_client import generate_text, stream_text, TextStream
 
-# Load API key from .env and configure
-load_dotenv()
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-genai.configure(api_key=GOOGLE_API_KEY)
-
-# Initialize model
-model = genai.GenerativeModel("gemini-1.5-flash")
-
-def generate_feedback_suggestions(course_name: str, what_worked: str, what_did_not: str) -> str:
-    # Input validation
-    if not course_name.strip() or not what_worked.strip() or not what_did_not.strip():
-        return "⚠️ Please provide course name, what worked, and what didn’t work to generate suggestions."
-
-    # Enhanced Prompt
-    prompt = f"""
+# Enhanced Prompt
+def build_feedback_prompt(course_name: str, what_worked: str, what_did_not: str) -> str:
+    return f"""
 🎓 You are an AI academic mentor reviewing weekly feedback for a course titled **"{course_name}"**.
 
 ✅ Positive aspects that worked well:
@@ -37,9 +22,19 @@ def generate_feedback_suggestions(course_name: str, what_worked: str, what_did_n
 Format your response using clear bullet points.
 """
 
+def generate_feedback_suggestions(course_name: str, what_worked: str, what_did_not: str) -> str:
+    # Input validation
+    if not course_name.strip() or not what_worked.strip() or not what_did_not.strip():
+        return "⚠️ Please provide course name, what worked, and what didn’t work to generate suggestions."
+
     # Error-safe generation
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return generate_text(build_feedback_prompt(course_name, what_worked, what_did_not))
     except Exception as e:
         return f"❌ Failed to generate feedback suggestions: {str(e)}"
+
+# Streaming variant: yields the suggestions as they are generated
+def stream_feedback_suggestions(course_name: str, what_worked: str, what_did_not: str) -> TextStream:
+    if not course_name.strip() or not what_worked.strip() or not what_did_not.strip():
+        return TextStream.from_text("⚠️ Please provide course name, what worked, and what didn’t work to generate suggestions.")
+    return stream_text(build_feedback_prompt(course_name, what_worked, what_did_not), error_message="❌ Failed to generate feedback suggestions")
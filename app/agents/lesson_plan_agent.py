@@ -1,21 +1,48 @@
-import os
-from dotenv import load_dotenv
-from google.generativeai import GenerativeModel
+from app.agents.llm_client import generate_text, stream_text, TextStream
+from app.agents.sectioned_generation import generate_sectioned
 
-import google.generativeai as genai
+def build_lesson_plan_prompt(course_name: str, duration: str, difficulty: str, outcomes: str, num_weeks: int = 12) -> str:
+    return f"""Create a weekly lesson plan for a course titled "{course_name}" lasting {num_weeks} weeks.
+Class duration per week: {duration}
+Student level: {difficulty}
+Target learning outcomes:
+{outcomes}
+
+Format output in bullet points with topic, subtopics, and suggested activities for each week."""
+
+# Sectioned mode: one-line-per-week outline, planned once
+def build_lesson_plan_outline_prompt(course_name: str, difficulty: str, outcomes: str, num_weeks: int = 12) -> str:
+    return f"""Plan the weekly topic sequence for a course titled "{course_name}" lasting {num_weeks} weeks.
+Student level: {difficulty}
+Target learning outcomes:
+{outcomes}
 
-load_dotenv()
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-genai.configure(api_key=GOOGLE_API_KEY)
-model = genai.GenerativeModel("gemini-1.5-flash")
+List exactly {num_weeks} lines in the form "Week N: <topic>" and nothing else."""
 
-def generate_lesson_plan(course_name: str, duration: str, difficulty: str, outcomes: str, num_weeks: int = 12) -> str:
-    prompt = f"""Create a weekly lesson plan for a course titled "{course_name}" lasting {num_weeks} weeks.
+# Sectioned mode: full detail for one block of weeks, following the shared outline
+def build_lesson_plan_section_prompt(course_name: str, duration: str, difficulty: str, outcomes: str,
+                                     outline: str, start_week: int, end_week: int) -> str:
+    return f"""You are writing part of a weekly lesson plan for a course titled "{course_name}".
 Class duration per week: {duration}
 Student level: {difficulty}
 Target learning outcomes:
 {outcomes}
 
-Format output in bullet points with topic, subtopics, and suggested activities for each week."""
-    response = model.generate_content(prompt)
-    return response.text
+Agreed week-by-week outline:
+{outline}
+
+Write ONLY weeks {start_week} to {end_week}, following the outline.
+Format output in bullet points with topic, subtopics, and suggested activities for each week. No introduction or conclusion."""
+
+def generate_lesson_plan(course_name: str, duration: str, difficulty: str, outcomes: str, num_weeks: int = 12, sectioned: bool = False) -> str:
+    if sectioned:
+        return generate_sectioned(
+            build_lesson_plan_outline_prompt(course_name, difficulty, outcomes, num_weeks),
+            lambda outline, start, end: build_lesson_plan_section_prompt(course_name, duration, difficulty, outcomes, outline, start, end),
+            num_weeks
+        )
+    return generate_text(build_lesson_plan_prompt(course_name, duration, difficulty, outcomes, num_weeks))
+
+# Streaming variant: yields the lesson plan as it is generated
+def stream_lesson_plan(course_name: str, duration: str, difficulty: str, outcomes: str, num_weeks: int = 12) -> TextStream:
+    return stream_text(build_lesson_plan_prompt(course_name, duration, difficulty, outcomes, num_weeks), error_message="❌ Failed to generate lesson plan")
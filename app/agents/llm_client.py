@@ -0,0 +1,174 @@
+import os
+import time
+import threading
+from collections import deque
+from dotenv import load_dotenv
+from app.utils.response_cache import response_cache, make_cache_key
+from app.agents.llm_dispatcher import dispatcher
+
+# Shared model registry. The Gemini SDK and sentence-transformers (torch) are slow to
+# import, so nothing is imported or constructed until a model is first used.
+
+load_dotenv()
+DEFAULT_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+RERANK_MODEL = os.getenv("RAG_RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+
+_lock = threading.Lock()
+_models = {}
+_embedding_model = None
+_rerank_model = None
+_configured = False
+
+# Recent time-to-first-token samples (seconds) for streamed, uncached generations
+_ttft_samples = deque(maxlen=200)
+
+# Get (or lazily build) a Gemini model by name
+def get_model(model_name: str = DEFAULT_MODEL):
+    model = _models.get(model_name)
+    if model is not None:
+        return model
+
+    with _lock:
+        if model_name not in _models:
+            import google.generativeai as genai
+
+            global _configured
+            if not _configured:
+                genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+                _configured = True
+            _models[model_name] = genai.GenerativeModel(model_name)
+        return _models[model_name]
+
+# Register a pre-built model under a name (e.g. a local fake in benchmarks)
+def register_model(model_name: str, model):
+    with _lock:
+        _models[model_name] = model
+
+# Get (or lazily load) the sentence embedding model shared by RAG and analytics
+def get_embedding_model():
+    global _embedding_model
+    if _embedding_model is not None:
+        return _embedding_model
+
+    with _lock:
+        if _embedding_model is None:
+            from sentence_transformers import SentenceTransformer
+
+            _embedding_model = SentenceTransformer(EMBEDDING_MODEL)
+        return _embedding_model
+
+# Get (or lazily load) the cross-encoder used to re-rank RAG candidates
+def get_rerank_model():
+    global _rerank_model
+    if _rerank_model is not None:
+        return _rerank_model
+
+    with _lock:
+        if _rerank_model is None:
+            from sentence_transformers import CrossEncoder
+
+            _rerank_model = CrossEncoder(RERANK_MODEL)
+        return _rerank_model
+
+# Raw SDK call (stream=True returns an iterator of partial responses)
+def _generate_content(model_name: str, prompt: str, generation_config: dict = None, stream: bool = False):
+    model = get_model(model_name)
+    if generation_config:
+        return model.generate_content(prompt, generation_config=generation_config, stream=stream)
+    return model.generate_content(prompt, stream=stream)
+
+# Generate text for a prompt; repeats are served from the response cache without
+# constructing the model at all. Misses go through the dispatcher (rate limit, retry,
+# coalescing of identical in-flight prompts). Errors are never cached.
+def generate_text(prompt: str, model_name: str = DEFAULT_MODEL, generation_config: dict = None) -> str:
+    key = make_cache_key(model_name, prompt, generation_config)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+
+    def call():
+        text = _generate_content(model_name, prompt, generation_config).text
+        response_cache.put(key, text)
+        return text
+
+    return dispatcher.call(key, call)
+
+
+# Iterable over the text pieces of a streamed generation. After iteration, `text` holds
+# the full reply and `ttft` the seconds until the first piece arrived. Cache hits are
+# yielded as a single piece; errors are yielded as "<error_message>: <error>".
+class TextStream:
+    def __init__(self, prompt: str, model_name: str = DEFAULT_MODEL, generation_config: dict = None, error_message: str = "❌ Error"):
+        self.prompt = prompt
+        self.model_name = model_name
+        self.generation_config = generation_config
+        self.error_message = error_message
+        self.text = ""
+        self.ttft = None
+        self.cached = False
+        self.error = None
+        self._static_text = None
+
+    # A stream that just yields a fixed message (e.g. a validation warning)
+    @classmethod
+    def from_text(cls, text: str):
+        stream = cls(prompt="")
+        stream._static_text = text
+        return stream
+
+    def __iter__(self):
+        if self._static_text is not None:
+            self.text = self._static_text
+            yield self._static_text
+            return
+
+        key = make_cache_key(self.model_name, self.prompt, self.generation_config)
+        cached = response_cache.get(key)
+        if cached is not None:
+            self.cached = True
+            self.ttft = 0.0
+            self.text = cached
+            yield cached
+            return
+
+        start = time.perf_counter()
+        parts = []
+        try:
+            # Rate limited and retried until the stream opens; streams are never coalesced
+            response = dispatcher.call_with_retry(
+                lambda: _generate_content(self.model_name, self.prompt, self.generation_config, stream=True)
+            )
+            for chunk in response:
+                piece = chunk.text
+                if not piece:
+                    continue
+                if not parts:
+                    self.ttft = time.perf_counter() - start
+                    _ttft_samples.append(self.ttft)
+                parts.append(piece)
+                yield piece
+        except Exception as e:
+            self.error = e
+            message = f"{self.error_message}: {str(e)}"
+            self.text = "".join(parts) + message
+            yield message
+            return
+
+        self.text = "".join(parts)
+        response_cache.put(key, self.text)
+
+# Stream text for a prompt (see TextStream)
+def stream_text(prompt: str, model_name: str = DEFAULT_MODEL, generation_config: dict = None, error_message: str = "❌ Error") -> TextStream:
+    return TextStream(prompt, model_name, generation_config, error_message)
+
+# Summary of recent time-to-first-token samples
+def ttft_stats() -> dict:
+    samples = sorted(_ttft_samples)
+    if not samples:
+        return {"count": 0, "p50": None, "p95": None}
+    return {
+        "count": len(samples),
+        "p50": samples[len(samples) // 2],
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    }
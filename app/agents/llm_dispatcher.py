@@ -0,0 +1,149 @@
+import os
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import Future
+from dotenv import load_dotenv
+
+# Central dispatcher every Gemini request goes through:
+# - token-bucket rate limiting so a burst of sessions stays under the API quota
+# - retry with jittered exponential backoff for quota / transient server errors
+# - single-flight coalescing: identical in-flight requests share one upstream call
+
+load_dotenv()
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "60"))  # sustained requests per minute (0 disables limiting)
+GEMINI_BURST = int(os.getenv("GEMINI_BURST", "10"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "4"))
+GEMINI_BACKOFF_BASE = float(os.getenv("GEMINI_BACKOFF_BASE", "1.0"))
+GEMINI_BACKOFF_MAX = float(os.getenv("GEMINI_BACKOFF_MAX", "30.0"))
+
+# google.api_core exception class names (and HTTP codes) worth retrying
+RETRYABLE_ERRORS = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable",
+    "DeadlineExceeded", "InternalServerError", "GatewayTimeout", "Aborted"
+}
+RETRYABLE_CODES = {429, 500, 502, 503, 504}
+
+# Checked by class name so the SDK does not have to be imported to classify errors
+def is_retryable(error: Exception) -> bool:
+    if any(cls.__name__ in RETRYABLE_ERRORS for cls in type(error).__mro__):
+        return True
+    return getattr(error, "code", None) in RETRYABLE_CODES
+
+
+# Classic token bucket; acquire() blocks until a token is available
+class TokenBucket:
+    def __init__(self, rate_per_sec: float, capacity: int):
+        self.rate = rate_per_sec
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    # Take a token, or return how long to wait before one is available
+    def _try_take(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            wait = self._try_take()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+
+class Dispatcher:
+    def __init__(self, rpm=GEMINI_RPM, burst=GEMINI_BURST, max_retries=GEMINI_MAX_RETRIES,
+                 backoff_base=GEMINI_BACKOFF_BASE, backoff_max=GEMINI_BACKOFF_MAX):
+        self.bucket = TokenBucket(rpm / 60.0, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._waits = deque(maxlen=500)
+        self._stats = {"requests": 0, "coalesced": 0, "retries": 0, "failures": 0, "waiting": 0, "in_flight": 0}
+
+    def _bump(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    # Wait for a rate-limit token, recording queue depth and wait time
+    def _acquire(self):
+        self._bump("waiting")
+        start = time.perf_counter()
+        try:
+            self.bucket.acquire()
+        finally:
+            with self._lock:
+                self._stats["waiting"] -= 1
+                self._waits.append(time.perf_counter() - start)
+
+    # Full-jitter exponential backoff
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    # Rate-limited call with retries on retryable errors; other errors raise immediately
+    def call_with_retry(self, fn):
+        self._bump("requests")
+        for attempt in range(self.max_retries + 1):
+            self._acquire()
+            self._bump("in_flight")
+            try:
+                return fn()
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    self._bump("failures")
+                    raise
+                self._bump("retries")
+            finally:
+                self._bump("in_flight", -1)
+            time.sleep(self._backoff(attempt))
+
+    # Like call_with_retry, but concurrent calls with the same key share one upstream call
+    def call(self, key: str, fn):
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = self.call_with_retry(fn)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            waits = sorted(self._waits)
+        stats["queue_depth"] = stats.pop("waiting")
+        stats["avg_wait"] = sum(waits) / len(waits) if waits else 0.0
+        stats["p95_wait"] = waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0
+        return stats
+
+
+# Shared dispatcher used by the LLM client
+dispatcher = Dispatcher()
@@ -1,26 +1,11 @@
-import os
-from dotenv import load_dotenv
-from google.generativeai import GenerativeModel
-import google.generativeai as genai
-
-# Load API key from .env and configure
-load_dotenv()
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-genai.configure(api_key=GOOGLE_API_KEY)
-
-# Load model
-model = genai.GenerativeModel("gemini-1.5-flash")
-
-def generate_resources(topic: str, difficulty: str, format_types: list) -> str:
-    # Input validation
-    if not topic.strip() or not difficulty.strip() or not format_types:
-        return "⚠️ Error: Topic, difficulty, and at least one format type are required."
+from app.agents.llm_client import generate_text, stream_text, TextStream
 
+# Enhanced Prompt
+def build_resources_prompt(topic: str, difficulty: str, format_types: list) -> str:
     # Format types into a clean comma-separated string
     formats = ', '.join(format_types)
 
-    # Enhanced Prompt
-    prompt = f"""
+    return f"""
 🎓 You are an AI-powered education assistant specialized in academic content curation.
 
 📌 Task: Recommend **high-quality, open-access online resources** to help educators teach the topic: **"{topic}"**  
@@ -38,9 +23,19 @@ def generate_resources(topic: str, difficulty: str, format_types: list) -> str:
 Your response should be concise, educator-friendly, and easy to scan.
 """
 
+def generate_resources(topic: str, difficulty: str, format_types: list) -> str:
+    # Input validation
+    if not topic.strip() or not difficulty.strip() or not format_types:
+        return "⚠️ Error: Topic, difficulty, and at least one format type are required."
+
     # Error-safe generation
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return generate_text(build_resources_prompt(topic, difficulty, format_types))
     except Exception as e:
         return f"❌ Failed to generate resources: {str(e)}"
+
+# Streaming variant: yields the resource list as it is generated
+def stream_resources(topic: str, difficulty: str, format_types: list) -> TextStream:
+    if not topic.strip() or not difficulty.strip() or not format_types:
+        return TextStream.from_text("⚠️ Error: Topic, difficulty, and at least one format type are required.")
+    return stream_text(build_resources_prompt(topic, difficulty, format_types), error_message="❌ Failed to generate resources")
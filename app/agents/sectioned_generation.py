@@ -0,0 +1,42 @@
+import os
+import asyncio
+from app.agents.llm_client import generate_text
+
+# "Sectioned" generation for long week-by-week documents: plan a short outline once,
+# then write each block of weeks as its own request, concurrently, and stitch the
+# blocks back together in week order. Wall-clock time follows the slowest block
+# instead of the full document length, and no single response is long enough to be cut off.
+
+SECTION_WEEKS = int(os.getenv("SECTION_WEEKS", "3"))
+SECTION_CONCURRENCY = int(os.getenv("SECTION_CONCURRENCY", "4"))
+
+# Split weeks 1..num_weeks into inclusive (start, end) blocks
+def week_blocks(num_weeks: int, weeks_per_section: int = SECTION_WEEKS) -> list:
+    weeks_per_section = max(1, weeks_per_section)
+    return [
+        (start, min(start + weeks_per_section - 1, num_weeks))
+        for start in range(1, num_weeks + 1, weeks_per_section)
+    ]
+
+# Run the section prompts with at most `max_concurrency` requests in flight, keeping order.
+# Blocking SDK calls run in worker threads so they still go through the shared client cache.
+async def generate_sections_async(prompts: list, max_concurrency: int = SECTION_CONCURRENCY) -> list:
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(prompt):
+        async with semaphore:
+            return await asyncio.to_thread(generate_text, prompt)
+
+    return await asyncio.gather(*(run(prompt) for prompt in prompts))
+
+# Outline once, then fan out one request per block of weeks.
+# build_section_prompt(outline, start_week, end_week) -> str
+def generate_sectioned(outline_prompt: str, build_section_prompt, num_weeks: int,
+                       weeks_per_section: int = SECTION_WEEKS, max_concurrency: int = SECTION_CONCURRENCY) -> str:
+    outline = generate_text(outline_prompt)
+    prompts = [
+        build_section_prompt(outline, start, end)
+        for start, end in week_blocks(num_weeks, weeks_per_section)
+    ]
+    sections = asyncio.run(generate_sections_async(prompts, max_concurrency))
+    return "\n\n".join(section.strip() for section in sections)
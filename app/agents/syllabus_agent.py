@@ -1,21 +1,9 @@
-import os
-from dotenv import load_dotenv
-from google.generativeai import GenerativeModel
-import google.generativeai as genai
-
-# Load environment and configure Gemini
-load_dotenv()
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-genai.configure(api_key=GOOGLE_API_KEY)
-model = genai.GenerativeModel("gemini-1.5-flash")
-
-def generate_syllabus(course_name: str, objectives: str, duration_weeks: int = 15) -> str:
-    # Input validation
-    if not course_name.strip() or not objectives.strip():
-        return "⚠️ Course name and objectives cannot be empty."
+from app.agents.llm_client import generate_text, stream_text, TextStream
+from app.agents.sectioned_generation import generate_sectioned
 
-    # Improved Prompt
-    prompt = f"""
+# Improved Prompt
+def build_syllabus_prompt(course_name: str, objectives: str, duration_weeks: int = 15) -> str:
+    return f"""
 📘 You are an AI-powered academic syllabus designer.
 
 🎯 Goal: Create a week-by-week syllabus plan for a university-level course titled: "{course_name}"
@@ -34,9 +22,56 @@ def generate_syllabus(course_name: str, objectives: str, duration_weeks: int = 1
 🚫 Do not include assessment rubrics or grading — focus only on syllabus flow.
 """
 
+# Sectioned mode: one-line-per-week outline, planned once
+def build_syllabus_outline_prompt(course_name: str, objectives: str, duration_weeks: int = 15) -> str:
+    return f"""
+📘 You are an AI-powered academic syllabus designer.
+
+Plan the topic sequence for a {duration_weeks}-week university-level course titled: "{course_name}"
+📌 Course Objectives:
+{objectives}
+
+List exactly {duration_weeks} lines in the form "Week N: <main topic>" and nothing else.
+"""
+
+# Sectioned mode: full detail for one block of weeks, following the shared outline
+def build_syllabus_section_prompt(course_name: str, objectives: str, outline: str, start_week: int, end_week: int) -> str:
+    return f"""
+📘 You are an AI-powered academic syllabus designer writing part of a syllabus for: "{course_name}"
+📌 Course Objectives:
+{objectives}
+
+🗺️ Agreed week-by-week outline:
+{outline}
+
+✍️ Write ONLY weeks {start_week} to {end_week}, following the outline. For each week include:
+  • 📚 Main topic(s)
+  • 🔍 Suggested subtopics
+  • 🎯 Weekly activity (e.g., quiz, lab, group discussion, case study)
+
+📝 Use clean bullet points, numbered by week. No introduction or conclusion.
+🚫 Do not include assessment rubrics or grading — focus only on syllabus flow.
+"""
+
+def generate_syllabus(course_name: str, objectives: str, duration_weeks: int = 15, sectioned: bool = False) -> str:
+    # Input validation
+    if not course_name.strip() or not objectives.strip():
+        return "⚠️ Course name and objectives cannot be empty."
+
     # Error handling
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        if sectioned:
+            return generate_sectioned(
+                build_syllabus_outline_prompt(course_name, objectives, duration_weeks),
+                lambda outline, start, end: build_syllabus_section_prompt(course_name, objectives, outline, start, end),
+                duration_weeks
+            )
+        return generate_text(build_syllabus_prompt(course_name, objectives, duration_weeks))
     except Exception as e:
-        return f"❌ Failed to generate syllabus: {str(e)}"
\ No newline at end of file
+        return f"❌ Failed to generate syllabus: {str(e)}"
+
+# Streaming variant: yields the syllabus as it is generated
+def stream_syllabus(course_name: str, objectives: str, duration_weeks: int = 15) -> TextStream:
+    if not course_name.strip() or not objectives.strip():
+        return TextStream.from_text("⚠️ Course name and objectives cannot be empty.")
+    return stream_text(build_syllabus_prompt(course_name, objectives, duration_weeks), error_message="❌ Failed to generate syllabus")
@@ -0,0 +1,278 @@
+import os
+import re
+import copy
+import hashlib
+import threading
+from collections import Counter
+import fitz  # PyMuPDF for PDFs
+import docx
+from dotenv import load_dotenv
+
+# Structure-aware chunking. Documents are read as blocks (headings and paragraphs, with
+# their page numbers), packed into chunks up to a token budget measured with the embedding
+# model's own tokenizer, and split only at block, then sentence, boundaries. A heading
+# starts a new chunk and is repeated at the top of its continuation chunks. Headers/footers
+# repeated page after page and duplicate chunks are dropped before anything is embedded.
+
+load_dotenv()
+RAG_CHUNK_TOKENS = int(os.getenv("RAG_CHUNK_TOKENS", "200"))  # all-MiniLM-L6-v2 reads up to 256
+RAG_CHUNK_MIN_TOKENS = int(os.getenv("RAG_CHUNK_MIN_TOKENS", "100"))  # smaller sections are merged forward
+
+# A short block seen on this many different pages is treated as a running header/footer
+BOILERPLATE_PAGES = 3
+BOILERPLATE_MAX_WORDS = 12
+BOILERPLATE_MARGIN = 0.1  # top/bottom fraction of a PDF page where running headers/footers sit
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+# Token counter for the embedding model, falling back to a word-based estimate when the
+# model has no Hugging Face tokenizer. A private copy of the tokenizer is used because
+# fast tokenizers are not safe to share with the encoder running on another thread.
+class TokenCounter:
+    def __init__(self, tokenizer=None):
+        self._tokenizer = tokenizer
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_embedding_model(cls):
+        from app.agents.llm_client import get_embedding_model
+        tokenizer = getattr(get_embedding_model(), "tokenizer", None)
+        return cls(copy.deepcopy(tokenizer) if tokenizer is not None else None)
+
+    def count(self, texts: list) -> list:
+        if self._tokenizer is None:
+            return [-(-len(text.split()) * 4 // 3) for text in texts]
+        with self._lock:
+            encoded = self._tokenizer(texts, add_special_tokens=False, return_attention_mask=False)
+        return [len(ids) for ids in encoded["input_ids"]]
+
+
+# Yield {"page", "text", "heading", "margin"} blocks for each PDF text block; headings are
+# blocks set noticeably larger than the page's body text (its most common font size), or
+# short single-line bold blocks, and "margin" marks blocks in the page's top/bottom margin
+def iter_pdf_blocks(file_path):
+    with fitz.open(file_path) as doc:
+        for page_number, page in enumerate(doc, start=1):
+            top = page.rect.y0 + page.rect.height * BOILERPLATE_MARGIN
+            bottom = page.rect.y1 - page.rect.height * BOILERPLATE_MARGIN
+            blocks = []
+            for block in page.get_text("dict")["blocks"]:
+                spans = [span for line in block.get("lines", []) for span in line["spans"] if span["text"].strip()]
+                if not spans:
+                    continue
+                text = " ".join(" ".join(span["text"] for span in line["spans"]).strip() for line in block["lines"]).strip()
+                y0, y1 = block["bbox"][1], block["bbox"][3]
+                blocks.append((text, spans, len(block["lines"]), y1 <= top or y0 >= bottom))
+            sizes = Counter()
+            for _, spans, _, _ in blocks:
+                for span in spans:
+                    sizes[round(span["size"], 1)] += len(span["text"])
+            body_size = sizes.most_common(1)[0][0] if sizes else 0
+            for text, spans, num_lines, margin in blocks:
+                words = len(text.split())
+                larger = max(span["size"] for span in spans) >= body_size * 1.15
+                bold = all(span["flags"] & 16 for span in spans)
+                heading = words <= 20 and (larger or (bold and num_lines == 1 and words <= BOILERPLATE_MAX_WORDS))
+                yield {"page": page_number, "text": text, "heading": heading, "margin": margin}
+
+# Yield blocks for each DOCX paragraph; Heading/Title styles mark headings and pages
+# follow Word's page breaks
+def iter_docx_blocks(file_path):
+    doc = docx.Document(file_path)
+    page_number = 1
+    for paragraph in doc.paragraphs:
+        text = paragraph.text.strip()
+        if text:
+            style = paragraph.style.name if paragraph.style is not None else ""
+            yield {"page": page_number, "text": text, "heading": style.startswith(("Heading", "Title"))}
+        page_number += len(paragraph._p.xpath('.//w:lastRenderedPageBreak | .//w:br[@w:type="page"]'))
+
+# Yield blocks for a TXT file: blank lines separate paragraphs, form feeds start a new
+# page, and markdown "#" lines or short ALL-CAPS lines are headings
+def iter_txt_blocks(file_path):
+    page_number = 1
+    lines, block_page = [], 1
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            for i, segment in enumerate(line.split("\f")):
+                if i:
+                    # Form feed: close the current block and move to the next page
+                    if lines:
+                        yield _txt_block(lines, block_page)
+                        lines = []
+                    page_number += 1
+                stripped = segment.strip()
+                if stripped.startswith("#"):
+                    if lines:
+                        yield _txt_block(lines, block_page)
+                        lines = []
+                    yield {"page": page_number, "text": stripped.lstrip("#").strip(), "heading": True}
+                elif stripped:
+                    if not lines:
+                        block_page = page_number
+                    lines.append(stripped)
+                elif lines:
+                    yield _txt_block(lines, block_page)
+                    lines = []
+    if lines:
+        yield _txt_block(lines, block_page)
+
+def _txt_block(lines, page_number):
+    text = " ".join(lines)
+    caps_title = len(lines) == 1 and len(text.split()) <= 10 and text.isupper()
+    return {"page": page_number, "text": text, "heading": caps_title}
+
+# Lazily read any supported document as structural blocks
+def iter_document_blocks(file_path):
+    if file_path.endswith(".pdf"):
+        return iter_pdf_blocks(file_path)
+    elif file_path.endswith(".docx"):
+        return iter_docx_blocks(file_path)
+    elif file_path.endswith(".txt"):
+        return iter_txt_blocks(file_path)
+    else:
+        raise ValueError("Unsupported file format.")
+
+# Case and punctuation-insensitive form used to spot duplicate chunks
+def normalize_for_dedup(text):
+    return " ".join(re.sub(r"[^\w]+", " ", text.lower()).split())
+
+# Also digit-insensitive, for running headers/footers in the page margin ("Page 3 of 9" ==
+# "Page 4 of 9")
+def boilerplate_key(text):
+    return re.sub(r"\d+", "#", normalize_for_dedup(text))
+
+# Insensitive to the block's own page number only, for footers found outside the margin
+# (DOCX/TXT, or PDFs laid out without one): "Page 3" on page 3 == "Page 4" on page 4, but
+# "Solve 3x + 5 = 11" and "Solve 2x + 7 = 15" stay distinct
+def page_number_key(text, page_number):
+    return re.sub(rf"(?<!\w){page_number}(?!\w)", "#", normalize_for_dedup(text))
+
+
+_token_counter = None
+_token_counter_lock = threading.Lock()
+
+# Shared counter for the embedding model's tokenizer, built on first use
+def default_token_counter():
+    global _token_counter
+    if _token_counter is None:
+        with _token_counter_lock:
+            if _token_counter is None:
+                _token_counter = TokenCounter.for_embedding_model()
+    return _token_counter
+
+
+class StructuredChunker:
+    def __init__(self, max_tokens=RAG_CHUNK_TOKENS, min_tokens=RAG_CHUNK_MIN_TOKENS, token_counter=None):
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+        self.token_counter = token_counter
+        # Filled in while chunking, for reporting
+        self.stats = {"blocks": 0, "boilerplate_dropped": 0, "duplicates_dropped": 0, "chunks": 0, "tokens": 0}
+
+    # Drop short blocks that keep recurring on different pages (running headers/footers).
+    # Only blocks in a PDF page's top/bottom margin may differ in any number; elsewhere the
+    # text must match exactly apart from the page number, so exercises or formulas that
+    # differ only in their numbers are kept. Headings in the body are never dropped: one
+    # that recurs in every chapter ("Exercises", "Summary") still starts its own section.
+    def _without_boilerplate(self, blocks):
+        pages_seen = {}
+        for block in blocks:
+            self.stats["blocks"] += 1
+            if block["heading"] and not block.get("margin"):
+                yield block
+                continue
+            if len(block["text"].split()) <= BOILERPLATE_MAX_WORDS:
+                if block.get("margin"):
+                    key = boilerplate_key(block["text"])
+                else:
+                    key = page_number_key(block["text"], block["page"])
+                pages = pages_seen.setdefault(key, set())
+                pages.add(block["page"])
+                if len(pages) >= BOILERPLATE_PAGES:
+                    self.stats["boilerplate_dropped"] += 1
+                    continue
+            yield block
+
+    # Split a block that is over budget at sentence boundaries, then at word boundaries
+    def _split_oversized(self, block, tokens, budget):
+        if tokens <= budget:
+            return [(block["text"], tokens)]
+        pieces = []
+        sentences = _SENTENCE_END.split(block["text"])
+        if len(sentences) == 1:
+            sentences = block["text"].split()
+        counts = self.token_counter.count(sentences)
+        current, current_tokens = [], 0
+        for sentence, count in zip(sentences, counts):
+            if count > budget and len(sentence.split()) > 1:
+                if current:
+                    pieces.append((" ".join(current), current_tokens))
+                    current, current_tokens = [], 0
+                pieces.extend(self._split_oversized({"text": sentence}, count, budget))
+                continue
+            if current and current_tokens + count > budget:
+                pieces.append((" ".join(current), current_tokens))
+                current, current_tokens = [], 0
+            current.append(sentence)
+            current_tokens += count
+        if current:
+            pieces.append((" ".join(current), current_tokens))
+        return pieces
+
+    # Yield {"text", "page_start", "page_end", "section"} chunks from structural blocks
+    def chunk(self, blocks):
+        if self.token_counter is None:
+            self.token_counter = default_token_counter()
+        seen = set()
+        section, section_tokens = "", 0
+        parts, tokens, page_start, page_end = [], 0, None, None
+
+        def emit():
+            text = "\n".join(parts)
+            key = hashlib.sha1(normalize_for_dedup(text).encode("utf-8")).digest()
+            if key in seen:
+                self.stats["duplicates_dropped"] += 1
+                return None
+            seen.add(key)
+            self.stats["chunks"] += 1
+            self.stats["tokens"] += tokens
+            return {"text": text, "page_start": page_start, "page_end": page_end, "section": section}
+
+        for block in self._without_boilerplate(blocks):
+            block_tokens = self.token_counter.count([block["text"]])[0]
+            if block["heading"]:
+                # A new section starts a new chunk unless the current one is still tiny
+                if parts and tokens >= self.min_tokens:
+                    chunk = emit()
+                    if chunk:
+                        yield chunk
+                    parts, tokens = [], 0
+                section, section_tokens = block["text"], block_tokens
+                if not parts:
+                    page_start = block["page"]
+                parts.append(block["text"])
+                tokens += block_tokens
+                page_end = block["page"]
+                continue
+
+            # Continuation chunks repeat the section heading, so leave room for it
+            budget = self.max_tokens - (section_tokens if section else 0)
+            for text, piece_tokens in self._split_oversized(block, block_tokens, max(1, budget)):
+                if parts and tokens + piece_tokens > self.max_tokens:
+                    chunk = emit()
+                    if chunk:
+                        yield chunk
+                    parts, tokens = ([section], section_tokens) if section else ([], 0)
+                    page_start = block["page"]
+                if not parts:
+                    page_start = block["page"]
+                parts.append(text)
+                tokens += piece_tokens
+                page_end = block["page"]
+
+        if parts:
+            chunk = emit()
+            if chunk:
+                yield chunk
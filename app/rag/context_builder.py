@@ -0,0 +1,144 @@
+import os
+from dotenv import load_dotenv
+from app.rag.chunking import TokenCounter, normalize_for_dedup
+
+# Packs retrieved chunks into the Q&A prompt: duplicates are dropped, neighbouring chunks
+# of the same document are merged into one passage (removing any overlap at the seam and
+# the section heading repeated at the top of each continuation chunk), passages are kept
+# in relevance order and the result is cut to a token budget. Each passage is numbered so
+# the answer can cite "[n]" back to its source and pages.
+
+load_dotenv()
+RAG_CONTEXT_TOKENS = int(os.getenv("RAG_CONTEXT_TOKENS", "1500"))
+MIN_TRUNCATED_TOKENS = 40  # don't bother squeezing in a passage fragment smaller than this
+
+# Word-based estimate; Gemini's tokenizer differs from the embedding model's anyway
+_token_counter = TokenCounter()
+
+def count_tokens(text):
+    return _token_counter.count([text])[0]
+
+# (document key, chunk index) from a chunk id "<document>_<i>"
+def _chunk_position(chunk_id, metadata):
+    document, _, index = chunk_id.rpartition("_")
+    document = (metadata or {}).get("document") or document
+    return document, int(index) if index.isdigit() else None
+
+# Join two texts, dropping words at the start of `second` that repeat the end of `first`
+def _join_overlapping(first, second, max_overlap=60):
+    first_words, second_words = first.split(), second.split()
+    for size in range(min(max_overlap, len(first_words), len(second_words)), 0, -1):
+        if first_words[-size:] == second_words[:size]:
+            return first + " " + " ".join(second_words[size:])
+    return first + "\n" + second
+
+# Drop the section heading the chunker repeats at the top of a continuation chunk
+def _without_heading(text, section):
+    first_line, newline, rest = text.partition("\n")
+    if section and newline and first_line.strip() == section.strip():
+        return rest
+    return text
+
+# Keep whole sentences (or words) of `text` up to `budget` tokens
+def _truncate(text, budget):
+    words = text.split()
+    kept = words[:max(1, budget * 3 // 4)]
+    while kept and count_tokens(" ".join(kept)) > budget:
+        kept = kept[:-max(1, len(kept) // 10)]
+    truncated = " ".join(kept)
+    sentence_end = max(truncated.rfind(". "), truncated.rfind("? "), truncated.rfind("! "))
+    if sentence_end > len(truncated) // 2:
+        truncated = truncated[:sentence_end + 1]
+    return truncated + " …"
+
+def _citation(metadata, page_start, page_end):
+    metadata = metadata or {}
+    pages = f"p. {page_start}" if page_start == page_end else f"pp. {page_start}–{page_end}"
+    parts = [metadata.get("source", "document")]
+    if page_start is not None:
+        parts.append(pages)
+    if metadata.get("section"):
+        parts.append(metadata["section"])
+    return ", ".join(parts)
+
+# Build the context block from a hybrid_search() result (ids/documents/metadatas in relevance order).
+# Returns {"text", "citations", "tokens", "tokens_before", "chunks_used", "chunks_retrieved"}.
+def build_context(retrieval, token_budget=RAG_CONTEXT_TOKENS):
+    ids, texts = retrieval["ids"], retrieval["documents"]
+    metadatas = retrieval.get("metadatas") or [None] * len(ids)
+    tokens_before = count_tokens("\n".join(texts))
+
+    # Drop exact (normalized) duplicates, keeping the more relevant copy
+    seen, chunks = set(), []
+    for rank, (chunk_id, text, metadata) in enumerate(zip(ids, texts, metadatas)):
+        key = normalize_for_dedup(text)
+        if key in seen:
+            continue
+        seen.add(key)
+        document, index = _chunk_position(chunk_id, metadata)
+        chunks.append({"rank": rank, "document": document, "index": index, "text": text, "metadata": metadata or {}})
+
+    # Merge runs of consecutive chunks from the same document; a passage ranks by its best chunk
+    passages = []
+    for chunk in sorted(chunks, key=lambda c: (c["document"], c["index"] if c["index"] is not None else -1)):
+        last = passages[-1] if passages else None
+        if (last and chunk["index"] is not None and last["document"] == chunk["document"]
+                and last["last_index"] is not None and chunk["index"] == last["last_index"] + 1):
+            text = chunk["text"]
+            if chunk["metadata"].get("section") == last["section"]:
+                text = _without_heading(text, last["section"])
+            last["text"] = _join_overlapping(last["text"], text)
+            last["section"] = chunk["metadata"].get("section")
+            last["last_index"] = chunk["index"]
+            last["rank"] = min(last["rank"], chunk["rank"])
+            last["page_end"] = chunk["metadata"].get("page_end", last["page_end"])
+            last["chunks"] += 1
+        else:
+            passages.append({
+                "document": chunk["document"],
+                "last_index": chunk["index"],
+                "rank": chunk["rank"],
+                "text": chunk["text"],
+                "metadata": chunk["metadata"],
+                "section": chunk["metadata"].get("section"),
+                "page_start": chunk["metadata"].get("page_start"),
+                "page_end": chunk["metadata"].get("page_end"),
+                "chunks": 1
+            })
+    passages.sort(key=lambda p: p["rank"])
+
+    # Drop passages wholly contained in a more relevant one, then fill the budget in relevance order
+    blocks, citations, used_tokens, chunks_used = [], [], 0, 0
+    kept_texts = []
+    for passage in passages:
+        normalized = normalize_for_dedup(passage["text"])
+        if any(normalized in kept for kept in kept_texts):
+            continue
+        number = len(citations) + 1
+        citation = _citation(passage["metadata"], passage["page_start"], passage["page_end"])
+        header = f"[{number}] ({citation})"
+        remaining = token_budget - used_tokens - count_tokens(header)
+        text = passage["text"]
+        tokens = count_tokens(text)
+        if tokens > remaining:
+            if remaining < MIN_TRUNCATED_TOKENS:
+                break
+            text = _truncate(text, remaining)
+            tokens = count_tokens(text)
+        kept_texts.append(normalized)
+        blocks.append(f"{header}\n{text}")
+        citations.append({"number": number, "citation": citation, "source": passage["metadata"].get("source"),
+                          "page_start": passage["page_start"], "page_end": passage["page_end"]})
+        used_tokens += tokens + count_tokens(header)
+        chunks_used += passage["chunks"]
+        if used_tokens >= token_budget:
+            break
+
+    return {
+        "text": "\n\n".join(blocks),
+        "citations": citations,
+        "tokens": used_tokens,
+        "tokens_before": tokens_before,
+        "chunks_used": chunks_used,
+        "chunks_retrieved": len(ids)
+    }
@@ -0,0 +1,427 @@
+import os
+import re
+import json
+import time
+import atexit
+import sqlite3
+import threading
+from contextlib import contextmanager
+import numpy as np
+from app.rag.vector_store import normalize_rows
+
+# Approximate nearest-neighbour store for large corpora (RAG_VECTOR_BACKEND=hnsw), built on
+# hnswlib. The HNSW graph answers top-k in roughly logarithmic time; a SQLite sidecar holds
+# ids, texts, metadata and a float16 copy of every embedding and is the source of truth.
+#
+# Queries do not take the store's lock, so sessions search in parallel and do not wait
+# behind writes; only resizing or saving the graph briefly pauses them (_SearchGate).
+#
+# Writes go to SQLite and the in-memory graph at once; the graph is saved to disk at most
+# every SAVE_INTERVAL seconds, and on open any writes newer than the saved graph are replayed
+# from SQLite. Deletes only mark graph nodes, so once enough have accumulated (or the HNSW
+# parameters change) the graph is rebuilt on a background thread while the old one keeps
+# serving queries, then swapped in.
+#
+# Implements the same collection API as FlatVectorStore (upsert, get, query, delete, count).
+
+REBUILD_DELETED_RATIO = 0.2   # rebuild once this share of graph nodes are deleted
+REBUILD_MIN_ELEMENTS = 1000
+SAVE_INTERVAL = 30.0          # seconds between graph saves while writing
+EXACT_FILTER_LIMIT = 2000     # filtered queries matching fewer chunks are scored exactly
+MIN_CAPACITY = 1024
+READ_PAGE = 10000             # rows read per step when building the graph
+SQL_BATCH = 500               # ids per IN (...) clause
+
+_FIELD = re.compile(r"^\w+$")
+
+
+# SQL condition for a Chroma-style where clause ({"field": value}, {"$or": [...]})
+def _where_sql(where):
+    if "$or" in where:
+        parts = [_where_sql(clause) for clause in where["$or"]]
+        return "(" + " OR ".join(sql for sql, _ in parts) + ")", [value for _, values in parts for value in values]
+    clauses, params = [], []
+    for field, value in where.items():
+        if not _FIELD.match(field):
+            raise ValueError(f"Unsupported metadata field {field!r}.")
+        clauses.append(f"json_extract(metadata, '$.{field}') = ?")
+        params.append(value)
+    return "(" + " AND ".join(clauses) + ")", params
+
+def _batches(items, size=SQL_BATCH):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+# hnswlib allows searches alongside inserts and deletes, but not while the graph is resized or
+# saved. Searches share the gate; a resize or save waits for running searches to finish and
+# holds off new ones until it is done.
+class _SearchGate:
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._searches = 0
+        self._exclusive = False
+
+    @contextmanager
+    def search(self):
+        with self._cond:
+            while self._exclusive:
+                self._cond.wait()
+            self._searches += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._searches -= 1
+                self._cond.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._cond:
+            while self._exclusive:
+                self._cond.wait()
+            self._exclusive = True
+            while self._searches:
+                self._cond.wait()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._exclusive = False
+                self._cond.notify_all()
+
+
+class HNSWVectorStore:
+    def __init__(self, path, m=16, ef_construction=200, ef_search=64):
+        import hnswlib  # optional dependency, only needed for this backend
+
+        self._hnswlib = hnswlib
+        self.path = path
+        self.params = {"m": m, "ef_construction": ef_construction}
+        self.ef_search = ef_search
+        self._local = threading.local()
+        self._lock = threading.RLock()
+        self._rebuild_thread = None
+        self._gate = _SearchGate()
+        os.makedirs(path, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS chunks (
+                    label INTEGER PRIMARY KEY,
+                    id TEXT NOT NULL UNIQUE,
+                    document TEXT,
+                    metadata TEXT,
+                    embedding BLOB,
+                    seq INTEGER NOT NULL,
+                    deleted INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_chunks_seq ON chunks(seq);
+                CREATE INDEX IF NOT EXISTS idx_chunks_course ON chunks(json_extract(metadata, '$.course'));
+                CREATE INDEX IF NOT EXISTS idx_chunks_document ON chunks(json_extract(metadata, '$.document'));
+                CREATE INDEX IF NOT EXISTS idx_chunks_source ON chunks(json_extract(metadata, '$.source'));
+                """
+            )
+        self._open()
+        atexit.register(self.save)
+
+    # One connection per thread (queries come from Streamlit sessions, rebuilds from a worker)
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.path, "chunks.db"), timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @property
+    def _index_path(self):
+        return os.path.join(self.path, "index.bin")
+
+    @property
+    def _state_path(self):
+        return os.path.join(self.path, "index_state.json")
+
+    # Load the saved graph and catch it up with SQLite, or build it if there is none
+    def _open(self):
+        conn = self._connect()
+        self._seq, next_label, self._live = conn.execute(
+            "SELECT COALESCE(MAX(seq), 0), COALESCE(MAX(label), -1) + 1, COALESCE(SUM(deleted = 0), 0) FROM chunks"
+        ).fetchone()
+        self._next_label = next_label
+        self._index, self._dim, self._saved_seq, self._last_save = None, None, 0, time.monotonic()
+
+        state = None
+        if os.path.exists(self._state_path) and os.path.exists(self._index_path):
+            with open(self._state_path, "r") as f:
+                state = json.load(f)
+        if state:
+            self._dim = state["dim"]
+            self._index = self._hnswlib.Index(space="cosine", dim=self._dim)
+            self._index.load_index(self._index_path, max_elements=state["capacity"])
+            self._index.set_ef(self.ef_search)
+            self._saved_seq = state["seq"]
+            self._replay(self._index, self._saved_seq)
+            if state["params"] != self.params:
+                self.rebuild()
+        elif self._live:
+            self._index = self._build(self._seq)
+            self._replay(self._index, self._seq)
+            self._save_locked()
+
+    def _new_index(self, dim, capacity):
+        index = self._hnswlib.Index(space="cosine", dim=dim)
+        index.init_index(max_elements=max(MIN_CAPACITY, capacity), M=self.params["m"], ef_construction=self.params["ef_construction"])
+        index.set_ef(self.ef_search)
+        return index
+
+    # Insert or update graph nodes, growing the graph's capacity geometrically
+    def _add(self, index, labels, vectors):
+        needed = index.element_count + len(labels)
+        if needed > index.get_max_elements():
+            with self._gate.exclusive():
+                index.resize_index(max(needed, 2 * index.get_max_elements()))
+        index.add_items(vectors, labels)
+
+    # A fresh graph over the live rows written up to `seq`
+    def _build(self, seq):
+        if self._dim is None:
+            blob = self._connect().execute("SELECT embedding FROM chunks WHERE deleted = 0 LIMIT 1").fetchone()[0]
+            self._dim = len(blob) // 2
+        index = self._new_index(self._dim, self._live)
+        cursor = self._connect().execute("SELECT label, embedding FROM chunks WHERE deleted = 0 AND seq <= ? ORDER BY label", (seq,))
+        while True:
+            rows = cursor.fetchmany(READ_PAGE)
+            if not rows:
+                return index
+            vectors = np.frombuffer(b"".join(blob for _, blob in rows), dtype=np.float16).reshape(len(rows), -1)
+            self._add(index, [label for label, _ in rows], vectors.astype(np.float32))
+
+    # Apply writes newer than `seq` (from SQLite) to a graph
+    def _replay(self, index, seq):
+        cursor = self._connect().execute("SELECT label, embedding, deleted FROM chunks WHERE seq > ? ORDER BY seq", (seq,))
+        while True:
+            rows = cursor.fetchmany(READ_PAGE)
+            if not rows:
+                return
+            live = [(label, blob) for label, blob, deleted in rows if not deleted]
+            if live:
+                vectors = np.frombuffer(b"".join(blob for _, blob in live), dtype=np.float16).reshape(len(live), -1)
+                self._add(index, [label for label, _ in live], vectors.astype(np.float32))
+            for label, _, deleted in rows:
+                if deleted:
+                    try:
+                        index.mark_deleted(label)
+                    except RuntimeError:
+                        pass  # never added to, or already deleted from, this graph
+
+    def _save_locked(self):
+        if self._index is None:
+            return
+        tmp_path = self._index_path + ".tmp"
+        with self._gate.exclusive():
+            self._index.save_index(tmp_path)
+        os.replace(tmp_path, self._index_path)
+        state = {"dim": self._dim, "seq": self._seq, "params": self.params, "capacity": self._index.get_max_elements()}
+        with open(self._state_path + ".tmp", "w") as f:
+            json.dump(state, f)
+        os.replace(self._state_path + ".tmp", self._state_path)
+        self._saved_seq = self._seq
+        self._last_save = time.monotonic()
+
+    # Persist the graph now if it has unsaved writes (also runs at interpreter exit)
+    def save(self):
+        with self._lock:
+            if self._seq != self._saved_seq:
+                self._save_locked()
+
+    def _after_write(self):
+        if self._index is not None and self._index.element_count >= REBUILD_MIN_ELEMENTS:
+            deleted = self._index.element_count - self._live
+            if deleted > REBUILD_DELETED_RATIO * self._index.element_count:
+                self.rebuild()
+        if self._seq != self._saved_seq and time.monotonic() - self._last_save >= SAVE_INTERVAL:
+            self._save_locked()
+
+    # Rebuild the graph in the background (dropping deleted nodes, applying current
+    # parameters); queries use the old graph until the new one is swapped in
+    def rebuild(self, wait=False):
+        with self._lock:
+            if self._rebuild_thread is None or not self._rebuild_thread.is_alive():
+                self._rebuild_thread = threading.Thread(target=self._rebuild, name="rag-hnsw-rebuild", daemon=True)
+                self._rebuild_thread.start()
+            thread = self._rebuild_thread
+        if wait:
+            thread.join()
+
+    def _rebuild(self):
+        with self._lock:
+            seq = self._seq
+        index = self._build(seq) if self._live else None
+        with self._lock:
+            if index is not None:
+                self._replay(index, seq)
+            self._index = index
+            # Tombstones are only needed to replay deletes onto an older saved graph
+            with self._connect() as conn:
+                conn.execute("DELETE FROM chunks WHERE deleted = 1 AND seq <= ?", (seq,))
+            self._save_locked()
+
+    def count(self):
+        return self._live
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        vectors = normalize_rows(np.asarray(embeddings, dtype=np.float32))
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [None] * len(ids)
+        with self._lock:
+            conn = self._connect()
+            existing = {}
+            for batch in _batches(list(ids)):
+                for chunk_id, label, deleted in conn.execute(
+                    f"SELECT id, label, deleted FROM chunks WHERE id IN ({', '.join('?' * len(batch))})", batch
+                ):
+                    existing[chunk_id] = (label, deleted)
+            labels, rows = [], []
+            for chunk_id, vector, document, metadata in zip(ids, vectors, documents, metadatas):
+                if chunk_id in existing:
+                    label, deleted = existing[chunk_id]
+                    self._live += deleted
+                else:
+                    label = self._next_label
+                    self._next_label += 1
+                    self._live += 1
+                existing[chunk_id] = (label, 0)
+                self._seq += 1
+                labels.append(label)
+                rows.append((label, chunk_id, document, json.dumps(metadata), vector.astype(np.float16).tobytes(), self._seq))
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO chunks (label, id, document, metadata, embedding, seq, deleted) VALUES (?, ?, ?, ?, ?, ?, 0)",
+                    rows
+                )
+            if self._index is None:
+                self._dim = vectors.shape[1]
+                self._index = self._new_index(self._dim, len(labels))
+            self._add(self._index, labels, vectors)
+            self._after_write()
+
+    add = upsert
+
+    def delete(self, ids=None, where=None):
+        with self._lock:
+            conn = self._connect()
+            labels = []
+            for batch in _batches(list(ids or [])):
+                labels += [row[0] for row in conn.execute(
+                    f"SELECT label FROM chunks WHERE deleted = 0 AND id IN ({', '.join('?' * len(batch))})", batch
+                )]
+            if where:
+                sql, params = _where_sql(where)
+                labels += [row[0] for row in conn.execute(f"SELECT label FROM chunks WHERE deleted = 0 AND {sql}", params)]
+            labels = sorted(set(labels))
+            if not labels:
+                return
+            rows = []
+            for label in labels:
+                self._seq += 1
+                rows.append((self._seq, label))
+            with conn:
+                conn.executemany("UPDATE chunks SET deleted = 1, embedding = NULL, document = NULL, seq = ? WHERE label = ?", rows)
+            for label in labels:
+                self._index.mark_deleted(label)
+            self._live -= len(labels)
+            self._after_write()
+
+    def _rows(self, labels, include):
+        columns = ["label", "id", "document", "metadata", "embedding"]
+        found = {}
+        for batch in _batches(list(labels)):
+            for row in self._connect().execute(
+                f"SELECT {', '.join(columns)} FROM chunks WHERE label IN ({', '.join('?' * len(batch))})", batch
+            ):
+                found[row[0]] = row
+        return self._result([found[label] for label in labels if label in found], include)
+
+    @staticmethod
+    def _result(rows, include):
+        result = {"ids": [row[1] for row in rows]}
+        if "documents" in include:
+            result["documents"] = [row[2] for row in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [json.loads(row[3]) if row[3] else None for row in rows]
+        if "embeddings" in include:
+            result["embeddings"] = [np.frombuffer(row[4], dtype=np.float16).astype(np.float32).tolist() for row in rows]
+        return result
+
+    def get(self, ids=None, where=None, include=("documents", "metadatas"), limit=None, offset=0):
+        conditions, params = ["deleted = 0"], []
+        if where:
+            sql, where_params = _where_sql(where)
+            conditions.append(sql)
+            params += where_params
+        query = f"SELECT label, id, document, metadata, embedding FROM chunks WHERE {' AND '.join(conditions)}"
+        conn = self._connect()
+        if ids is not None:
+            rows = []
+            for batch in _batches(list(ids)):
+                rows += conn.execute(f"{query} AND id IN ({', '.join('?' * len(batch))}) ORDER BY label", params + batch).fetchall()
+            rows = rows[offset:offset + limit if limit is not None else None]
+        else:
+            rows = conn.execute(f"{query} ORDER BY label LIMIT ? OFFSET ?", params + [-1 if limit is None else limit, offset]).fetchall()
+        return self._result(rows, include)
+
+    # Approximate top-k per query; filters matching only a few chunks are scored exactly
+    # against their float16 embeddings in SQLite. Distances are 1 - cosine similarity, as with
+    # Chroma's cosine space. Queries never take the store's lock, so they neither queue behind
+    # each other nor wait for a write to finish.
+    def query(self, query_embeddings, n_results=10, where=None, include=("documents", "metadatas", "distances")):
+        queries = normalize_rows(np.asarray(query_embeddings, dtype=np.float32))
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        index, allowed, vectors = self._index, None, None
+        if where:
+            sql, params = _where_sql(where)
+            conn = self._connect()
+            rows = conn.execute(
+                f"SELECT label, embedding FROM chunks WHERE deleted = 0 AND {sql} LIMIT ?", params + [EXACT_FILTER_LIMIT + 1]
+            ).fetchall()
+            if len(rows) <= EXACT_FILTER_LIMIT:
+                allowed = [label for label, _ in rows]
+                vectors = np.frombuffer(b"".join(blob for _, blob in rows), dtype=np.float16).reshape(len(rows), -1)
+            else:
+                allowed = [row[0] for row in conn.execute(f"SELECT label FROM chunks WHERE deleted = 0 AND {sql}", params)]
+        candidates = len(allowed) if vectors is not None else 0 if index is None else self._live if allowed is None else len(allowed)
+        k = min(n_results, candidates)
+
+        matches = []
+        if k and vectors is not None:
+            for scores in queries @ vectors.astype(np.float32).T:
+                top = np.argsort(-scores, kind="stable")[:k]
+                matches.append(([allowed[i] for i in top], [float(1.0 - scores[i]) for i in top]))
+        elif k:
+            allowed_set = set(allowed) if allowed is not None else None
+            with self._gate.search():
+                index.set_ef(max(self.ef_search, k))
+                for query in queries:
+                    matches.append(self._knn(index, query, k, allowed_set.__contains__ if allowed_set is not None else None))
+        else:
+            matches = [([], [])] * len(queries)
+
+        for labels, distances in matches:
+            found = self._rows(labels, include)
+            results["ids"].append(found["ids"])
+            results["documents"].append(found.get("documents"))
+            results["metadatas"].append(found.get("metadatas"))
+            results["distances"].append(distances)
+        return results
+
+    # hnswlib raises when it cannot find k neighbours (small ef, heavy filtering); ask for fewer
+    @staticmethod
+    def _knn(index, query, k, filter_fn):
+        while k:
+            try:
+                labels, distances = index.knn_query(query, k=k, num_threads=1, filter=filter_fn)
+                return labels[0].tolist(), distances[0].tolist()
+            except RuntimeError:
+                k //= 2
+        return [], []
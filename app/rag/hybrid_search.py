@@ -0,0 +1,105 @@
+import re
+import math
+import heapq
+import threading
+from collections import Counter, defaultdict
+
+# Lexical side of hybrid retrieval: an in-memory BM25 inverted index over the stored
+# chunks, and reciprocal rank fusion to merge its ranking with the vector ranking.
+# Exact tokens such as course codes ("CS-201") or formula names keep their punctuation,
+# so they match even when the embedding model treats them as noise.
+
+# Words, plus hyphen/dot/underscore-joined codes kept whole ("cs-201", "o(n", "f1.5")
+_TOKEN_RE = re.compile(r"\w+(?:[-._]\w+)*")
+
+def tokenize(text: str) -> list:
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        tokens.append(token)
+        # Also index the parts of a joined code so "cs" or "201" alone still match
+        if any(sep in token for sep in "-._"):
+            tokens.extend(part for part in re.split(r"[-._]", token) if part)
+    return tokens
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = defaultdict(dict)  # term -> {doc_id: term frequency}
+        self._doc_terms = {}  # doc_id -> {term: term frequency}
+        self._doc_lengths = {}  # doc_id -> number of tokens
+        self._doc_groups = {}  # doc_id -> group label (e.g. course), for filtered search
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def _remove_locked(self, doc_id):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        self._doc_groups.pop(doc_id, None)
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+
+    # Add or replace documents, optionally with a group label per document
+    def add(self, doc_ids: list, texts: list, groups: list = None):
+        with self._lock:
+            for i, (doc_id, text) in enumerate(zip(doc_ids, texts)):
+                self._remove_locked(doc_id)
+                if groups:
+                    self._doc_groups[doc_id] = groups[i]
+                terms = Counter(tokenize(text))
+                self._doc_terms[doc_id] = terms
+                self._doc_lengths[doc_id] = sum(terms.values())
+                self._total_length += self._doc_lengths[doc_id]
+                for term, frequency in terms.items():
+                    self._postings[term][doc_id] = frequency
+
+    def remove(self, doc_ids: list):
+        with self._lock:
+            for doc_id in doc_ids:
+                self._remove_locked(doc_id)
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_lengths.clear()
+            self._doc_groups.clear()
+            self._total_length = 0
+
+    # Top `top_k` (doc_id, score) pairs; only documents sharing a query term (and in `group`, if given) are scored
+    def search(self, query: str, top_k: int = 20, group: str = None) -> list:
+        with self._lock:
+            num_docs = len(self._doc_terms)
+            if not num_docs:
+                return []
+            avg_length = self._total_length / num_docs
+            scores = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (num_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    if group and self._doc_groups.get(doc_id) != group:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+
+# Merge ranked id lists: score(id) = sum over rankings of 1 / (k + rank)
+def reciprocal_rank_fusion(rankings: list, k: int = 60) -> list:
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
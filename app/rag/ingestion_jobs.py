@@ -0,0 +1,166 @@
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from app.rag.rag_retriever import iter_embed_documents, count_pages
+
+# Background ingestion: uploads enqueue a job per document and return at once, a small
+# worker pool parses and embeds them, and the UI polls job status (pages parsed, chunks
+# embedded). The files of one upload form a batch that runs through the cross-document
+# pipeline (iter_embed_documents), so upcoming files are read and chunked while the current
+# one is embedded. Jobs can be cancelled while queued or between batches while running. A
+# job given its own copy of the upload (remove_file=True) deletes it once it has finished.
+
+load_dotenv()
+RAG_JOB_WORKERS = int(os.getenv("RAG_JOB_WORKERS", "2"))
+MAX_FINISHED_JOBS = 200  # finished jobs kept for status display
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class IngestionJob:
+    def __init__(self, file_path, source_label, owner=None, course=None, remove_file=False):
+        self.id = uuid.uuid4().hex
+        self.file_path = file_path
+        self.remove_file = remove_file
+        self.source_label = source_label
+        self.owner = owner
+        self.course = course
+        self.status = QUEUED
+        self.total_pages = None  # known up front for PDFs only
+        self.pages = 0
+        self.chunks = 0
+        self.num_chunks = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+
+    # Called from the embedding pipeline; raising here aborts the upload
+    def _progress(self, stage, count):
+        if self._cancel.is_set():
+            raise JobCancelled()
+        setattr(self, stage, count)
+
+    # Plain-dict snapshot for the UI
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "source_label": self.source_label,
+            "course": self.course,
+            "status": self.status,
+            "total_pages": self.total_pages,
+            "pages": self.pages,
+            "chunks": self.chunks,
+            "num_chunks": self.num_chunks,
+            "error": self.error,
+            "elapsed": ((self.finished_at or time.time()) - self.started_at) if self.started_at else 0.0,
+        }
+
+
+class IngestionQueue:
+    def __init__(self, max_workers=RAG_JOB_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="rag-ingest")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Enqueue a document for an owner/course; returns the job id immediately
+    def submit(self, file_path, source_label, owner=None, course=None, remove_file=False):
+        return self.submit_many([(file_path, source_label)], owner, course, remove_file)[0]
+
+    # Enqueue (file_path, source_label) pairs as one batch; returns their job ids immediately
+    def submit_many(self, files, owner=None, course=None, remove_file=False):
+        batch = [IngestionJob(file_path, source_label, owner, course, remove_file) for file_path, source_label in files]
+        with self._lock:
+            for job in batch:
+                self._jobs[job.id] = job
+            self._trim()
+        if batch:
+            self._pool.submit(self._run, batch)
+        return [job.id for job in batch]
+
+    # Forget the oldest finished jobs beyond MAX_FINISHED_JOBS
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.status not in ACTIVE_STATUSES]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def _run(self, batch):
+        # Jobs cancelled while queued never reach the pipeline
+        for job in batch:
+            if job._cancel.is_set():
+                self._finish(job, CANCELLED)
+        batch = [job for job in batch if job.status == QUEUED]
+        if not batch:
+            return
+        for job in batch:
+            try:
+                job.total_pages = count_pages(job.file_path)
+            except Exception:
+                pass  # an unreadable file fails in the pipeline, with its error
+        outcomes = iter_embed_documents(
+            [(job.file_path, job.source_label) for job in batch], owner=batch[0].owner, course=batch[0].course,
+            progress_callbacks=[job._progress for job in batch]
+        )
+        try:
+            for job in batch:
+                job.status = RUNNING
+                job.started_at = time.time()
+                outcome = next(outcomes)
+                if isinstance(outcome, JobCancelled):
+                    # The pipeline has already rolled the document back to its previous version
+                    # (or removed it, if this was its first upload)
+                    self._finish(job, CANCELLED)
+                elif isinstance(outcome, Exception):
+                    job.error = str(outcome)
+                    self._finish(job, FAILED)
+                else:
+                    job.num_chunks = job.chunks = outcome
+                    self._finish(job, DONE)
+        except Exception as e:
+            for job in batch:
+                if job.status in ACTIVE_STATUSES:
+                    job.error = str(e)
+                    self._finish(job, FAILED)
+        finally:
+            outcomes.close()
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished_at = time.time()
+        if job.remove_file:
+            try:
+                os.remove(job.file_path)
+            except OSError:
+                pass
+
+    # Request cancellation; returns False if the job has already finished
+    def cancel(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None or job.status not in ACTIVE_STATUSES:
+            return False
+        job._cancel.set()
+        return True
+
+    def get(self, job_id):
+        job = self._jobs.get(job_id)
+        return job.to_dict() if job else None
+
+    # Snapshots of the given jobs (or all), oldest first
+    def jobs(self, job_ids=None):
+        with self._lock:
+            selected = list(self._jobs.values()) if job_ids is None else [self._jobs[j] for j in job_ids if j in self._jobs]
+        return [job.to_dict() for job in selected]
+
+
+# Shared queue used by the RAG Document Uploader
+ingestion_queue = IngestionQueue()
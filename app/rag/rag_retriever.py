@@ -1,32 +1,263 @@
 import os
+import re
+import json
+import time
+import hashlib
+import queue
+import threading
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 import fitz  # PyMuPDF for PDFs
 import docx
-import chromadb
-from chromadb.utils import embedding_functions
-from sentence_transformers import SentenceTransformer
 from dotenv import load_dotenv
+from app.agents.llm_client import get_embedding_model, get_rerank_model
+from app.rag.hybrid_search import BM25Index, reciprocal_rank_fusion
+from app.rag.chunking import StructuredChunker, iter_document_blocks, RAG_CHUNK_TOKENS
+from app.rag.vector_store import FlatVectorStore
+from app.rag.hnsw_store import HNSWVectorStore
+from app.utils.response_cache import LRUCache
 
 load_dotenv()
 
-# Load embedding model
-sentence_model = SentenceTransformer("all-MiniLM-L6-v2")
+# Vector backend: "chroma", "flat" for an exact memory-mapped NumPy index (small courses;
+# RAG_FLAT_DTYPE is float16 or int8) or "hnsw" for an hnswlib ANN index (large corpora).
+# Each backend keeps its own store and manifests.
+RAG_VECTOR_BACKEND = os.getenv("RAG_VECTOR_BACKEND", "chroma").lower()
+RAG_FLAT_DTYPE = os.getenv("RAG_FLAT_DTYPE", "float16").lower()
 
-# Setup ChromaDB
-chroma_client = chromadb.Client()
-collection = chroma_client.get_or_create_collection("teachmate_rag")
+# HNSW graph degree and build-time candidate list (changing either triggers a background
+# rebuild), and the search-time candidate list: higher means better recall, slower queries
+RAG_HNSW_M = int(os.getenv("RAG_HNSW_M", "16"))
+RAG_HNSW_EF_CONSTRUCTION = int(os.getenv("RAG_HNSW_EF_CONSTRUCTION", "200"))
+RAG_HNSW_EF_SEARCH = int(os.getenv("RAG_HNSW_EF_SEARCH", "64"))
+
+# On-disk location of the vector store and its per-document manifest
+CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "app/memory/chroma_db")
+RAG_FLAT_DIR = os.getenv("RAG_FLAT_DIR", "app/memory/flat_index")
+RAG_HNSW_DIR = os.getenv("RAG_HNSW_DIR", "app/memory/hnsw_index")
+RAG_STORE_DIR = {"flat": RAG_FLAT_DIR, "hnsw": RAG_HNSW_DIR}.get(RAG_VECTOR_BACKEND, CHROMA_PERSIST_DIR)
+RAG_MANIFEST_PATH = os.path.join(RAG_STORE_DIR, "manifest.json")
+
+# Shared collection for documents without an owner; each teacher gets their own collection,
+# so search cost follows their own corpus rather than everyone's
+DEFAULT_COLLECTION = "teachmate_rag"
+
+# Bump whenever chunking changes so unchanged files are still re-embedded
+CHUNKING_VERSION = f"structured-v2-tokens-{RAG_CHUNK_TOKENS}"
+
+# Embedding pipeline tuning: encoder batch size, chunks per collection write, parallel readers
+EMBED_BATCH_SIZE = int(os.getenv("RAG_EMBED_BATCH_SIZE", "64"))
+ADD_BATCH_SIZE = int(os.getenv("RAG_ADD_BATCH_SIZE", "256"))
+INGEST_WORKERS = int(os.getenv("RAG_INGEST_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Chunk batches a reader thread may run ahead of the encoder (bounds memory per document)
+PREFETCH_BATCHES = 2
+
+# Hybrid retrieval: candidates taken from each ranker, RRF constant, optional cross-encoder re-ranking
+RAG_CANDIDATES = int(os.getenv("RAG_CANDIDATES", "20"))
+RAG_RRF_K = int(os.getenv("RAG_RRF_K", "60"))
+RAG_RERANK = os.getenv("RAG_RERANK", "0").lower() in ("1", "true", "yes")
+
+# Entries in the query-embedding and retrieval-result caches
+RAG_QUERY_CACHE_SIZE = int(os.getenv("RAG_QUERY_CACHE_SIZE", "1024"))
+
+# Guards manifest read-modify-write across concurrent Streamlit sessions
+_manifest_lock = threading.Lock()
+
+_chroma_client = None
+_collections = {}  # collection name -> collection
+_collection_lock = threading.Lock()
+
+_bm25_indexes = {}  # collection name -> BM25Index
+_bm25_lock = threading.Lock()
+
+# Query embeddings and retrieval results for repeated questions. Result keys include the
+# collection version, which every upsert/delete bumps, so stale results are never served.
+_query_embeddings = LRUCache(RAG_QUERY_CACHE_SIZE)
+_retrieval_results = LRUCache(RAG_QUERY_CACHE_SIZE)
+_collection_versions = {}  # collection name -> version
+_cache_stats = {"embedding_hits": 0, "embedding_misses": 0, "result_hits": 0, "result_misses": 0}
+_cache_lock = threading.Lock()
+
+# Chroma collection name for an owner (names allow only [a-zA-Z0-9._-]; the hash keeps them unique)
+def collection_name(owner=None):
+    if not owner:
+        return DEFAULT_COLLECTION
+    slug = re.sub(r"[^a-z0-9_-]+", "-", owner.lower()).strip("-_")[:40]
+    return f"{DEFAULT_COLLECTION}_{slug}_{hashlib.sha1(owner.encode('utf-8')).hexdigest()[:8]}"
+
+# Open a collection in the configured backend
+def _open_collection(name):
+    global _chroma_client
+    if RAG_VECTOR_BACKEND == "flat":
+        return FlatVectorStore(os.path.join(RAG_FLAT_DIR, name), RAG_FLAT_DTYPE)
+    if RAG_VECTOR_BACKEND == "hnsw":
+        return HNSWVectorStore(os.path.join(RAG_HNSW_DIR, name), RAG_HNSW_M, RAG_HNSW_EF_CONSTRUCTION, RAG_HNSW_EF_SEARCH)
+    if _chroma_client is None:
+        import chromadb
+
+        os.makedirs(CHROMA_PERSIST_DIR, exist_ok=True)
+        _chroma_client = chromadb.PersistentClient(path=CHROMA_PERSIST_DIR)
+    return _chroma_client.get_or_create_collection(name)
+
+# Open the owner's collection on first use (persistent, so embeddings survive server restarts)
+def get_collection(owner=None):
+    name = collection_name(owner)
+    collection = _collections.get(name)
+    if collection is None:
+        with _collection_lock:
+            if name not in _collections:
+                _collections[name] = _open_collection(name)
+            collection = _collections[name]
+    return collection
+
+# A document is identified by its label within its course (and its owner's collection)
+def document_key(source_label, course=None):
+    return f"{course}/{source_label}" if course else source_label
+
+# Chroma `where` clause restricting a query to one course
+def _course_filter(course=None):
+    return {"course": course} if course else None
+
+# BM25 index over an owner's stored chunks, built from the collection on first use and then
+# kept in step with upserts and deletes. Chunks are grouped by course for filtered search.
+def get_bm25_index(owner=None, page_size=5000):
+    name = collection_name(owner)
+    index = _bm25_indexes.get(name)
+    if index is None:
+        with _bm25_lock:
+            if name not in _bm25_indexes:
+                index = BM25Index()
+                offset = 0
+                while True:
+                    page = get_collection(owner).get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+                    if not page["ids"]:
+                        break
+                    index.add(page["ids"], page["documents"], [(m or {}).get("course", "") for m in page["metadatas"]])
+                    offset += len(page["ids"])
+                _bm25_indexes[name] = index
+            index = _bm25_indexes[name]
+    return index
+
+# Keep an already-built BM25 index current (an unbuilt one reads the collection later)
+def _index_chunks(owner, chunk_ids, texts, course=None):
+    index = _bm25_indexes.get(collection_name(owner))
+    if index is not None:
+        index.add(chunk_ids, texts, [course or ""] * len(chunk_ids))
+
+def _unindex_chunks(owner, chunk_ids):
+    index = _bm25_indexes.get(collection_name(owner))
+    if index is not None:
+        index.remove(chunk_ids)
+
+# Incremented whenever an owner's stored chunks change
+def collection_version(owner=None):
+    return _collection_versions.get(collection_name(owner), 0)
+
+def _bump_collection_version(owner=None):
+    name = collection_name(owner)
+    with _cache_lock:
+        _collection_versions[name] = _collection_versions.get(name, 0) + 1
+
+def _count(stat):
+    with _cache_lock:
+        _cache_stats[stat] += 1
+
+def retrieval_cache_stats():
+    with _cache_lock:
+        stats = dict(_cache_stats)
+    stats["collections"] = len(_collection_versions)
+    return stats
+
+# Case- and whitespace-insensitive form of a question, used for cache keys and encoding
+def normalize_query(query):
+    return " ".join(query.lower().split())
+
+# Encode a (normalized) query, reusing embeddings of recently asked questions
+def embed_query(query):
+    embedding = _query_embeddings.get(query)
+    if embedding is not None:
+        _count("embedding_hits")
+        return embedding
+    _count("embedding_misses")
+    embedding = get_embedding_model().encode(query).tolist()
+    _query_embeddings.put(query, embedding)
+    return embedding
+
+# One manifest per collection (the shared collection keeps the original manifest.json)
+def manifest_path(owner=None):
+    if not owner:
+        return RAG_MANIFEST_PATH
+    return os.path.join(RAG_STORE_DIR, f"manifest_{collection_name(owner)}.json")
+
+# Load the manifest: document key -> {hash, num_chunks, chunking, source, course, uploaded_at}
+def load_manifest(owner=None):
+    path = manifest_path(owner)
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            try:
+                return json.load(f)
+            except json.JSONDecodeError:
+                return {}
+    return {}
+
+# Write the manifest atomically so a crash never leaves it half-written
+def save_manifest(manifest, owner=None):
+    path = manifest_path(owner)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+# Hash file contents in blocks so large files are never fully loaded
+def compute_file_hash(file_path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# Yield (page_number, text) for each PDF page, one page in memory at a time
+def iter_pdf_pages(file_path):
+    with fitz.open(file_path) as doc:
+        for page_number, page in enumerate(doc, start=1):
+            yield page_number, page.get_text()
+
+# Yield (page_number, text) for each DOCX paragraph; pages follow Word's page breaks
+def iter_docx_paragraphs(file_path):
+    doc = docx.Document(file_path)
+    page_number = 1
+    for paragraph in doc.paragraphs:
+        yield page_number, paragraph.text
+        page_number += len(paragraph._p.xpath('.//w:lastRenderedPageBreak | .//w:br[@w:type="page"]'))
+
+# Yield (page_number, line) for a TXT file; form feeds start a new page
+def iter_txt_lines(file_path):
+    page_number = 1
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            yield page_number, line
+            page_number += line.count("\f")
+
+# Lazily read any supported document as (page_number, text) pieces
+def iter_document(file_path):
+    if file_path.endswith(".pdf"):
+        return iter_pdf_pages(file_path)
+    elif file_path.endswith(".docx"):
+        return iter_docx_paragraphs(file_path)
+    elif file_path.endswith(".txt"):
+        return iter_txt_lines(file_path)
+    else:
+        raise ValueError("Unsupported file format.")
 
 # Extract text from PDF
 def extract_text_from_pdf(file_path):
-    text = ""
-    doc = fitz.open(file_path)
-    for page in doc:
-        text += page.get_text()
-    return text
+    return "".join(text for _, text in iter_pdf_pages(file_path))
 
 # Extract text from DOCX
 def extract_text_from_docx(file_path):
-    doc = docx.Document(file_path)
-    return "\n".join([p.text for p in doc.paragraphs])
+    return "\n".join(text for _, text in iter_docx_paragraphs(file_path))
 
 # Extract text from TXT
 def extract_text_from_txt(file_path):
@@ -44,42 +275,447 @@ def read_document(file_path):
     else:
         raise ValueError("Unsupported file format.")
 
+# Word-window chunker (the previous default, kept for comparison): slides a word window over
+# (page_number, text) pieces and yields {"text", "page_start", "page_end"} chunks
+def iter_chunks(pieces, max_words=120, overlap=20):
+    step = max_words - overlap
+    window = []  # (word, page_number)
+    emitted = False
+    for page_number, text in pieces:
+        for word in text.split():
+            window.append((word, page_number))
+            if len(window) == max_words:
+                yield _window_to_chunk(window)
+                emitted = True
+                del window[:step]
+    # Skip a trailing window that only repeats the previous chunk's overlap
+    if window and (not emitted or len(window) > overlap):
+        yield _window_to_chunk(window)
+
+def _window_to_chunk(window):
+    return {
+        "text": " ".join(word for word, _ in window),
+        "page_start": window[0][1],
+        "page_end": window[-1][1]
+    }
+
 # Split text into overlapping chunks
 def chunk_text(text, max_words=120, overlap=20):
-    words = text.split()
-    chunks = []
-    i = 0
-    while i < len(words):
-        chunk = words[i:i + max_words]
-        chunks.append(" ".join(chunk))
-        i += max_words - overlap
-    return chunks
-
-# Upload and embed document to ChromaDB
-def upload_and_embed_document(file_path, source_label):
-    raw_text = read_document(file_path)
-    chunks = chunk_text(raw_text)
-
-    embeddings = sentence_model.encode(chunks).tolist()
-    ids = [f"{source_label}_{i}" for i in range(len(chunks))]
-
-    collection.add(
-        documents=chunks,
-        embeddings=embeddings,
-        ids=ids,
-        metadatas=[{"source": source_label}] * len(chunks)
-    )
+    return [chunk["text"] for chunk in iter_chunks([(1, text)], max_words, overlap)]
 
-    return len(chunks)
+# Number of pages for formats that know it up front (PDF), else None
+def count_pages(file_path):
+    if file_path.endswith(".pdf"):
+        with fitz.open(file_path) as doc:
+            return doc.page_count
+    return None
 
-# Retrieve relevant chunks based on a query
-def retrieve_similar_context(query, top_k=5):
-    query_embedding = sentence_model.encode(query).tolist()
+# Pass blocks through, reporting each new page number to progress_callback("pages", n)
+def _report_pages(blocks, progress_callback):
+    last_page = 0
+    for block in blocks:
+        if block["page"] != last_page:
+            progress_callback("pages", block["page"])
+            last_page = block["page"]
+        yield block
+
+# Lazily chunk a document straight from its structure (headings, paragraphs, pages).
+# Yields {"text", "page_start", "page_end", "section"}; pass a chunker to read its stats.
+def iter_document_chunks(file_path, progress_callback=None, chunker=None):
+    blocks = iter_document_blocks(file_path)
+    if progress_callback:
+        blocks = _report_pages(blocks, progress_callback)
+    return (chunker or StructuredChunker()).chunk(blocks)
+
+# Group an iterator into lists of at most `size` items
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+# Chunk ids currently stored for a document, in store order (used when the manifest has no record).
+# Chunks stored before namespacing only carry "source" and never belong to a course, so a
+# chunk matched by source alone counts only if it has no "document" tag of its own (the same
+# file name in another course has one).
+def _stored_chunk_ids(document, owner=None, course=None):
+    if course:
+        return get_collection(owner).get(where={"document": document}, include=[])["ids"]
+    where = {"$or": [{"document": document}, {"source": document}]}
+    found = get_collection(owner).get(where=where, include=["metadatas"])
+    return [
+        chunk_id for chunk_id, metadata in zip(found["ids"], found["metadatas"])
+        if (metadata or {}).get("document", document) == document
+    ]
+
+# Encode and store chunk batches as they arrive; returns the number of chunks stored.
+# Chunks are tagged with owner, course and upload time; progress_callback("chunks", n)
+# is called after each stored batch. A journal ({"written": [], "overwritten": []}) records
+# the ids written and the stored chunks they replaced, so an aborted upload can be undone.
+def embed_and_store_chunks(source_label, chunk_batches, batch_size=None, progress_callback=None,
+                           owner=None, course=None, uploaded_at=None, journal=None):
+    batch_size = batch_size or EMBED_BATCH_SIZE
+    document = document_key(source_label, course)
+    tags = {
+        "source": source_label,
+        "document": document,
+        "owner": owner or "",
+        "course": course or "",
+        "uploaded_at": int(uploaded_at or time.time())
+    }
+    stored = 0
+    for batch in chunk_batches:
+        texts = [chunk["text"] for chunk in batch]
+        embeddings = get_embedding_model().encode(texts, batch_size=batch_size)
+        chunk_ids = [f"{document}_{stored + i}" for i in range(len(batch))]
+        if journal is not None:
+            replaced = get_collection(owner).get(ids=chunk_ids, include=["documents", "embeddings", "metadatas"])
+            if len(replaced["ids"]):
+                journal["overwritten"].append(replaced)
+            journal["written"].extend(chunk_ids)
+        get_collection(owner).upsert(
+            documents=texts,
+            embeddings=embeddings.tolist(),
+            ids=chunk_ids,
+            metadatas=[
+                {**tags, "page_start": chunk["page_start"], "page_end": chunk["page_end"], "section": chunk.get("section", "")}
+                for chunk in batch
+            ]
+        )
+        _index_chunks(owner, chunk_ids, texts, course)
+        _bump_collection_version(owner)
+        stored += len(batch)
+        if progress_callback:
+            progress_callback("chunks", stored)
+    return stored
+
+# Manifest check; prepared["unchanged"] is True when the stored embeddings are current
+def prepare_document(file_path, source_label, owner=None, course=None):
+    file_hash = compute_file_hash(file_path)
+    document = document_key(source_label, course)
+    with _manifest_lock:
+        previous = load_manifest(owner).get(document)
 
-    results = collection.query(
-        query_embeddings=[query_embedding],
-        n_results=top_k
+    unchanged = bool(previous and previous["hash"] == file_hash and previous.get("chunking") == CHUNKING_VERSION)
+    return {
+        "file_path": file_path,
+        "source_label": source_label,
+        "owner": owner,
+        "course": course,
+        "document": document,
+        "hash": file_hash,
+        "previous": previous,
+        "unchanged": unchanged,
+        "chunker": StructuredChunker()
+    }
+
+# Undo a partly stored upload: remove the chunks it added and put back the ones it
+# overwrote, so the previously indexed version of the document (if any) is intact again
+def _roll_back(journal, owner=None, course=None):
+    collection = get_collection(owner)
+    restored = {chunk_id for replaced in journal["overwritten"] for chunk_id in replaced["ids"]}
+    added = [chunk_id for chunk_id in journal["written"] if chunk_id not in restored]
+    if added:
+        collection.delete(ids=added)
+        _unindex_chunks(owner, added)
+    for replaced in journal["overwritten"]:
+        collection.upsert(
+            ids=replaced["ids"],
+            embeddings=replaced["embeddings"],
+            documents=replaced["documents"],
+            metadatas=replaced["metadatas"]
+        )
+        _index_chunks(owner, replaced["ids"], replaced["documents"], course)
+    _bump_collection_version(owner)
+
+# Embed a prepared document from an iterable of chunk batches, prune stale ids, update the manifest.
+# If embedding fails or is cancelled, the document is rolled back to its previous version.
+def store_prepared_document(prepared, chunk_batches, batch_size=None, progress_callback=None):
+    owner, course, document = prepared["owner"], prepared["course"], prepared["document"]
+    previous = prepared["previous"]
+    uploaded_at = int(time.time())
+
+    journal = {"written": [], "overwritten": []}
+    try:
+        num_chunks = embed_and_store_chunks(
+            prepared["source_label"], chunk_batches, batch_size, progress_callback, owner, course, uploaded_at, journal
+        )
+    except BaseException:
+        _roll_back(journal, owner, course)
+        raise
+
+    # Drop chunks left over from a longer previous version of this document
+    if previous:
+        stale_ids = [f"{document}_{i}" for i in range(num_chunks, previous["num_chunks"])]
+    else:
+        stale_ids = [
+            chunk_id for chunk_id in _stored_chunk_ids(document, owner, course)
+            if int(chunk_id.rsplit("_", 1)[1]) >= num_chunks
+        ]
+    if stale_ids:
+        get_collection(owner).delete(ids=stale_ids)
+        _unindex_chunks(owner, stale_ids)
+        _bump_collection_version(owner)
+
+    with _manifest_lock:
+        manifest = load_manifest(owner)
+        manifest[document] = {
+            "hash": prepared["hash"],
+            "num_chunks": num_chunks,
+            "chunking": CHUNKING_VERSION,
+            "source": prepared["source_label"],
+            "course": course or "",
+            "uploaded_at": uploaded_at,
+            "chunk_stats": prepared["chunker"].stats
+        }
+        save_manifest(manifest, owner)
+
+    return num_chunks
+
+# Upload and embed document to ChromaDB, skipping files whose content is unchanged.
+# Pages are streamed through the chunker and encoder, so memory does not grow with file size.
+# progress_callback(stage, count) reports "pages" read and "chunks" stored; an exception
+# raised from it aborts the upload. owner/course place the document in that teacher's
+# collection and tag it with the course.
+def upload_and_embed_document(file_path, source_label, batch_size=None, add_batch_size=None, progress_callback=None,
+                              owner=None, course=None):
+    prepared = prepare_document(file_path, source_label, owner, course)
+    if prepared["unchanged"]:
+        return prepared["previous"]["num_chunks"]
+    chunk_batches = _batched(
+        iter_document_chunks(file_path, progress_callback, prepared["chunker"]), add_batch_size or ADD_BATCH_SIZE
     )
+    return store_prepared_document(prepared, chunk_batches, batch_size, progress_callback)
+
+# Remove every chunk of a document and its manifest record; returns the number of chunks removed
+def delete_document(source_label, owner=None, course=None):
+    document = document_key(source_label, course)
+    chunk_ids = _stored_chunk_ids(document, owner, course)
+    if chunk_ids:
+        get_collection(owner).delete(ids=chunk_ids)
+        _unindex_chunks(owner, chunk_ids)
+        _bump_collection_version(owner)
+    with _manifest_lock:
+        manifest = load_manifest(owner)
+        if manifest.pop(document, None) is not None:
+            save_manifest(manifest, owner)
+    return len(chunk_ids)
+
+# An owner's documents (optionally one course), newest first:
+# [{"document", "source", "course", "num_chunks", "uploaded_at", "chunk_stats"}]
+def list_documents(owner=None, course=None):
+    with _manifest_lock:
+        manifest = load_manifest(owner)
+    documents = [
+        {
+            "document": document,
+            "source": entry.get("source", document),
+            "course": entry.get("course", ""),
+            "num_chunks": entry["num_chunks"],
+            "uploaded_at": entry.get("uploaded_at"),
+            "chunk_stats": entry.get("chunk_stats", {})
+        }
+        for document, entry in manifest.items()
+        if not course or entry.get("course") == course
+    ]
+    return sorted(documents, key=lambda doc: doc["uploaded_at"] or 0, reverse=True)
 
-    documents = results.get("documents", [[]])[0]
-    return documents if documents else []
\ No newline at end of file
+# One page of a document's stored chunks: {"ids", "documents", "metadatas"}
+def list_document_chunks(source_label, owner=None, course=None, limit=20, offset=0):
+    document = document_key(source_label, course)
+    if course:
+        where = {"document": document}
+        return get_collection(owner).get(where=where, include=["documents", "metadatas"], limit=limit, offset=offset)
+    page = _stored_chunk_ids(document, owner)[offset:offset + limit]
+    if not page:
+        return {"ids": [], "documents": [], "metadatas": []}
+    found = get_collection(owner).get(ids=page, include=["documents", "metadatas"])
+    position = {chunk_id: i for i, chunk_id in enumerate(page)}
+    order = sorted(range(len(found["ids"])), key=lambda i: position[found["ids"][i]])
+    return {key: [found[key][i] for i in order] for key in ("ids", "documents", "metadatas")}
+
+_END_OF_DOCUMENT = object()
+
+# Put into a bounded queue, giving up if the consumer has stopped
+def _put_until_stopped(out_queue, item, stop_event):
+    while not stop_event.is_set():
+        try:
+            out_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+# Reader stage: hash, extract and chunk one document into a bounded queue of batches
+def _read_into_queue(file_path, source_label, out_queue, add_batch_size, stop_event, owner=None, course=None,
+                     progress_callback=None):
+    try:
+        prepared = prepare_document(file_path, source_label, owner, course)
+        if not _put_until_stopped(out_queue, prepared, stop_event):
+            return
+        if not prepared["unchanged"]:
+            chunks = iter_document_chunks(file_path, progress_callback, prepared["chunker"])
+            for batch in _batched(chunks, add_batch_size):
+                if not _put_until_stopped(out_queue, batch, stop_event):
+                    return
+        _put_until_stopped(out_queue, _END_OF_DOCUMENT, stop_event)
+    except Exception as e:
+        _put_until_stopped(out_queue, e, stop_event)
+
+# Drain one document's queue, re-raising any reader error
+def _iter_queue(in_queue):
+    while True:
+        item = in_queue.get()
+        if item is _END_OF_DOCUMENT:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+# Embed many documents: reader threads extract/chunk upcoming files a few batches ahead
+# while the encoder (which already uses all cores via torch) works on the current one.
+# Yields each document's chunk count in order, or the exception that stopped it (that
+# document is rolled back and the others carry on). progress_callbacks, if given, holds
+# one progress_callback per file, as for upload_and_embed_document. All files go to the
+# same owner and course.
+def iter_embed_documents(files, max_workers=None, batch_size=None, add_batch_size=None, owner=None, course=None,
+                         progress_callbacks=None):
+    files = list(files)
+    add_batch_size = add_batch_size or ADD_BATCH_SIZE
+    progress_callbacks = progress_callbacks or [None] * len(files)
+    # One stop flag per reader, so a failed document's reader does not hold a worker
+    stop_events = [threading.Event() for _ in files]
+    with ThreadPoolExecutor(max_workers=max_workers or INGEST_WORKERS) as pool:
+        try:
+            queues = []
+            for (file_path, source_label), stop_event, callback in zip(files, stop_events, progress_callbacks):
+                doc_queue = queue.Queue(maxsize=PREFETCH_BATCHES)
+                pool.submit(
+                    _read_into_queue, file_path, source_label, doc_queue, add_batch_size, stop_event, owner, course, callback
+                )
+                queues.append(doc_queue)
+
+            for doc_queue, stop_event, callback in zip(queues, stop_events, progress_callbacks):
+                try:
+                    items = _iter_queue(doc_queue)
+                    prepared = next(items)
+                    if prepared["unchanged"]:
+                        num_chunks = prepared["previous"]["num_chunks"]
+                    else:
+                        num_chunks = store_prepared_document(prepared, items, batch_size, callback)
+                except Exception as e:
+                    stop_event.set()
+                    yield e
+                    continue
+                yield num_chunks
+        finally:
+            for stop_event in stop_events:
+                stop_event.set()
+
+# Embed many documents with the pipeline above; returns {source_label: num_chunks} and
+# raises the first document's error
+def upload_and_embed_documents(files, max_workers=None, batch_size=None, add_batch_size=None, owner=None, course=None):
+    files = list(files)
+    results = {}
+    outcomes = iter_embed_documents(files, max_workers, batch_size, add_batch_size, owner, course)
+    try:
+        for (_, source_label), outcome in zip(files, outcomes):
+            if isinstance(outcome, Exception):
+                raise outcome
+            results[source_label] = outcome
+    finally:
+        outcomes.close()
+    return results
+
+# Hybrid retrieval over the stored chunks.
+#   mode: "hybrid" (vector + BM25 fused with reciprocal rank fusion), "vector" or "bm25"
+#   rerank: re-score the fused candidate pool with a cross-encoder (default RAG_RERANK)
+#   owner/course: search only that teacher's collection, optionally one course
+# Returns {"ids", "documents", "metadatas", "scores", "timings", "cached"}; timings are per-stage
+# milliseconds. Repeated questions against an unchanged collection are served from cache.
+def hybrid_search(query, top_k=5, mode="hybrid", rerank=None, candidates=None, owner=None, course=None):
+    rerank = RAG_RERANK if rerank is None else rerank
+    candidates = max(top_k, candidates or RAG_CANDIDATES)
+    start = time.perf_counter()
+
+    query = normalize_query(query)
+    cache_key = (query, top_k, mode, bool(rerank), candidates, collection_name(owner), course or "", collection_version(owner))
+    cached = _retrieval_results.get(cache_key)
+    if cached is not None:
+        _count("result_hits")
+        return {**cached, "timings": {"total": (time.perf_counter() - start) * 1000}, "cached": True}
+    _count("result_misses")
+
+    result = _hybrid_search(query, top_k, mode, rerank, candidates, owner, course, start)
+    _retrieval_results.put(cache_key, result)
+    return {**result, "cached": False}
+
+def _hybrid_search(query, top_k, mode, rerank, candidates, owner, course, start):
+    timings = {}
+
+    def lap(stage, since):
+        now = time.perf_counter()
+        timings[stage] = (now - since) * 1000
+        return now
+
+    collection = get_collection(owner)
+    total = collection.count()
+    if not total:
+        return {"ids": [], "documents": [], "metadatas": [], "scores": [], "timings": {"total": (time.perf_counter() - start) * 1000}}
+
+    rankings = []
+    texts, metadatas = {}, {}
+    stage_start = start
+    if mode in ("hybrid", "vector"):
+        query_embedding = embed_query(query)
+        stage_start = lap("embed", stage_start)
+        results = collection.query(
+            query_embeddings=[query_embedding],
+            n_results=min(candidates, total),
+            where=_course_filter(course),
+            include=["documents", "metadatas"]
+        )
+        vector_ids = results["ids"][0]
+        texts.update(zip(vector_ids, results["documents"][0]))
+        metadatas.update(zip(vector_ids, results["metadatas"][0]))
+        rankings.append(vector_ids)
+        stage_start = lap("vector", stage_start)
+
+    if mode in ("hybrid", "bm25"):
+        rankings.append([doc_id for doc_id, _ in get_bm25_index(owner).search(query, candidates, group=course)])
+        stage_start = lap("bm25", stage_start)
+
+    fused = reciprocal_rank_fusion(rankings, RAG_RRF_K)[:candidates]
+    # Lexical-only hits still need their text and metadata
+    missing = [doc_id for doc_id, _ in fused if doc_id not in texts]
+    if missing:
+        extra = collection.get(ids=missing, include=["documents", "metadatas"])
+        texts.update(zip(extra["ids"], extra["documents"]))
+        metadatas.update(zip(extra["ids"], extra["metadatas"]))
+    fused = [(doc_id, score) for doc_id, score in fused if doc_id in texts]
+    stage_start = lap("fusion", stage_start)
+
+    if rerank and fused:
+        scores = get_rerank_model().predict([(query, texts[doc_id]) for doc_id, _ in fused])
+        fused = sorted(
+            ((doc_id, float(score)) for (doc_id, _), score in zip(fused, scores)),
+            key=lambda item: item[1],
+            reverse=True
+        )
+        lap("rerank", stage_start)
+
+    top = fused[:top_k]
+    timings["total"] = (time.perf_counter() - start) * 1000
+    return {
+        "ids": [doc_id for doc_id, _ in top],
+        "documents": [texts[doc_id] for doc_id, _ in top],
+        "metadatas": [metadatas.get(doc_id) for doc_id, _ in top],
+        "scores": [score for _, score in top],
+        "timings": timings
+    }
+
+# Retrieve relevant chunks based on a query
+def retrieve_similar_context(query, top_k=5, rerank=None, owner=None, course=None):
+    return hybrid_search(query, top_k, rerank=rerank, owner=owner, course=course)["documents"]
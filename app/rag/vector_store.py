@@ -0,0 +1,360 @@
+import os
+import re
+import json
+import uuid
+import sqlite3
+import threading
+import numpy as np
+
+# Flat (exact) vector store for small corpora, used instead of Chroma when
+# RAG_VECTOR_BACKEND=flat. Embeddings live in a memory-mapped NumPy matrix stored as
+# float16 or int8 (one scale per row); ids, texts and metadata live in a SQLite sidecar
+# (chunks.db) whose row numbers are the matrix rows. Top-k is a vectorized dot product over
+# the whole matrix, so results are exact; opening a collection maps the matrix and reads
+# only the ids, so it loads in milliseconds and chunk texts are read only for results.
+#
+# Writes are append-only: new and updated chunks are appended to the matrix file and then
+# committed to SQLite (an update marks the old row deleted), so a write costs the size of
+# the batch, not of the store. Rows past the last committed one (a crash mid-write) are cut
+# off on open. Once deleted rows pile up, the live rows are compacted into a new matrix
+# generation.
+#
+# It implements the subset of Chroma's collection API the retriever uses (upsert, get,
+# query, delete, count) and `where` filters of the form {"field": value} and {"$or": [...]}.
+
+SUPPORTED_DTYPES = ("float16", "int8")
+SCORE_BLOCK_ROWS = 8192  # rows scored per step, bounding the float32 working copy
+COMPACT_DELETED_RATIO = 0.3  # compact once this share of matrix rows are deleted
+COMPACT_MIN_ROWS = 1000
+SQL_BATCH = 500  # rows per IN (...) clause
+
+_FIELD = re.compile(r"^\w+$")
+
+
+# Unit-normalize rows (cosine similarity becomes a dot product)
+def normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def quantize(vectors, dtype):
+    vectors = normalize_rows(np.asarray(vectors, dtype=np.float32))
+    if dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+    return vectors.astype(np.float16), None
+
+def dequantize(vectors, scales):
+    vectors = vectors.astype(np.float32)
+    return vectors * scales[:, None] if scales is not None else vectors
+
+def _batches(items, size=SQL_BATCH):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class FlatVectorStore:
+    def __init__(self, path, dtype="float16"):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported embedding dtype {dtype!r}; use one of {SUPPORTED_DTYPES}.")
+        self.path = path
+        self.dtype = dtype
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS chunks (
+                    row INTEGER PRIMARY KEY,
+                    id TEXT NOT NULL,
+                    document TEXT,
+                    metadata TEXT,
+                    deleted INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_chunks_live_id ON chunks(id) WHERE deleted = 0;
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+                """
+            )
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('dtype', ?)", (dtype,))
+        stored_dtype = self._meta("dtype")
+        if stored_dtype != dtype:
+            raise ValueError(f"{path} stores {stored_dtype} embeddings, not {dtype}.")
+        self._migrate_json_sidecar()
+        self._open()
+
+    # One connection per thread (Streamlit runs each session on its own thread)
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.path, "chunks.db"), timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _meta(self, key, default=None):
+        row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _file(self, kind, generation=None):
+        return os.path.join(self.path, f"{kind}-{generation or self._generation}.bin")
+
+    # Read the ids and map the matrix; a missing store is empty
+    def _open(self):
+        conn = self._connect()
+        self._generation = self._meta("generation")
+        if self._generation is None:
+            self._generation = uuid.uuid4().hex[:12]
+            with conn:
+                conn.execute("INSERT INTO meta (key, value) VALUES ('generation', ?)", (self._generation,))
+        self._dim = int(self._meta("dim", 0))
+        rows = conn.execute("SELECT row, id, deleted FROM chunks ORDER BY row").fetchall()
+        if rows and rows[-1][0] != len(rows) - 1:
+            raise ValueError(f"{self.path} has gaps in its matrix rows.")
+        self._ids = [chunk_id for _, chunk_id, _ in rows]
+        self._live = np.array([not deleted for _, _, deleted in rows], dtype=bool)
+        self._positions = {chunk_id: row for row, chunk_id, deleted in rows if not deleted}
+        self._columns = {}  # metadata field -> array over the first rows, for where filters
+        self._remove_stale_files()
+        self._map(len(rows), truncate=True)
+
+    # Map the first `rows` rows of the matrix (cutting off rows a crashed write left behind)
+    def _map(self, rows, truncate=False):
+        self._rows = rows
+        self._vectors, self._scales = None, None
+        if not rows:
+            return
+        files = [("vectors", np.dtype(self.dtype), (rows, self._dim))]
+        if self.dtype == "int8":
+            files.append(("scales", np.dtype(np.float32), (rows,)))
+        mapped = []
+        for kind, dtype, shape in files:
+            path = self._file(kind)
+            size = int(np.prod(shape)) * dtype.itemsize
+            if truncate and os.path.getsize(path) > size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+            mapped.append(np.memmap(path, dtype=dtype, mode="r", shape=shape))
+        self._vectors = mapped[0]
+        self._scales = mapped[1] if len(mapped) > 1 else None
+
+    # Matrix files of other generations (left by a compaction that crashed or ran while mapped)
+    def _remove_stale_files(self):
+        current = {os.path.basename(self._file(kind)) for kind in ("vectors", "scales")}
+        for name in os.listdir(self.path):
+            if name.endswith(".bin") and name.startswith(("vectors-", "scales-")) and name not in current:
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    pass  # still mapped by a reader on Windows; retried on the next open
+
+    # Stores written before the SQLite sidecar kept everything in index.json; move them over once
+    def _migrate_json_sidecar(self):
+        sidecar_path = os.path.join(self.path, "index.json")
+        if not os.path.exists(sidecar_path):
+            return
+        with open(sidecar_path, "r", encoding="utf-8") as f:
+            sidecar = json.load(f)
+        if sidecar["dtype"] != self.dtype:
+            raise ValueError(f"{self.path} stores {sidecar['dtype']} embeddings, not {self.dtype}.")
+        self._open()
+        if sidecar["ids"] and not self._rows:
+            vectors = np.load(os.path.join(self.path, sidecar["vectors"]))
+            scales = np.load(os.path.join(self.path, sidecar["scales"])) if sidecar["scales"] else None
+            with self._lock:
+                self._append(sidecar["ids"], sidecar["documents"], sidecar["metadatas"], vectors, scales)
+        os.remove(sidecar_path)
+        for name in (sidecar["vectors"], sidecar["scales"]):
+            if name:
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    pass
+
+    def count(self):
+        return len(self._positions)
+
+    # Append quantized rows to the matrix, then commit them (replacing live rows with the
+    # same ids) to SQLite. Caller holds the lock.
+    def _append(self, ids, documents, metadatas, vectors, scales):
+        if not self._dim:
+            self._dim = vectors.shape[1]
+            with self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dim', ?)", (str(self._dim),))
+        with open(self._file("vectors"), "ab") as f:
+            f.write(np.ascontiguousarray(vectors).tobytes())
+        if scales is not None:
+            with open(self._file("scales"), "ab") as f:
+                f.write(np.ascontiguousarray(scales, dtype=np.float32).tobytes())
+
+        first = self._rows
+        replaced = [self._positions[chunk_id] for chunk_id in ids if chunk_id in self._positions]
+        with self._connect() as conn:
+            for batch in _batches(replaced):
+                conn.execute(f"UPDATE chunks SET deleted = 1 WHERE row IN ({', '.join('?' * len(batch))})", batch)
+            conn.executemany(
+                "INSERT INTO chunks (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                [(first + i, chunk_id, documents[i], json.dumps(metadatas[i])) for i, chunk_id in enumerate(ids)]
+            )
+
+        # New arrays rather than in-place changes, so readers keep a consistent snapshot
+        live = np.concatenate([self._live, np.ones(len(ids), dtype=bool)])
+        live[replaced] = False
+        self._live = live
+        self._ids.extend(ids)
+        for i, chunk_id in enumerate(ids):
+            self._positions[chunk_id] = first + i
+        self._map(first + len(ids))
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        # A repeated id within the batch keeps its last value, as in Chroma
+        last = {chunk_id: i for i, chunk_id in enumerate(ids)}
+        keep = sorted(last.values())
+        vectors, scales = quantize(np.asarray(embeddings, dtype=np.float32)[keep], self.dtype)
+        documents = [documents[i] for i in keep] if documents else [""] * len(keep)
+        metadatas = [metadatas[i] for i in keep] if metadatas else [None] * len(keep)
+        with self._lock:
+            self._append([ids[i] for i in keep], documents, metadatas, vectors, scales)
+            self._maybe_compact()
+
+    add = upsert
+
+    def delete(self, ids=None, where=None):
+        with self._lock:
+            rows = {self._positions[chunk_id] for chunk_id in ids or [] if chunk_id in self._positions}
+            if where:
+                rows.update(np.flatnonzero(self._where_mask(where, self._rows) & self._live).tolist())
+            if not rows:
+                return
+            rows = sorted(rows)
+            with self._connect() as conn:
+                for batch in _batches(rows):
+                    conn.execute(f"UPDATE chunks SET deleted = 1 WHERE row IN ({', '.join('?' * len(batch))})", batch)
+            live = self._live.copy()
+            live[rows] = False
+            self._live = live
+            for row in rows:
+                del self._positions[self._ids[row]]
+            self._maybe_compact()
+
+    # Rewrite the live rows into a new matrix generation once enough rows are deleted
+    def _maybe_compact(self):
+        deleted = self._rows - len(self._positions)
+        if self._rows < COMPACT_MIN_ROWS or deleted <= COMPACT_DELETED_RATIO * self._rows:
+            return
+        keep = np.flatnonzero(self._live)
+        generation = uuid.uuid4().hex[:12]
+        if len(keep):
+            np.ascontiguousarray(self._vectors[keep]).tofile(self._file("vectors", generation))
+            if self._scales is not None:
+                np.ascontiguousarray(self._scales[keep]).tofile(self._file("scales", generation))
+        # Renumber rows in two steps (through negative numbers) so primary keys never collide
+        with self._connect() as conn:
+            conn.execute("DELETE FROM chunks WHERE deleted = 1")
+            conn.executemany("UPDATE chunks SET row = ? WHERE row = ?", [(-new - 1, int(old)) for new, old in enumerate(keep)])
+            conn.execute("UPDATE chunks SET row = -row - 1")
+            conn.execute("UPDATE meta SET value = ? WHERE key = 'generation'", (generation,))
+        self._open()
+
+    # Boolean mask over the first `rows` rows matching a Chroma-style where clause
+    def _where_mask(self, where, rows):
+        if "$or" in where:
+            mask = np.zeros(rows, dtype=bool)
+            for clause in where["$or"]:
+                mask |= self._where_mask(clause, rows)
+            return mask
+        mask = np.ones(rows, dtype=bool)
+        for field, value in where.items():
+            mask &= self._column(field, rows) == value
+        return mask
+
+    # A metadata field for the first `rows` rows, read from SQLite once and then extended as
+    # rows are appended (a row's metadata never changes; updates append a new row)
+    def _column(self, field, rows):
+        if not _FIELD.match(field):
+            raise ValueError(f"Unsupported metadata field {field!r}.")
+        column = self._columns.get(field, np.empty(0, dtype=object))
+        if len(column) < rows:
+            values = [value for (value,) in self._connect().execute(
+                f"SELECT json_extract(metadata, '$.{field}') FROM chunks WHERE row >= ? AND row < ? ORDER BY row",
+                (len(column), rows)
+            )]
+            column = np.concatenate([column, np.array(values + [None], dtype=object)[:-1]])
+            self._columns[field] = column
+        return column[:rows]
+
+    # Row count, ids, live mask, matrix and generation as of now; writes replace rather than
+    # mutate them, so readers can work on a snapshot without holding the lock
+    def _snapshot(self):
+        return self._rows, self._ids, self._live, self._vectors, self._scales, self._generation
+
+    # Result dict for matrix rows of a snapshot, reading texts and metadata from SQLite.
+    # Caller holds the lock; if a compaction has renumbered the rows since the snapshot,
+    # texts are looked up by id (chunks deleted in between are dropped).
+    def _result(self, snapshot, positions, include):
+        _, ids, _, vectors, scales, generation = snapshot
+        if generation != self._generation:
+            positions = [i for i in positions if ids[i] in self._positions]
+            rows = {i: self._positions[ids[i]] for i in positions}
+        else:
+            rows = {i: i for i in positions}
+        result = {"ids": [ids[i] for i in positions]}
+        if "documents" in include or "metadatas" in include:
+            found = {}
+            for batch in _batches([rows[i] for i in positions]):
+                for row, document, metadata in self._connect().execute(
+                    f"SELECT row, document, metadata FROM chunks WHERE row IN ({', '.join('?' * len(batch))})", batch
+                ):
+                    found[row] = (document, metadata)
+            if "documents" in include:
+                result["documents"] = [found[rows[i]][0] for i in positions]
+            if "metadatas" in include:
+                result["metadatas"] = [json.loads(found[rows[i]][1]) if found[rows[i]][1] else None for i in positions]
+        if "embeddings" in include:
+            rows = list(positions)
+            result["embeddings"] = dequantize(vectors[rows], scales[rows] if scales is not None else None).tolist() if rows else []
+        return result
+
+    def get(self, ids=None, where=None, include=("documents", "metadatas"), limit=None, offset=0):
+        with self._lock:
+            snapshot = self._snapshot()
+            if ids is not None:
+                positions = [self._positions[chunk_id] for chunk_id in ids if chunk_id in self._positions]
+            else:
+                positions = np.flatnonzero(snapshot[2]).tolist()
+            if where:
+                mask = self._where_mask(where, snapshot[0])
+                positions = [i for i in positions if mask[i]]
+            positions = positions[offset:offset + limit if limit is not None else None]
+            return self._result(snapshot, positions, include)
+
+    # Exact top-k by dot product with each (normalized) query; distances are 1 - cosine
+    def query(self, query_embeddings, n_results=10, where=None, include=("documents", "metadatas", "distances")):
+        with self._lock:
+            snapshot = self._snapshot()
+            mask = snapshot[2] & self._where_mask(where, snapshot[0]) if where else snapshot[2]
+        rows, _, _, vectors, scales, _ = snapshot
+        k = min(n_results, int(mask.sum())) if rows else 0
+
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for query in normalize_rows(np.asarray(query_embeddings, dtype=np.float32)):
+            positions, scores = [], None
+            if k:
+                scores = np.empty(rows, dtype=np.float32)
+                for start in range(0, rows, SCORE_BLOCK_ROWS):
+                    block = vectors[start:start + SCORE_BLOCK_ROWS]
+                    scores[start:start + len(block)] = block.astype(np.float32) @ query
+                if scales is not None:
+                    scores *= scales
+                scores[~mask] = -np.inf
+                positions = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(k)
+                positions = positions[np.argsort(-scores[positions], kind="stable")].tolist()
+            with self._lock:
+                found = self._result(snapshot, positions, include)
+            kept = set(found["ids"])
+            results["ids"].append(found["ids"])
+            results["documents"].append(found.get("documents"))
+            results["metadatas"].append(found.get("metadatas"))
+            results["distances"].append([float(1.0 - scores[i]) for i in positions if snapshot[1][i] in kept])
+        return results
@@ -1,18 +1,10 @@
+import sys
+import importlib
 import streamlit as st
 
-# Import all tab modules
-from app.ui import (
-    
-  
-    syllabus_generator,
-    lesson_plan_creator,
-    assessment_builder,
-    resource_recommender,
-    feedback_tracker,
-    ai_copilot,
-    rag_uploader,
-    rag_qa
-)
+from app.utils.response_cache import response_cache
+from app.agents.llm_client import ttft_stats
+from app.agents.llm_dispatcher import dispatcher
 
 # Page configuration
 st.set_page_config(
@@ -282,18 +274,19 @@ def main_app():
     st.sidebar.title("📘 TeachMate AI Agent")
     st.sidebar.markdown("Empowering educators with AI-powered productivity tools. Your personal teaching assistant! 🚀")
     
-    # All available tabs
+    # All available tabs. Module tabs are named by import path and only imported
+    # when selected, so startup does not pay for every agent and model.
     TABS = {
-        
         "Dashboard 🏠": render_dashboard, # New dashboard tab
-        "Syllabus Generator 📝": syllabus_generator.render,
-        "Lesson Plan Creator 🗓️": lesson_plan_creator.render,
-        "Assessment Builder 📊": assessment_builder.render,
-        "Resource Recommender 📚": resource_recommender.render,
-        "Feedback Tracker 📈": feedback_tracker.render,
-        "Chat with AI Co-Pilot 🤖": ai_copilot.render,
-        "RAG Document Uploader 📂": rag_uploader.render,
-        "RAG-Powered Q&A ❓": rag_qa.render
+        "Syllabus Generator 📝": "app.ui.syllabus_generator",
+        "Lesson Plan Creator 🗓️": "app.ui.lesson_plan_creator",
+        "Assessment Builder 📊": "app.ui.assessment_builder",
+        "Resource Recommender 📚": "app.ui.resource_recommender",
+        "Feedback Tracker 📈": "app.ui.feedback_tracker",
+        "Artifact Library 🗃️": "app.ui.artifact_library",
+        "Chat with AI Co-Pilot 🤖": "app.ui.ai_copilot",
+        "RAG Document Uploader 📂": "app.ui.rag_uploader",
+        "RAG-Powered Q&A ❓": "app.ui.rag_qa"
     }
 
     # Sidebar navigation
@@ -308,12 +301,29 @@ def main_app():
         st.session_state.username = ""
         st.rerun()
 
+    # Gemini response cache counters
+    cache_stats = response_cache.stats()
+    st.sidebar.caption(f"⚡ Response cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+    stream_stats = ttft_stats()
+    if stream_stats["count"]:
+        st.sidebar.caption(f"⏱️ Time to first token: p50 {stream_stats['p50']:.2f}s / p95 {stream_stats['p95']:.2f}s")
+    dispatch_stats = dispatcher.stats()
+    st.sidebar.caption(f"🚦 Gemini queue: {dispatch_stats['queue_depth']} waiting, avg wait {dispatch_stats['avg_wait']:.2f}s, {dispatch_stats['retries']} retries, {dispatch_stats['coalesced']} coalesced")
+    # Reuse of past artifacts (the semantic cache loads with the first generator tab, not at startup)
+    reuse_module = sys.modules.get("app.utils.semantic_cache")
+    reuse_stats = reuse_module.semantic_cache.stats() if reuse_module else {"lookups": 0}
+    if reuse_stats["lookups"]:
+        st.sidebar.caption(f"♻️ Reused past artifacts: {reuse_stats['reused']}/{reuse_stats['lookups']} requests ({reuse_stats['hit_ratio']:.0%}), ~{reuse_stats['saved_s']:.0f}s of generation saved")
+
     # Header title for the main content area
-    st.title(f"📚 TeachMate AI Agent – {selected_tab.replace(' 🏠', '').replace(' 📝', '').replace(' 🗓️', '').replace(' 📊', '').replace(' 📚', '').replace(' 📈', '').replace(' 🤖', '').replace(' 📂', '').replace(' ❓', '')} Module")
+    st.title(f"📚 TeachMate AI Agent – {selected_tab.replace(' 🏠', '').replace(' 📝', '').replace(' 🗓️', '').replace(' 📊', '').replace(' 📚', '').replace(' 📈', '').replace(' 🗃️', '').replace(' 🤖', '').replace(' 📂', '').replace(' ❓', '')} Module")
     st.markdown(f"<hr style='border: 1px solid var(--light-blue);'>", unsafe_allow_html=True) # Light blue separator
 
     # Render selected tab content
-    TABS[selected_tab]()
+    tab = TABS[selected_tab]
+    if isinstance(tab, str):
+        tab = importlib.import_module(tab).render
+    tab()
 
 # 🚀 Run app
 if __name__ == "__main__":
@@ -4,110 +4,99 @@ import datetime
 from dotenv import load_dotenv
 
 # Import copilot agent
-from app.agents.copilot_agent import get_copilot_response
+from app.agents.copilot_agent import stream_copilot_response
+from app.agents.copilot_memory import copilot_memory
 
 # Load env
 load_dotenv()
+COPILOT_VISIBLE_TURNS = int(os.getenv("COPILOT_VISIBLE_TURNS", "20"))  # turns on screen before "Load older"
 
-# Streamlit Co-Pilot UI
-def render():
-    st.markdown("## 🤖 AI Co-Pilot")
-    st.markdown("Your intelligent assistant for all teaching-related queries! Ask anything about course planning, content delivery, classroom management, and more. 🚀")
+# Prompt size of a reply next to what sending the whole history verbatim would have cost
+def token_note(chat):
+    if not chat.get("prompt_tokens"):
+        return ""
+    return f" · 🧮 {chat['prompt_tokens']:,} prompt tokens (full history: {chat['full_history_tokens']:,})"
 
-    st.markdown("<hr style='border: 1px dashed var(--light-blue);'>", unsafe_allow_html=True)
+def render_turn(chat):
+    time = datetime.datetime.fromisoformat(chat["time"]).strftime("%I:%M %p")
+    with st.chat_message("user"):
+        st.markdown(chat["user"])
+        st.caption(time)
+    if chat["ai"]:
+        with st.chat_message("assistant"):
+            st.markdown(chat["ai"])
+            st.caption(time + token_note(chat))
 
-    # Chat history display area
-    st.markdown("""
-    <div class="chat-container">
-        <div id="chat-history-scroll-area" class="chat-history-scroll-area">
-    """, unsafe_allow_html=True) # Renamed class for clarity
-    
-    # --- Initialize session state for copilot_history if it doesn't exist ---
-    if "copilot_history" not in st.session_state:
-        st.session_state["copilot_history"] = []
+# Load the latest `limit` turns of the user's saved conversation into the session, plus
+# whether there are older ones
+def load_history(owner, limit):
+    turns = copilot_memory.history(owner, limit + 1)
+    st.session_state["copilot_history"] = turns[-limit:] if limit else []
+    st.session_state["copilot_has_older"] = len(turns) > limit
+    st.session_state["copilot_visible"] = limit
 
-    # Display chat history within the scrollable area
-    # Use st.session_state["copilot_history"] which is initialized in streamlit_app.py
+# The on-screen history. As a fragment, "Load older" reruns only this part of the page.
+@st.fragment
+def render_history(owner):
+    if st.session_state["copilot_has_older"]:
+        st.button("⬆️ Load older messages", key="copilot_load_older", on_click=load_history,
+                  args=(owner, st.session_state["copilot_visible"] + COPILOT_VISIBLE_TURNS))
     for chat in st.session_state["copilot_history"]:
-        if chat["user"]:
-            st.markdown(f"""
-            <div class="chat-message user-message">
-                {chat['user']}
-            </div>
-            <div class="message-timestamp user-timestamp">{datetime.datetime.fromisoformat(chat['time']).strftime('%I:%M %p')}</div>
-            """, unsafe_allow_html=True)
-        if chat["ai"]:
-            st.markdown(f"""
-            <div class="chat-message ai-message">
-                {chat['ai']}
-            </div>
-            <div class="message-timestamp ai-timestamp">{datetime.datetime.fromisoformat(chat['time']).strftime('%I:%M %p')}</div>
-            """, unsafe_allow_html=True)
-
-    # JavaScript to scroll to the bottom of the chat history
-    st.markdown("""
-    <script>
-        var objDiv = document.getElementById("chat-history-scroll-area");
-        if (objDiv) {
-            objDiv.scrollTop = objDiv.scrollHeight;
-        }
-    </script>
-    """, unsafe_allow_html=True)
+        render_turn(chat)
 
+# Streamlit Co-Pilot UI
+def render():
+    st.markdown("## 🤖 AI Co-Pilot")
+    st.markdown("Your intelligent assistant for all teaching-related queries! Ask anything about course planning, content delivery, classroom management, and more. 🚀")
 
-    # Close chat history scrollable area
-    st.markdown("</div>", unsafe_allow_html=True) # Closing chat-history-scroll-area div
-    st.markdown("</div>", unsafe_allow_html=True) # Closing chat-container div
+    st.markdown("<hr style='border: 1px dashed var(--light-blue);'>", unsafe_allow_html=True)
 
-    # Chat input area fixed at the bottom of the visible screen portion
-    st.markdown("""
-    <div class="chat-input-area-fixed">
-    """, unsafe_allow_html=True)
+    # --- Load the user's saved conversation (kept across logouts) once per login ---
+    owner = st.session_state.get("username", "")
+    if "copilot_history" not in st.session_state or st.session_state.get("copilot_history_owner") != owner:
+        load_history(owner, COPILOT_VISIBLE_TURNS)
+        st.session_state["copilot_history_owner"] = owner
 
-    # Use a form for the input and buttons to allow clearing input easily
-    with st.form("copilot_chat_form", clear_on_submit=True):
-        user_input = st.text_input("✍️ Type your message here...", placeholder="e.g., How to teach recursion visually?", key="copilot_input_form", label_visibility="collapsed")
-        
-        col_btn1, col_btn2 = st.columns([1, 1])
-        with col_btn1:
-            submitted = st.form_submit_button("🚀 Send", use_container_width=True)
-        with col_btn2:
-            clear_chat = st.form_submit_button("🔄 Clear Chat", use_container_width=True)
+    if st.session_state["copilot_history"] and st.button("🔄 Clear Chat"):
+        copilot_memory.clear(owner)
+        load_history(owner, COPILOT_VISIBLE_TURNS)
+        st.success("Chat history cleared!")
 
-        if submitted:
-            if not user_input.strip(): # Check for empty string after stripping whitespace
-                st.warning("Please type a message before sending.")
-                return
+    # Only the last COPILOT_VISIBLE_TURNS turns are drawn, with native chat elements
+    render_history(owner)
 
-            # Append user message immediately for responsiveness
-            st.session_state["copilot_history"].append({
-                "user": user_input,
-                "ai": "", # AI response will be filled later
-                "time": datetime.datetime.now().isoformat()
-            })
-            # To ensure the latest user message appears before AI starts thinking
-            st.rerun()
+    user_input = st.chat_input("✍️ Type your message here... e.g., How to teach recursion visually?")
+    if user_input is None:
+        return
+    if not user_input.strip(): # Check for empty string after stripping whitespace
+        st.warning("Please type a message before sending.")
+        return
 
-        if clear_chat:
-            st.session_state["copilot_history"] = []
-            st.success("Chat history cleared!")
-            st.rerun()
-    
-    st.markdown("</div>", unsafe_allow_html=True) # Close chat-input-area-fixed div
+    # The new turn is drawn and answered in this same run (no rerun needed)
+    chat = {"user": user_input, "ai": "", "time": datetime.datetime.now().isoformat()}
+    with st.chat_message("user"):
+        st.markdown(user_input)
+        st.caption(datetime.datetime.fromisoformat(chat["time"]).strftime("%I:%M %p"))
+    with st.chat_message("assistant"):
+        try:
+            # Summary of older turns + the latest turns verbatim, within the token budget
+            with st.spinner("🧠 AI Co-Pilot is thinking..."):
+                prepared = copilot_memory.prepare(owner, user_input)
+            # Show the reply as it streams in
+            stream = stream_copilot_response(user_input, prepared["summary"], prepared["recent_turns"])
+            reply = st.write_stream(stream)
+            if stream.error is None:
+                chat = copilot_memory.record(prepared, user_input, reply, time=chat["time"])
+                st.caption(datetime.datetime.fromisoformat(chat["time"]).strftime("%I:%M %p") + token_note(chat))
+            else:
+                chat["ai"] = reply  # shown, but not saved
+        except Exception as e:
+            st.error(f"❌ An error occurred while getting a response: {e}. Please try again.")
+            chat["ai"] = f"Error: {e}" # Indicate error in UI
 
-    # Logic to generate AI response (placed after the form submission logic)
-    # Check if there's a new user message that hasn't received an AI response yet
-    if st.session_state["copilot_history"] and not st.session_state["copilot_history"][-1]["ai"]:
-        latest_user_message = st.session_state["copilot_history"][-1]["user"]
-        with st.spinner("🧠 AI Co-Pilot is thinking..."):
-            try:
-                reply = get_copilot_response(latest_user_message)
-                st.session_state["copilot_history"][-1]["ai"] = reply
-                # No need to update timestamp again, user message already has it
-                st.rerun() # Rerun to display AI response
-            except Exception as e:
-                st.error(f"❌ An error occurred while getting a response: {e}. Please try again.")
-                # Optionally, mark the last user message as failed or remove it
-                if st.session_state["copilot_history"][-1]["user"] == latest_user_message: # Prevent removing if user sent new message
-                     st.session_state["copilot_history"][-1]["ai"] = f"Error: {e}" # Indicate error in UI
-                     st.rerun()
\ No newline at end of file
+    # Keep the on-screen window at its size; older turns stay behind "Load older"
+    history = st.session_state["copilot_history"] + [chat]
+    if len(history) > st.session_state["copilot_visible"]:
+        history = history[-st.session_state["copilot_visible"]:]
+        st.session_state["copilot_has_older"] = True
+    st.session_state["copilot_history"] = history
@@ -0,0 +1,116 @@
+import streamlit as st
+import datetime
+from app.utils.artifact_store import artifact_store, ARTIFACT_TYPES
+from app.utils.file_exporter import export_to_docx, export_zip
+from app.utils.semantic_cache import semantic_cache
+
+LIBRARY_PAGE_SIZE = 10
+
+def _filename(artifact):
+    return f"{artifact['course'].replace(' ', '_')}_{artifact['type']}_{artifact['id']}.docx"
+
+def _regenerate(regenerate_key, match):
+    semantic_cache.decline(match)
+    st.session_state[regenerate_key] = True
+
+# Show a similar past artifact instead of generating a new one; returns True when one was
+# offered. "Generate a New One Instead" reruns the tab with st.session_state[regenerate_key]
+# set, which the tab treats as a submit that skips this check.
+def offer_reuse(artifact_type, params, regenerate_key):
+    match = semantic_cache.lookup(artifact_type, params, st.session_state.get("username"))
+    if match is None:
+        return False
+
+    artifact = match["artifact"]
+    created = datetime.datetime.fromisoformat(artifact["created_at"]).strftime("%Y-%m-%d")
+    origin = "imported from an older export, settings unknown" if artifact["params"].get("imported_from") else f"generated {created}"
+    st.info(f"♻️ A similar {ARTIFACT_TYPES[artifact_type].lower()} is already in the library: **{artifact['title']}** "
+            f"({match['similarity']:.0%} match, {origin}). Reuse it below, or generate a new one.")
+    st.markdown(artifact["content"])
+    col_download, col_regenerate = st.columns(2)
+    with col_download:
+        st.download_button(
+            label="📥 Download (.docx)",
+            data=export_to_docx(title=artifact["title"], content=artifact["content"], filename=_filename(artifact)),
+            file_name=_filename(artifact),
+            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            key=f"{regenerate_key}_download"
+        )
+    with col_regenerate:
+        st.button("🔄 Generate a New One Instead", key=f"{regenerate_key}_button", on_click=_regenerate, args=(regenerate_key, match))
+    return True
+
+def render():
+    st.markdown("## 🗃️ Artifact Library")
+    st.markdown("Every syllabus, lesson plan, assessment, resource list and feedback summary you generate is kept here. Search past outputs and reuse them instead of generating again! ♻️")
+
+    owner = st.session_state.get("username")
+    with st.container(border=True):
+        col1, col2, col3 = st.columns([2, 2, 3])
+        with col1:
+            type_filter = st.selectbox("🏷️ Type", ["All types"] + list(ARTIFACT_TYPES), format_func=lambda t: ARTIFACT_TYPES.get(t, t), key="library_type")
+        with col2:
+            course_filter = st.selectbox("📚 Course", ["All courses"] + artifact_store.courses(owner), key="library_course")
+        with col3:
+            query = st.text_input("🔍 Search", placeholder="e.g., recursion quiz", key="library_query", help="Matches words in titles, course names and content.")
+
+    artifact_type = None if type_filter == "All types" else type_filter
+    course = None if course_filter == "All courses" else course_filter
+    total = artifact_store.count(owner, course, artifact_type, query)
+    if not total:
+        st.info("Nothing here yet. Generated artifacts are saved automatically." if not (artifact_type or course or query) else "No artifacts match these filters.")
+        return
+
+    num_pages = (total + LIBRARY_PAGE_SIZE - 1) // LIBRARY_PAGE_SIZE
+    # Keyed on the filters so the page resets when they change
+    page = st.number_input("📄 Page", min_value=1, max_value=num_pages, value=1, step=1, key=f"library_page_{artifact_type}_{course}_{query}")
+    offset = (page - 1) * LIBRARY_PAGE_SIZE
+    artifacts = artifact_store.search(owner, course, artifact_type, query, limit=LIBRARY_PAGE_SIZE, offset=offset)
+
+    for artifact in artifacts:
+        created = datetime.datetime.fromisoformat(artifact["created_at"]).strftime("%Y-%m-%d %H:%M")
+        col_summary, col_toggle = st.columns([5, 1])
+        with col_summary:
+            shared = " · _shared_" if not artifact["owner"] else ""
+            st.markdown(f"**{artifact['title']}** – {ARTIFACT_TYPES[artifact['type']]} – {created}{shared}")
+            if artifact.get("snippet"):
+                st.caption(artifact["snippet"].replace("\n", " "))
+        with col_toggle:
+            show_details = st.toggle("Open", key=f"library_open_{artifact['id']}")
+
+        # Content is read from the store only when an artifact is opened
+        if show_details:
+            full = artifact_store.get(artifact["id"])
+            with st.container(border=True):
+                if full["params"]:
+                    st.caption(" · ".join(f"{key}: {value}" for key, value in full["params"].items()) + (f" · model: {full['model']}" if full["model"] else ""))
+                st.markdown(full["content"])
+                col_download, col_delete = st.columns([3, 1])
+                with col_download:
+                    st.download_button(
+                        label="📥 Download (.docx)",
+                        data=export_to_docx(title=full["title"], content=full["content"], filename=_filename(full)),
+                        file_name=_filename(full),
+                        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                        key=f"library_download_{full['id']}"
+                    )
+                with col_delete:
+                    if full["owner"] and full["owner"] == owner and st.button("🗑️ Delete", key=f"library_delete_{full['id']}"):
+                        artifact_store.delete(full["id"], owner)
+                        st.rerun()
+        st.markdown("<hr style='border: 0.5px solid var(--light-blue);'>", unsafe_allow_html=True)
+
+    st.caption(f"Showing {offset + 1}–{min(offset + LIBRARY_PAGE_SIZE, total)} of {total} artifacts · page {page} of {num_pages}")
+
+    # The ZIP is only rendered when asked for, not on every rerun
+    if st.toggle("📦 Prepare this page as a .zip", key="library_zip"):
+        bundle = [
+            {"title": artifact["title"], "content": artifact_store.content(artifact["content_hash"]), "filename": _filename(artifact)}
+            for artifact in artifacts
+        ]
+        st.download_button(
+            label=f"📦 Download {len(bundle)} Artifacts (.zip)",
+            data=export_zip(bundle),
+            file_name="teachmate_artifacts.zip",
+            mime="application/zip"
+        )
@@ -1,10 +1,75 @@
 import streamlit as st
 import os
+import time
+import hashlib
 from dotenv import load_dotenv
-from app.agents.assessment_agent import generate_assessment
-from app.utils.file_exporter import export_to_docx
+from app.agents.assessment_agent import stream_assessment
+from app.agents.assessment_batch import parse_manifest, run_batch, BATCH_WORKERS
+from app.utils.file_exporter import export_to_docx, iter_zip
+from app.utils.artifact_store import artifact_store, ASSESSMENT
+from app.agents.llm_client import DEFAULT_MODEL
+from app.ui.artifact_library import offer_reuse
 
 load_dotenv()
+BATCH_CHECKPOINT_DIR = "app/memory/batch_checkpoints"
+
+# (name, bytes) for each file, read one at a time while the ZIP is assembled
+def _read_files(paths):
+    for path in paths:
+        with open(path, "rb") as f:
+            yield os.path.basename(path), f.read()
+
+# Batch mode: one question bank per manifest row, generated in parallel and resumable
+def render_batch():
+    with st.expander("📦 Batch Generation from a Manifest (CSV / YAML)"):
+        st.markdown("Upload a manifest with `course`, `unit`, `type` and `bloom` columns (optional `num_questions`) to build question banks for many units at once. Re-uploading the same manifest resumes where the last run stopped.")
+        manifest_file = st.file_uploader("📄 Unit Manifest", type=["csv", "yaml", "yml"], key="assessment_batch_manifest")
+        workers = st.slider("⚙️ Parallel Generations", min_value=1, max_value=8, value=BATCH_WORKERS, help="How many units are generated at the same time.")
+
+        if not manifest_file or not st.button("🚀 Generate All Units", use_container_width=True):
+            return
+
+        raw = manifest_file.getvalue()
+        try:
+            rows = parse_manifest(raw.decode("utf-8"), manifest_file.name.rsplit(".", 1)[-1].lower())
+        except Exception as e:
+            st.error(f"❌ Could not read the manifest: {e}")
+            return
+
+        # Same teacher + same manifest content -> same checkpoint, so a re-run skips finished units
+        # (another teacher uploading the same manifest starts their own run)
+        owner = st.session_state.get("username")
+        checkpoint_dir = os.path.join(BATCH_CHECKPOINT_DIR, owner) if owner else BATCH_CHECKPOINT_DIR
+        checkpoint_path = os.path.join(checkpoint_dir, hashlib.sha256(raw).hexdigest()[:16] + ".json")
+        progress = st.progress(0.0, text=f"Generating {len(rows)} units...")
+
+        def on_progress(done, total, row, outcome):
+            progress.progress(done / total, text=f"{done}/{total} – {row['course']} / {row['unit']}")
+
+        report = run_batch(rows, checkpoint_path, workers, progress_callback=on_progress, owner=owner)
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("✅ Generated", len(report["completed"]), help=f"{report['skipped']} already done in an earlier run")
+        col2.metric("⚡ Throughput", f"{report['units_per_min']:.1f} units/min")
+        col3.metric("⏱️ Median Latency", f"{report['latency_p50']:.1f}s" if report["latency_p50"] is not None else "–")
+        if report["completed"]:
+            st.dataframe(
+                [{"Course": u["course"], "Unit": u["unit"], "Type": u["question_type"], "Bloom": u["bloom_level"],
+                  "Latency (s)": round(u["latency"], 1), "File": u["file"]} for u in report["completed"]],
+                use_container_width=True
+            )
+            # This run's question banks in one download
+            banks = [u["file"] for u in report["completed"] if os.path.exists(u["file"])]
+            st.download_button(
+                label=f"📦 Download All {len(banks)} Question Banks (.zip)",
+                data=b"".join(iter_zip(_read_files(banks))),
+                file_name="question_banks.zip",
+                mime="application/zip",
+                use_container_width=True
+            )
+        if report["failed"]:
+            st.error(f"❌ {len(report['failed'])} units failed. Click Generate again to retry only those.")
+            st.dataframe([{"Course": u["course"], "Unit": u["unit"], "Error": u["error"]} for u in report["failed"]], use_container_width=True)
 
 def render():
     st.markdown("## 📝 Assessment Builder")
@@ -32,31 +97,52 @@ def render():
             st.markdown("<div style='margin-top: 2rem;'></div>", unsafe_allow_html=True) # Spacer
             submitted = st.form_submit_button("✨ Generate Questions")
 
-    if submitted:
+    render_batch()
+
+    regenerate = st.session_state.pop("assessment_regenerate", False)
+    if submitted or regenerate:
         if not course_name or not unit_name:
             st.error("🚨 Please complete both Course Title and Unit / Module Name.")
             return
 
-        with st.spinner("🧠 Generating questions using Gemini... This might take a moment!"):
-            try:
-                questions_text = generate_assessment(course_name, unit_name, num_questions, question_type, bloom_level)
-                st.success("✅ Assessment Questions Generated Successfully!")
-                
-                st.markdown("### 🧾 Sample Output")
-                st.info("Here are your generated assessment questions:")
-                st.text(questions_text) # This will adapt to the container width
-
-                st.markdown("<div style='margin-top: 1.5rem;color : white'></div>", unsafe_allow_html=True) # Spacer
-                st.download_button( 
-                    label="📥 Download Assessment (.docx)",
-                    data=export_to_docx(
-                        title=f"{course_name} – Assessment Bank ({unit_name})",
-                        content=questions_text,
-                        filename=f"{course_name.replace(' ', '_')}_{unit_name.replace(' ', '_')}_assessment.docx"
-                    ),
-                    file_name=f"{course_name.replace(' ', '_')}_{unit_name.replace(' ', '_')}_assessment.docx",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                    help="Download your assessment questions as a Word document."
-                )
-            except Exception as e:
-                st.error(f"❌ An error occurred during question generation: {e}. Please check your inputs and try again.")
\ No newline at end of file
+        try:
+            params = {"course_name": course_name, "unit_name": unit_name, "num_questions": num_questions,
+                      "question_type": question_type, "bloom_level": bloom_level}
+            if not regenerate and offer_reuse(ASSESSMENT, params, "assessment_regenerate"):
+                return
+
+            st.markdown("### 🧾 Sample Output")
+            st.info("Here are your generated assessment questions:")
+            # Stream the questions as Gemini writes them instead of waiting for the full text
+            start = time.perf_counter()
+            stream = stream_assessment(course_name, unit_name, num_questions, question_type, bloom_level)
+            questions_text = st.write_stream(stream)
+            if stream.ttft is not None:
+                st.caption(f"⏱️ First words after {stream.ttft:.2f}s{' (cached)' if stream.cached else ''}")
+            if stream.error is not None:
+                return
+            st.success("✅ Assessment Questions Generated Successfully!")
+            saved = artifact_store.save(
+                ASSESSMENT, questions_text, course_name,
+                owner=st.session_state.get("username"),
+                title=f"{course_name} – Assessment Bank ({unit_name})",
+                params=params,
+                model=DEFAULT_MODEL,
+                generation_s=None if stream.cached else time.perf_counter() - start
+            )
+            st.caption("🗃️ Already in your Artifact Library" if saved["duplicate"] else "🗃️ Saved to your Artifact Library")
+
+            st.markdown("<div style='margin-top: 1.5rem;color : white'></div>", unsafe_allow_html=True) # Spacer
+            st.download_button( 
+                label="📥 Download Assessment (.docx)",
+                data=export_to_docx(
+                    title=f"{course_name} – Assessment Bank ({unit_name})",
+                    content=questions_text,
+                    filename=f"{course_name.replace(' ', '_')}_{unit_name.replace(' ', '_')}_assessment.docx"
+                ),
+                file_name=f"{course_name.replace(' ', '_')}_{unit_name.replace(' ', '_')}_assessment.docx",
+                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                help="Download your assessment questions as a Word document."
+            )
+        except Exception as e:
+            st.error(f"❌ An error occurred during question generation: {e}. Please check your inputs and try again.")
\ No newline at end of file
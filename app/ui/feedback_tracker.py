@@ -1,45 +1,26 @@
 import streamlit as st
 import os
 import datetime
-import json
 from dotenv import load_dotenv
-from app.agents.feedback_agent import generate_feedback_suggestions
+from app.agents.feedback_agent import stream_feedback_suggestions
 from app.utils.file_exporter import export_to_docx
+from app.utils.artifact_store import artifact_store, FEEDBACK_SUMMARY
+from app.agents.llm_client import DEFAULT_MODEL
+from app.utils.feedback_store import feedback_store
+from app.utils.feedback_analytics import feedback_analytics, ANALYTICS_ROLLING_WEEKS
 
 load_dotenv()
-feedback_log_path = "app/memory/feedback_log.json"
 
+# Append-only, indexed storage (migrates the old feedback_log.json on first use)
 def save_feedback(course_name, positive, negative, suggestions, rating=None):
-    entry = {
-        "course": course_name,
-        "timestamp": datetime.datetime.now().isoformat(),
-        "what_worked": positive,
-        "what_did_not": negative,
-        "gemini_suggestion": suggestions,
-        "rating": rating
-    }
-
-    if os.path.exists(feedback_log_path):
-        with open(feedback_log_path, "r") as f:
-            try:
-                data = json.load(f)
-            except json.JSONDecodeError:
-                data = [] # Handle empty or malformed JSON
-    else:
-        data = []
-
-    data.append(entry)
-    with open(feedback_log_path, "w") as f:
-        json.dump(data, f, indent=2)
-
-def load_feedback_history():
-    if os.path.exists(feedback_log_path):
-        with open(feedback_log_path, "r") as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                return []
-    return []
+    return feedback_store.append(course_name, positive, negative, suggestions, rating)
+
+HISTORY_PAGE_SIZE = 10
+
+def rating_label(rating):
+    if rating:
+        return "⭐" * rating + f" ({rating}/5)"
+    return "_Not rated_"
 
 def render():
     st.markdown("## 📊 Feedback Tracker")
@@ -65,16 +46,25 @@ def render():
             st.error("🚨 All fields (Course Name, What went well, What needs improvement) are required to generate suggestions and log your feedback.")
             return
 
-        with st.spinner("🧠 Analyzing your feedback with Gemini and generating personalized suggestions..."):
-            try:
-                suggestions = generate_feedback_suggestions(course_name, positive, negative)
-                st.success("✅ Suggestions Ready and Feedback Logged!")
-                
-                st.markdown("### 💡 Gemini's Actionable Suggestions")
-                st.info("Based on your reflection, here's what Gemini recommends:")
-                st.markdown(suggestions) # Use markdown for potentially richer text output from Gemini
-
+        try:
+            st.markdown("### 💡 Gemini's Actionable Suggestions")
+            st.info("Based on your reflection, here's what Gemini recommends:")
+            # Stream the suggestions as Gemini writes them (rendered as markdown)
+            stream = stream_feedback_suggestions(course_name, positive, negative)
+            suggestions = st.write_stream(stream)
+            if stream.ttft is not None:
+                st.caption(f"⏱️ First words after {stream.ttft:.2f}s{' (cached)' if stream.cached else ''}")
+            # Only log reflections that actually received suggestions
+            if stream.error is None:
                 save_feedback(course_name, positive, negative, suggestions, rating)
+                st.success("✅ Suggestions Ready and Feedback Logged!")
+                artifact_store.save(
+                    FEEDBACK_SUMMARY, suggestions, course_name,
+                    owner=st.session_state.get("username"),
+                    title=f"{course_name} – Weekly Feedback Summary",
+                    params={"course_name": course_name, "rating": rating},
+                    model=DEFAULT_MODEL
+                )
 
                 st.markdown("<div style='margin-top: 1.5rem;'></div>", unsafe_allow_html=True) # Spacer
                 st.download_button(
@@ -88,25 +78,101 @@ def render():
                     mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
                     help="Download the AI-generated suggestions as a Word document."
                 )
-            except Exception as e:
-                st.error(f"❌ An error occurred during feedback analysis: {e}. Please try again later.")
+        except Exception as e:
+            st.error(f"❌ An error occurred during feedback analysis: {e}. Please try again later.")
     
+    st.markdown("---")
+    st.markdown("### 📈 Feedback Insights")
+    render_insights()
+
     st.markdown("---")
     st.markdown("### 📜 Feedback History")
-    feedback_history = load_feedback_history()
-    if feedback_history:
-        # Display latest feedback first
-        for entry in reversed(feedback_history):
-            rating_str = "⭐" * entry.get("rating", 0) + " (Not rated)" if entry.get("rating") == 0 else ""
-            if entry.get("rating"):
-                rating_str = "⭐" * entry["rating"] + f" ({entry['rating']}/5)"
-            else:
-                rating_str = "_Not rated_"
-
-            with st.expander(f"**{entry['course']}** – {rating_str} – Logged on: {datetime.datetime.fromisoformat(entry['timestamp']).strftime('%Y-%m-%d %H:%M:%S')}"):
-                st.markdown(f"**✅ What Went Well:** \n{entry['what_worked']}")
-                st.markdown(f"**❌ What Needs Improvement:** \n{entry['what_did_not']}")
-                st.markdown(f"**💡 Gemini's Suggestions:** \n{entry['gemini_suggestion']}")
-                st.markdown("<hr style='border: 0.5px solid var(--light-blue);'>", unsafe_allow_html=True) # Lighter separator
-    else:
-        st.info("No feedback entries yet. Submit your first reflection above!")
\ No newline at end of file
+    render_history()
+
+# Rating trends per course and recurring complaints, computed by the analytics engine
+# (only entries logged since the last rerun are read and aggregated)
+def render_insights():
+    summary = feedback_analytics.course_summary()
+    if summary.empty:
+        st.info("Insights appear here once you have logged some feedback.")
+        return
+
+    trends = feedback_analytics.rating_trends()
+    st.markdown(f"**Rolling average rating** (last {ANALYTICS_ROLLING_WEEKS} logged weeks)")
+    st.line_chart(trends.pivot_table(index="week_start", columns="course", values="rolling_avg"))
+
+    st.dataframe(
+        summary.rename(columns={
+            "course": "Course",
+            "week_start": "Latest week",
+            "entries": "Entries that week",
+            "avg_rating": "Avg rating",
+            "rolling_avg": "Rolling avg",
+            "wow_delta": "Change vs previous week",
+            "total_entries": "Total entries",
+        }),
+        hide_index=True,
+        use_container_width=True
+    )
+
+    # Embedding the complaints loads the sentence-transformer, so it is opt-in
+    if st.toggle("🔍 Find recurring complaints", key="feedback_insights_complaints", help="Groups similar 'What needs improvement' notes across all reflections."):
+        with st.spinner("Grouping similar complaints..."):
+            complaints = feedback_analytics.recurring_complaints()
+        if complaints.empty:
+            st.info("No complaint has come up more than once yet.")
+        else:
+            st.dataframe(
+                complaints.rename(columns={
+                    "example": "Complaint",
+                    "mentions": "Mentions",
+                    "courses": "Courses",
+                    "first_seen": "First seen",
+                    "last_seen": "Last seen",
+                }),
+                hide_index=True,
+                use_container_width=True
+            )
+
+# Paginated history: only one page of summary rows is queried per rerun, and an
+# entry's full text is fetched only when its details are opened
+def render_history():
+    col1, col2 = st.columns(2)
+    with col1:
+        course_filter = st.selectbox("📚 Course", ["All courses"] + feedback_store.courses(), key="feedback_history_course")
+    with col2:
+        date_range = st.date_input("🗓️ Logged between", value=(), key="feedback_history_dates", help="Pick a start and end date to narrow the history.")
+
+    course = None if course_filter == "All courses" else course_filter
+    start = end = None
+    if len(date_range) == 2:
+        start = date_range[0].isoformat()
+        end = (date_range[1] + datetime.timedelta(days=1)).isoformat()
+
+    total = feedback_store.count(course, start, end)
+    if not total:
+        st.info("No feedback entries yet. Submit your first reflection above!" if not (course or start) else "No feedback entries match these filters.")
+        return
+
+    num_pages = (total + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+    # Keyed on the filters so the page resets when they change
+    page = st.number_input("📄 Page", min_value=1, max_value=num_pages, value=1, step=1, key=f"feedback_history_page_{course}_{start}_{end}")
+    offset = (page - 1) * HISTORY_PAGE_SIZE
+
+    for entry in feedback_store.query_summaries(course, start, end, limit=HISTORY_PAGE_SIZE, offset=offset):
+        logged_on = datetime.datetime.fromisoformat(entry["timestamp"]).strftime("%Y-%m-%d %H:%M:%S")
+        col_summary, col_toggle = st.columns([5, 1])
+        with col_summary:
+            st.markdown(f"**{entry['course']}** – {rating_label(entry['rating'])} – Logged on: {logged_on}")
+        with col_toggle:
+            show_details = st.toggle("Details", key=f"feedback_details_{entry['id']}")
+
+        if show_details:
+            full_entry = feedback_store.get(entry["id"])
+            with st.container(border=True):
+                st.markdown(f"**✅ What Went Well:** \n{full_entry['what_worked']}")
+                st.markdown(f"**❌ What Needs Improvement:** \n{full_entry['what_did_not']}")
+                st.markdown(f"**💡 Gemini's Suggestions:** \n{full_entry['gemini_suggestion']}")
+        st.markdown("<hr style='border: 0.5px solid var(--light-blue);'>", unsafe_allow_html=True) # Lighter separator
+
+    st.caption(f"Showing {offset + 1}–{min(offset + HISTORY_PAGE_SIZE, total)} of {total} entries · page {page} of {num_pages}")
@@ -1,8 +1,12 @@
 import streamlit as st
 import os
+import time
 from dotenv import load_dotenv
-from app.agents.lesson_plan_agent import generate_lesson_plan
+from app.agents.lesson_plan_agent import generate_lesson_plan, stream_lesson_plan
 from app.utils.file_exporter import export_to_docx
+from app.utils.artifact_store import artifact_store, LESSON_PLAN
+from app.agents.llm_client import DEFAULT_MODEL
+from app.ui.artifact_library import offer_reuse
 
 load_dotenv()
 
@@ -30,35 +34,63 @@ def render():
             target_outcomes = st.text_area("🎯 Key Learning Outcomes", 
                                             placeholder="e.g., Students will understand neural networks, implement a simple CNN, and evaluate model performance.", 
                                             height=150, help="Outline what students should be able to do by the end of the course/unit.")
+            sectioned = st.checkbox("⚡ Sectioned mode", value=False, help="Plan an outline first, then write blocks of weeks in parallel. Faster and less likely to be cut off for long courses.")
             
             st.markdown("<div style='margin-top: 2rem;'></div>", unsafe_allow_html=True) # Spacer
             submitted = st.form_submit_button("✨ Generate Lesson Plan")
 
-    if submitted:
+    regenerate = st.session_state.pop("lesson_plan_regenerate", False)
+    if submitted or regenerate:
         if not course_name or not target_outcomes:
             st.error("🚨 All fields are required: Course Title and Target Learning Outcomes are mandatory.")
             return
 
-        with st.spinner("🧠 Generating your comprehensive weekly lesson plan using Gemini... This may take a few moments!"):
-            try:
-                lesson_text = generate_lesson_plan(course_name, class_duration, difficulty, target_outcomes, num_weeks)
-                st.success("✅ Lesson Plan Ready!")
-                
-                st.markdown(f"### 📅 Weekly Lesson Breakdown for {course_name}")
-                st.markdown("<hr style='border: 1px dashed var(--light-blue);'>", unsafe_allow_html=True)
-                st.text(lesson_text)
+        try:
+            params = {"course_name": course_name, "class_duration": class_duration, "difficulty": difficulty,
+                      "target_outcomes": target_outcomes, "num_weeks": num_weeks, "sectioned": sectioned}
+            if not regenerate and offer_reuse(LESSON_PLAN, params, "lesson_plan_regenerate"):
+                return
 
-                st.markdown("<div style='margin-top: 1.5rem;'></div>", unsafe_allow_html=True) # Spacer
-                st.download_button(
-                    label="📥 Download Lesson Plan (.docx)",
-                    data=export_to_docx(
-                        title=f"{course_name} – Lesson Plan",
-                        content=lesson_text,
-                        filename=f"{course_name.replace(' ', '_')}_lesson_plan.docx"
-                    ),
-                    file_name=f"{course_name.replace(' ', '_')}_lesson_plan.docx",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                    help="Download your generated lesson plan as a Word document."
-                )
-            except Exception as e:
-                st.error(f"❌ An error occurred during lesson plan generation: {e}. Please ensure all details are correct.")
\ No newline at end of file
+            st.markdown(f"### 📅 Weekly Lesson Breakdown for {course_name}")
+            st.markdown("<hr style='border: 1px dashed var(--light-blue);'>", unsafe_allow_html=True)
+            start = time.perf_counter()
+            if sectioned:
+                with st.spinner("🧠 Planning the outline, then writing all weeks in parallel with Gemini..."):
+                    lesson_text = generate_lesson_plan(course_name, class_duration, difficulty, target_outcomes, num_weeks, sectioned=True)
+                st.markdown(lesson_text)
+                if lesson_text.startswith(("⚠️", "❌")):
+                    return
+            else:
+                # Stream the plan as Gemini writes it instead of waiting for the full text
+                stream = stream_lesson_plan(course_name, class_duration, difficulty, target_outcomes, num_weeks)
+                lesson_text = st.write_stream(stream)
+                if stream.ttft is not None:
+                    st.caption(f"⏱️ First words after {stream.ttft:.2f}s{' (cached)' if stream.cached else ''}")
+                if stream.error is not None:
+                    return
+            generation_s = None if not sectioned and stream.cached else time.perf_counter() - start
+            st.success("✅ Lesson Plan Ready!")
+            saved = artifact_store.save(
+                LESSON_PLAN, lesson_text, course_name,
+                owner=st.session_state.get("username"),
+                title=f"{course_name} – Lesson Plan",
+                params=params,
+                model=DEFAULT_MODEL,
+                generation_s=generation_s
+            )
+            st.caption("🗃️ Already in your Artifact Library" if saved["duplicate"] else "🗃️ Saved to your Artifact Library")
+
+            st.markdown("<div style='margin-top: 1.5rem;'></div>", unsafe_allow_html=True) # Spacer
+            st.download_button(
+                label="📥 Download Lesson Plan (.docx)",
+                data=export_to_docx(
+                    title=f"{course_name} – Lesson Plan",
+                    content=lesson_text,
+                    filename=f"{course_name.replace(' ', '_')}_lesson_plan.docx"
+                ),
+                file_name=f"{course_name.replace(' ', '_')}_lesson_plan.docx",
+                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                help="Download your generated lesson plan as a Word document."
+            )
+        except Exception as e:
+            st.error(f"❌ An error occurred during lesson plan generation: {e}. Please ensure all details are correct.")
\ No newline at end of file
@@ -1,28 +1,14 @@
 import streamlit as st
 import os
 from dotenv import load_dotenv
-import google.generativeai as genai
-# from app.rag.rag_retriever import retrieve_similar_context
-
-# Mock function for demonstration if rag_retriever is not fully implemented
-def retrieve_similar_context(query):
-    # print(f"Simulating context retrieval for query: '{query}'")
-    import time
-    time.sleep(1.5) # Simulate work
-    if "data structures" in query.lower():
-        return ["Data structures are ways of organizing data in a computer so that it can be used efficiently.",
-                "Common data structures include arrays, linked lists, trees, graphs, and hash tables."]
-    elif "recursion" in query.lower():
-        return ["Recursion is a programming technique where a function calls itself.",
-                "It's often used for problems that can be broken down into smaller, self-similar subproblems. A base case is crucial to prevent infinite loops."]
-    else:
-        return ["No specific context found for your query in the current dummy setup. Please try uploading relevant documents in the 'RAG Document Uploader' tab for real context retrieval.",
-                "The RAG system enhances AI responses by providing specific information from your documents."]
-
+from app.agents.llm_client import stream_text
+from app.rag.rag_retriever import hybrid_search, list_documents
+from app.rag.context_builder import build_context
 
 load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-model = genai.GenerativeModel("gemini-1.5-flash")
+
+# Chunks retrieved per question; the context builder merges and trims them to its token budget
+QA_TOP_K = 8
 
 def render():
     st.markdown("## 📖 RAG-Powered Q&A")
@@ -31,7 +17,13 @@ def render():
     st.markdown("<hr style='border: 1px dashed var(--light-blue);'>", unsafe_allow_html=True)
     st.markdown("### ❓ Ask Your Question")
     
+    # Search only the logged-in teacher's documents, optionally a single course
+    owner = st.session_state.get("username")
+    courses = sorted({doc["course"] for doc in list_documents(owner) if doc["course"]})
+
     with st.container(border=True): # Container for the question section
+        course_filter = st.selectbox("📚 Search in", ["All my documents"] + courses, key="rag_qa_course")
+        course = None if course_filter == "All my documents" else course_filter
         user_query = st.text_input("✍️ Enter your question here:", placeholder="e.g., What are the main types of data structures?", key="rag_qa_input")
 
         col_btn1, col_btn2 = st.columns([1, 1])
@@ -44,17 +36,24 @@ def render():
                 st.markdown("<hr style='border: 1px dashed var(--light-blue);'>", unsafe_allow_html=True)
                 with st.spinner("🧠 Retrieving context from your uploaded documents and generating an answer with Gemini..."):
                     try:
-                        context_chunks = retrieve_similar_context(user_query)
+                        # Repeated questions are answered from the retrieval cache without re-encoding
+                        retrieval = hybrid_search(user_query, QA_TOP_K, owner=owner, course=course)
+                        packed = build_context(retrieval)
+                        st.caption(
+                            f"🔎 Context retrieved in {retrieval['timings']['total']:.0f} ms{' (cached)' if retrieval['cached'] else ''}"
+                            f" · {packed['tokens']} context tokens from {packed['chunks_used']} of {packed['chunks_retrieved']} chunks"
+                            f" (unpacked: {packed['tokens_before']})"
+                        )
 
-                        # Check if context is truly empty or just the dummy "no context" message
-                        is_context_found = not (not context_chunks or all("No specific context found" in chunk for chunk in context_chunks))
+                        is_context_found = bool(packed["text"])
 
                         if not is_context_found:
                             st.warning("⚠️ No direct relevant context found in your uploaded documents for this query. Gemini will try to answer based on its general knowledge. For document-specific answers, ensure relevant files are uploaded and try again.")
                             context = "" # No context for prompt if not found
                         else:
-                            context = "\n".join(context_chunks)
+                            context = packed["text"]
                             with st.expander("📝 Click to view retrieved context (from your documents)"):
+                                st.markdown("\n".join(f"**[{c['number']}]** {c['citation']}" for c in packed["citations"]))
                                 st.text(context) # This will adapt to the container's width
                             st.markdown("<div style='margin-top: 1rem;'></div>", unsafe_allow_html=True) # Spacer
 
@@ -68,13 +67,16 @@ def render():
                         Question:
                         {user_query}
 
-                        Please provide a comprehensive answer. If your answer heavily relies on the provided context, please cite it using where x is the source given in the context.
+                        Please provide a comprehensive answer. If your answer heavily relies on the provided context, please cite it using [x] where x is the number of the passage in the context.
                         If no context is provided, state that your answer is based on general knowledge.
                         """
 
-                        response = model.generate_content(prompt)
                         st.success("✅ Gemini's Answer:")
-                        st.markdown(response.text) # Use markdown to render potential formatting from Gemini
+                        # Stream the answer (rendered as markdown) as Gemini writes it
+                        stream = stream_text(prompt, error_message="❌ Failed to generate the answer")
+                        st.write_stream(stream)
+                        if stream.ttft is not None:
+                            st.caption(f"⏱️ First words after {stream.ttft:.2f}s{' (cached)' if stream.cached else ''}")
 
                     except Exception as e:
                         st.error(f"❌ An error occurred while generating the answer: {e}. Please try again.")
@@ -1,59 +1,129 @@
 import streamlit as st
 import os
-import shutil
-# Assuming app.rag.rag_retriever exists and contains upload_and_embed_document
-# from app.rag.rag_retriever import upload_and_embed_document
-
-# Mock function for demonstration purposes if rag_retriever is not fully implemented
-def upload_and_embed_document(file_path, source_label):
-    # print(f"Simulating embedding document: {source_label} from {file_path}")
-    import time
-    time.sleep(2) # Simulate work
-    # Dummy logic to make it seem like it's doing something based on file type
-    if file_path.lower().endswith(".pdf"):
-        return 20 + len(file_path) % 10 # More chunks for PDF
-    else:
-        return 10 + len(file_path) % 5
-    
+import uuid
+import datetime
+from app.rag.ingestion_jobs import ingestion_queue, ACTIVE_STATUSES, DONE, FAILED, CANCELLED
+from app.rag.rag_retriever import list_documents, list_document_chunks, delete_document
 
 # Define upload directory
 UPLOAD_DIR = "docs/sample_pdfs"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+STATUS_ICONS = {"queued": "⏳", "running": "⚙️", DONE: "✅", FAILED: "❌", CANCELLED: "🚫"}
+
 # Streamlit UI
 def render():
     st.markdown("## 📂 RAG Document Uploader")
     st.markdown("Upload your course materials (PDF, DOCX, TXT) here. These documents will be processed and embedded into a vector database, enabling you to ask questions based on their content in the 'RAG-Powered Q&A' module. 🧠")
 
     st.markdown("<hr style='border: 1px dashed var(--light-blue);'>", unsafe_allow_html=True)
-    st.markdown("### ⬆️ Upload Your Document")
-    
+    st.markdown("### ⬆️ Upload Your Documents")
+
+    # Jobs started from this session, and uploads already queued (reruns keep the uploader's files)
+    st.session_state.setdefault("rag_job_ids", [])
+    st.session_state.setdefault("rag_queued_uploads", set())
+
+    # Documents go to the logged-in teacher's own collection, tagged with the course
+    owner = st.session_state.get("username")
+
     with st.container(border=True): # Container for upload section
-        uploaded_file = st.file_uploader("Choose a file", type=["pdf", "docx", "txt"], help="Supported formats: PDF, DOCX, TXT. Max file size: 200MB.")
+        course = st.text_input("📚 Course (optional)", placeholder="e.g., CS-201 Data Structures", key="rag_upload_course", help="Tag the documents with a course so Q&A can search just that course.").strip() or None
+        uploaded_files = st.file_uploader("Choose files", type=["pdf", "docx", "txt"], accept_multiple_files=True, help="Supported formats: PDF, DOCX, TXT. Max file size: 200MB. Embedding runs in the background, so you can keep working.")
 
-        if uploaded_file:
+        # New files of this upload are saved first, then queued together as one batch
+        saved = []
+        for uploaded_file in uploaded_files or []:
+            upload_key = (uploaded_file.name, uploaded_file.size, course)
+            if upload_key in st.session_state["rag_queued_uploads"]:
+                continue
             filename = uploaded_file.name
-            file_path = os.path.join(UPLOAD_DIR, filename)
+            upload_dir = os.path.join(UPLOAD_DIR, owner) if owner else UPLOAD_DIR
+            # Each job reads its own copy (removed when the job finishes), so a re-upload or the
+            # same file name in another course never overwrites a file a worker is still reading
+            file_path = os.path.join(upload_dir, f"{uuid.uuid4().hex[:12]}_{filename}")
 
             try:
-                # Save uploaded file
+                # Save uploaded file, then hand it to the background workers
+                os.makedirs(upload_dir, exist_ok=True)
                 with open(file_path, "wb") as f:
                     f.write(uploaded_file.getbuffer())
-                st.success(f"✅ Successfully uploaded: **{filename}**! Now preparing for embedding...")
-
-                # Embed and store in ChromaDB
-                with st.spinner(f"✨ Embedding '{filename}' into the vector database... This might take a few moments depending on file size."):
-                    num_chunks = upload_and_embed_document(file_path, source_label=filename)
-                    st.success(f"✅ Document embedded successfully! **{num_chunks}** chunks stored and ready for RAG queries. 🎉")
-                
-                st.info(f"File stored temporarily at: `{file_path}`")
-                st.markdown("You can now navigate to the 'RAG-Powered Q&A' tab to ask questions based on this document!")
-
+                saved.append((file_path, filename, upload_key))
             except Exception as e:
-                st.error(f"❌ Failed to upload or embed **{filename}**: {str(e)}. Please check the file and try again.")
+                st.error(f"❌ Failed to upload **{filename}**: {str(e)}. Please check the file and try again.")
                 # Clean up potentially partially written file
                 if os.path.exists(file_path):
                     os.remove(file_path)
-    
+
+        if saved:
+            st.session_state["rag_job_ids"].extend(ingestion_queue.submit_many(
+                [(file_path, filename) for file_path, filename, _ in saved], owner=owner, course=course, remove_file=True
+            ))
+            for _, filename, upload_key in saved:
+                st.session_state["rag_queued_uploads"].add(upload_key)
+                st.success(f"✅ Successfully uploaded: **{filename}**! Embedding has been queued.")
+
+    if st.session_state["rag_job_ids"]:
+        st.markdown("### 📋 Embedding Jobs")
+        jobs = ingestion_queue.jobs(st.session_state["rag_job_ids"])
+        st.session_state["rag_jobs_polling"] = any(job["status"] in ACTIVE_STATUSES for job in jobs)
+        # Re-run only this section every second while something is still embedding
+        st.fragment(render_jobs, run_every=1.0 if st.session_state["rag_jobs_polling"] else None)()
+
+    st.markdown("### 🗂️ Your Documents")
+    render_documents(owner)
+
     st.markdown("<hr style='border: 1px dashed var(--light-blue);'>", unsafe_allow_html=True)
-    
\ No newline at end of file
+
+# The teacher's embedded documents, with a chunk preview and delete per document
+def render_documents(owner):
+    documents = list_documents(owner)
+    if not documents:
+        st.info("No documents embedded yet. Upload one above to get started!")
+        return
+
+    for doc in documents:
+        uploaded_on = datetime.datetime.fromtimestamp(doc["uploaded_at"]).strftime("%Y-%m-%d %H:%M") if doc["uploaded_at"] else "earlier"
+        course_label = f" · {doc['course']}" if doc["course"] else ""
+        with st.expander(f"📄 {doc['source']}{course_label} – {doc['num_chunks']} chunks · uploaded {uploaded_on}"):
+            stats = doc["chunk_stats"]
+            skipped = stats.get("boilerplate_dropped", 0) + stats.get("duplicates_dropped", 0)
+            if skipped:
+                st.caption(f"♻️ {skipped} repeated headers/footers and duplicate passages were skipped when chunking.")
+            preview = list_document_chunks(doc["source"], owner, doc["course"] or None, limit=3)
+            for text, metadata in zip(preview["documents"], preview["metadatas"]):
+                section = f" · {metadata['section']}" if metadata.get("section") else ""
+                st.caption(f"Pages {metadata.get('page_start')}–{metadata.get('page_end')}{section}")
+                st.text(text[:500])
+            if st.button("🗑️ Delete document", key=f"rag_delete_{doc['document']}"):
+                removed = delete_document(doc["source"], owner, doc["course"] or None)
+                st.success(f"✅ Removed **{doc['source']}** ({removed} chunks).")
+                st.rerun()
+
+# Status, progress and a cancel button per job started from this session
+def render_jobs():
+    jobs = ingestion_queue.jobs(st.session_state["rag_job_ids"])
+    for job in reversed(jobs):
+        with st.container(border=True):
+            col_info, col_action = st.columns([5, 1])
+            with col_info:
+                course_label = f" · {job['course']}" if job["course"] else ""
+                st.markdown(f"{STATUS_ICONS[job['status']]} **{job['source_label']}**{course_label} – {job['status']}")
+                if job["status"] in ACTIVE_STATUSES:
+                    if job["total_pages"]:
+                        st.progress(min(1.0, job["pages"] / job["total_pages"]), text=f"{job['pages']}/{job['total_pages']} pages parsed · {job['chunks']} chunks embedded")
+                    else:
+                        st.caption(f"{job['pages']} pages parsed · {job['chunks']} chunks embedded")
+                elif job["status"] == DONE:
+                    st.caption(f"**{job['num_chunks']}** chunks stored and ready for RAG queries in {job['elapsed']:.1f}s. 🎉")
+                elif job["status"] == FAILED:
+                    st.caption(f"Error: {job['error']}")
+            with col_action:
+                if job["status"] in ACTIVE_STATUSES and st.button("Cancel", key=f"rag_cancel_{job['id']}"):
+                    ingestion_queue.cancel(job["id"])
+
+    if any(job["status"] == DONE for job in jobs):
+        st.markdown("You can now navigate to the 'RAG-Powered Q&A' tab to ask questions based on your documents!")
+
+    # Everything finished: one full rerun switches the polling off
+    if st.session_state.get("rag_jobs_polling") and not any(job["status"] in ACTIVE_STATUSES for job in jobs):
+        st.rerun()
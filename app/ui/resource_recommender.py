@@ -1,8 +1,12 @@
 import streamlit as st
 import os
+import time
 from dotenv import load_dotenv
-from app.agents.resource_agent import generate_resources
+from app.agents.resource_agent import stream_resources
 from app.utils.file_exporter import export_to_docx
+from app.utils.artifact_store import artifact_store, RESOURCES
+from app.agents.llm_client import DEFAULT_MODEL
+from app.ui.artifact_library import offer_reuse
 
 load_dotenv()
 
@@ -31,31 +35,49 @@ def render():
             st.markdown("<div style='margin-top: 2rem;'></div>", unsafe_allow_html=True) # Spacer
             submitted = st.form_submit_button("✨ Generate Resources")
 
-    if submitted:
+    regenerate = st.session_state.pop("resources_regenerate", False)
+    if submitted or regenerate:
         if not subject or not format_types:
             st.error("🚨 Please fill the Topic and choose at least one Preferred Resource Type.")
             return
 
-        with st.spinner("🧠 Generating suggestions using Gemini... This might take a moment to find the best resources!"):
-            try:
-                resources_text = generate_resources(subject, difficulty, format_types)
-                st.success("✅ Resources Generated Successfully!")
-                
-                st.markdown("### 📚 Suggested Resources")
-                st.info(f"Here are some recommended resources for '{subject}' at '{difficulty}' level:")
-                st.text(resources_text)
+        try:
+            params = {"subject": subject, "difficulty": difficulty, "format_types": format_types}
+            if not regenerate and offer_reuse(RESOURCES, params, "resources_regenerate"):
+                return
 
-                st.markdown("<div style='margin-top: 1.5rem;'></div>", unsafe_allow_html=True) # Spacer
-                st.download_button(
-                    label="📥 Download Resources (.docx)",
-                    data=export_to_docx(
-                        title=f"{subject} – Suggested Resources",
-                        content=resources_text,
-                        filename=f"{subject.replace(' ', '_')}_resources.docx"
-                    ),
-                    file_name=f"{subject.replace(' ', '_')}_resources.docx",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                    help="Download the list of suggested resources as a Word document."
-                )
-            except Exception as e:
-                st.error(f"❌ An error occurred during resource generation: {e}. Please check your inputs.")
\ No newline at end of file
+            st.markdown("### 📚 Suggested Resources")
+            st.info(f"Here are some recommended resources for '{subject}' at '{difficulty}' level:")
+            # Stream the list as Gemini writes it instead of waiting for the full text
+            start = time.perf_counter()
+            stream = stream_resources(subject, difficulty, format_types)
+            resources_text = st.write_stream(stream)
+            if stream.ttft is not None:
+                st.caption(f"⏱️ First words after {stream.ttft:.2f}s{' (cached)' if stream.cached else ''}")
+            if stream.error is not None:
+                return
+            st.success("✅ Resources Generated Successfully!")
+            saved = artifact_store.save(
+                RESOURCES, resources_text, subject,
+                owner=st.session_state.get("username"),
+                title=f"{subject} – Suggested Resources",
+                params=params,
+                model=DEFAULT_MODEL,
+                generation_s=None if stream.cached else time.perf_counter() - start
+            )
+            st.caption("🗃️ Already in your Artifact Library" if saved["duplicate"] else "🗃️ Saved to your Artifact Library")
+
+            st.markdown("<div style='margin-top: 1.5rem;'></div>", unsafe_allow_html=True) # Spacer
+            st.download_button(
+                label="📥 Download Resources (.docx)",
+                data=export_to_docx(
+                    title=f"{subject} – Suggested Resources",
+                    content=resources_text,
+                    filename=f"{subject.replace(' ', '_')}_resources.docx"
+                ),
+                file_name=f"{subject.replace(' ', '_')}_resources.docx",
+                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                help="Download the list of suggested resources as a Word document."
+            )
+        except Exception as e:
+            st.error(f"❌ An error occurred during resource generation: {e}. Please check your inputs.")
\ No newline at end of file
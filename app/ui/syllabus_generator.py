@@ -1,8 +1,12 @@
 import streamlit as st
 import os
+import time
 from dotenv import load_dotenv
-from app.agents.syllabus_agent import generate_syllabus
+from app.agents.syllabus_agent import generate_syllabus, stream_syllabus
 from app.utils.file_exporter import export_to_docx
+from app.utils.artifact_store import artifact_store, SYLLABUS
+from app.agents.llm_client import DEFAULT_MODEL
+from app.ui.artifact_library import offer_reuse
 
 load_dotenv()
 
@@ -24,35 +28,62 @@ def render():
             objectives = st.text_area("🎯 What should students achieve by the end of the course?", 
                                       placeholder="e.g., Students will be able to perform data cleaning, statistical analysis, and data visualization using Python.", 
                                       height=150, help="List the key learning outcomes for your students.")
+            sectioned = st.checkbox("⚡ Sectioned mode", value=False, help="Plan an outline first, then write blocks of weeks in parallel. Faster and less likely to be cut off for long courses.")
             
             st.markdown("<div style='margin-top: 2rem;'></div>", unsafe_allow_html=True) # Spacer
             submitted = st.form_submit_button("✨ Generate Syllabus")
 
-    if submitted: # This `if submitted` block is executed only after the form is submitted
+    regenerate = st.session_state.pop("syllabus_regenerate", False)
+    if submitted or regenerate: # Executed only after the form is submitted (or a new version is requested)
         if not course_name or not objectives:
             st.error("🚨 Please fill all required fields: Course Title and Learning Objectives.")
             return
 
-        with st.spinner("🧠 Generating your detailed syllabus using Gemini... This might take a moment!"):
-            try:
-                syllabus_text = generate_syllabus(course_name, objectives, duration_weeks)
-                st.success("✅ Syllabus Generated Successfully!")
-                
-                st.markdown(f"### 📖 {course_name} – Weekly Plan")
-                st.markdown("<hr style='border: 1px dashed var(--light-blue);'>", unsafe_allow_html=True) # Consistent dashed line
-                st.text(syllabus_text)
+        try:
+            params = {"course_name": course_name, "objectives": objectives, "duration_weeks": duration_weeks, "sectioned": sectioned}
+            if not regenerate and offer_reuse(SYLLABUS, params, "syllabus_regenerate"):
+                return
 
-                st.markdown("<div style='margin-top: 1.5rem;'></div>", unsafe_allow_html=True) # Spacer
-                st.download_button(
-                    label="📥 Download Syllabus (.docx)",
-                    data=export_to_docx(
-                        title=f"{course_name} – Syllabus",
-                        content=syllabus_text,
-                        filename=f"{course_name.replace(' ', '_')}_syllabus.docx"
-                    ),
-                    file_name=f"{course_name.replace(' ', '_')}_syllabus.docx",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                    help="Click to download your generated syllabus as a Word document."
-                )
-            except Exception as e:
-                st.error(f"❌ An error occurred during syllabus generation: {e}. Please try again.")
\ No newline at end of file
+            st.markdown(f"### 📖 {course_name} – Weekly Plan")
+            st.markdown("<hr style='border: 1px dashed var(--light-blue);'>", unsafe_allow_html=True) # Consistent dashed line
+            start = time.perf_counter()
+            if sectioned:
+                with st.spinner("🧠 Planning the outline, then writing all weeks in parallel with Gemini..."):
+                    syllabus_text = generate_syllabus(course_name, objectives, duration_weeks, sectioned=True)
+                st.markdown(syllabus_text)
+                if syllabus_text.startswith(("⚠️", "❌")):
+                    return
+            else:
+                # Stream the syllabus as Gemini writes it instead of waiting for the full text
+                stream = stream_syllabus(course_name, objectives, duration_weeks)
+                syllabus_text = st.write_stream(stream)
+                if stream.ttft is not None:
+                    st.caption(f"⏱️ First words after {stream.ttft:.2f}s{' (cached)' if stream.cached else ''}")
+                if stream.error is not None:
+                    return
+            generation_s = None if not sectioned and stream.cached else time.perf_counter() - start
+            st.success("✅ Syllabus Generated Successfully!")
+            saved = artifact_store.save(
+                SYLLABUS, syllabus_text, course_name,
+                owner=st.session_state.get("username"),
+                title=f"{course_name} – Syllabus",
+                params=params,
+                model=DEFAULT_MODEL,
+                generation_s=generation_s
+            )
+            st.caption("🗃️ Already in your Artifact Library" if saved["duplicate"] else "🗃️ Saved to your Artifact Library")
+
+            st.markdown("<div style='margin-top: 1.5rem;'></div>", unsafe_allow_html=True) # Spacer
+            st.download_button(
+                label="📥 Download Syllabus (.docx)",
+                data=export_to_docx(
+                    title=f"{course_name} – Syllabus",
+                    content=syllabus_text,
+                    filename=f"{course_name.replace(' ', '_')}_syllabus.docx"
+                ),
+                file_name=f"{course_name.replace(' ', '_')}_syllabus.docx",
+                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                help="Click to download your generated syllabus as a Word document."
+            )
+        except Exception as e:
+            st.error(f"❌ An error occurred during syllabus generation: {e}. Please try again.")
\ No newline at end of file
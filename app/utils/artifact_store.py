@@ -0,0 +1,263 @@
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import datetime
+import threading
+from dotenv import load_dotenv
+
+# Library of generated artifacts (syllabi, lesson plans, assessments, resource lists,
+# feedback summaries). Content is stored once per SHA-256 under objects/<aa>/<hash>.md, so
+# regenerating identical text costs no extra space; a SQLite index holds who made it, for
+# which course, with which parameters and model, plus an FTS5 index for full-text search.
+# Word files are rendered from the stored markdown on download.
+
+load_dotenv()
+ARTIFACT_STORE_DIR = os.getenv("ARTIFACT_STORE_DIR", "app/memory/artifacts")
+LEGACY_ARTIFACT_DIR = "app/memory"
+
+SYLLABUS, LESSON_PLAN, ASSESSMENT, RESOURCES, FEEDBACK_SUMMARY = "syllabus", "lesson_plan", "assessment", "resources", "feedback_summary"
+ARTIFACT_TYPES = {
+    SYLLABUS: "Syllabus",
+    LESSON_PLAN: "Lesson Plan",
+    ASSESSMENT: "Assessment",
+    RESOURCES: "Resources",
+    FEEDBACK_SUMMARY: "Feedback Summary",
+}
+
+ARTIFACT_FIELDS = ("id", "content_hash", "owner", "type", "course", "title", "params", "model", "created_at", "size", "generation_s")
+
+# Lines the old exporter added around the generated text
+_LEGACY_BOILERPLATE = re.compile(r"^(Generated on: .*|-{3,}|Watermark: .*)$")
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+# FTS5 query matching every word of free text as a prefix (quoted, so user input cannot
+# inject query syntax)
+def _fts_query(text):
+    words = re.findall(r"\w+", text.lower())
+    return " ".join(f'"{word}"*' for word in words)
+
+
+class ArtifactStore:
+    def __init__(self, root=ARTIFACT_STORE_DIR, legacy_dir=LEGACY_ARTIFACT_DIR):
+        self.root = root
+        self._local = threading.local()
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS artifacts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    content_hash TEXT NOT NULL,
+                    owner TEXT NOT NULL DEFAULT '',
+                    type TEXT NOT NULL,
+                    course TEXT NOT NULL COLLATE NOCASE,
+                    title TEXT,
+                    params TEXT,
+                    model TEXT,
+                    created_at TEXT NOT NULL,
+                    size INTEGER,
+                    generation_s REAL,
+                    UNIQUE (owner, type, content_hash)
+                );
+                CREATE INDEX IF NOT EXISTS idx_artifacts_owner_created ON artifacts(owner, created_at);
+                CREATE INDEX IF NOT EXISTS idx_artifacts_owner_type ON artifacts(owner, type, created_at);
+                CREATE INDEX IF NOT EXISTS idx_artifacts_course ON artifacts(course);
+                CREATE INDEX IF NOT EXISTS idx_artifacts_hash ON artifacts(content_hash);
+                CREATE VIRTUAL TABLE IF NOT EXISTS artifacts_fts USING fts5(title, course, body, tokenize='porter unicode61');
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+                """
+            )
+            # Stores created before generation times were recorded
+            if "generation_s" not in [row[1] for row in conn.execute("PRAGMA table_info(artifacts)")]:
+                conn.execute("ALTER TABLE artifacts ADD COLUMN generation_s REAL")
+        if legacy_dir:
+            self.import_legacy_files(legacy_dir)
+
+    # One connection per thread (Streamlit runs each session on its own thread)
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.root, "artifacts.db"), timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], digest + ".md")
+
+    # Write content under its hash unless it is already stored
+    def _write_object(self, content, digest):
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    # Record a generated artifact (generation_s: seconds the model took, when known); returns
+    # {"id", "content_hash", "duplicate"}. Identical text of the same type from the same owner
+    # is stored once (the first record is kept).
+    def save(self, artifact_type, content, course, owner=None, title=None, params=None, model=None, created_at=None,
+             generation_s=None):
+        if artifact_type not in ARTIFACT_TYPES:
+            raise ValueError(f"Unknown artifact type {artifact_type!r}.")
+        digest = content_hash(content)
+        self._write_object(content, digest)
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO artifacts (content_hash, owner, type, course, title, params, model, created_at, size, generation_s) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    digest, owner or "", artifact_type, course.strip(), title or course.strip(),
+                    json.dumps(params or {}, sort_keys=True), model,
+                    created_at or datetime.datetime.now().isoformat(timespec="seconds"), len(content.encode("utf-8")), generation_s
+                )
+            )
+            if cursor.rowcount:
+                conn.execute(
+                    "INSERT INTO artifacts_fts (rowid, title, course, body) VALUES (?, ?, ?, ?)",
+                    (cursor.lastrowid, title or course, course, content)
+                )
+                return {"id": cursor.lastrowid, "content_hash": digest, "duplicate": False}
+        row = conn.execute(
+            "SELECT id FROM artifacts WHERE owner = ? AND type = ? AND content_hash = ?", (owner or "", artifact_type, digest)
+        ).fetchone()
+        return {"id": row["id"], "content_hash": digest, "duplicate": True}
+
+    @staticmethod
+    def _row(row):
+        artifact = dict(row)
+        artifact["params"] = json.loads(artifact["params"] or "{}")
+        return artifact
+
+    # Metadata plus content for one artifact, or None
+    def get(self, artifact_id):
+        row = self._connect().execute(
+            f"SELECT {', '.join(ARTIFACT_FIELDS)} FROM artifacts WHERE id = ?", (artifact_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        artifact = self._row(row)
+        artifact["content"] = self.content(artifact["content_hash"])
+        return artifact
+
+    def content(self, digest):
+        with open(self._object_path(digest), "r", encoding="utf-8") as f:
+            return f.read()
+
+    # WHERE clause for owner (their own plus shared artifacts), course and type filters
+    @staticmethod
+    def _filters(owner=None, course=None, artifact_type=None):
+        clauses, params = ["a.owner IN (?, '')"], [owner or ""]
+        if course:
+            clauses.append("a.course = ?")
+            params.append(course)
+        if artifact_type:
+            clauses.append("a.type = ?")
+            params.append(artifact_type)
+        return " AND ".join(clauses), params
+
+    # Newest-first page of artifact metadata; with `query`, only full-text matches, best
+    # first, each with a highlighted "snippet"
+    def search(self, owner=None, course=None, artifact_type=None, query=None, limit=20, offset=0):
+        where, params = self._filters(owner, course, artifact_type)
+        columns = ", ".join(f"a.{field}" for field in ARTIFACT_FIELDS)
+        match = _fts_query(query or "")
+        if match:
+            rows = self._connect().execute(
+                f"SELECT {columns}, snippet(artifacts_fts, 2, '**', '**', ' … ', 16) AS snippet "
+                f"FROM artifacts_fts JOIN artifacts a ON a.id = artifacts_fts.rowid "
+                f"WHERE artifacts_fts MATCH ? AND {where} ORDER BY bm25(artifacts_fts, 5.0, 3.0, 1.0) LIMIT ? OFFSET ?",
+                [match] + params + [limit, offset]
+            ).fetchall()
+        else:
+            rows = self._connect().execute(
+                f"SELECT {columns} FROM artifacts a WHERE {where} ORDER BY a.created_at DESC, a.id DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def count(self, owner=None, course=None, artifact_type=None, query=None):
+        where, params = self._filters(owner, course, artifact_type)
+        match = _fts_query(query or "")
+        if match:
+            return self._connect().execute(
+                f"SELECT COUNT(*) FROM artifacts_fts JOIN artifacts a ON a.id = artifacts_fts.rowid WHERE artifacts_fts MATCH ? AND {where}",
+                [match] + params
+            ).fetchone()[0]
+        return self._connect().execute(f"SELECT COUNT(*) FROM artifacts a WHERE {where}", params).fetchone()[0]
+
+    # Metadata of artifacts added after `after_id`, oldest first (for incremental indexes)
+    def since(self, after_id=0):
+        rows = self._connect().execute(
+            f"SELECT {', '.join(ARTIFACT_FIELDS)} FROM artifacts WHERE id > ? ORDER BY id", (after_id,)
+        ).fetchall()
+        return [self._row(row) for row in rows]
+
+    # Distinct course names visible to an owner, alphabetical
+    def courses(self, owner=None):
+        rows = self._connect().execute(
+            "SELECT DISTINCT course FROM artifacts WHERE owner IN (?, '') ORDER BY course", (owner or "",)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    # Remove one of the owner's artifacts; the content file goes when nothing else uses it
+    def delete(self, artifact_id, owner=None):
+        conn = self._connect()
+        with conn:
+            row = conn.execute("SELECT content_hash FROM artifacts WHERE id = ? AND owner = ?", (artifact_id, owner or "")).fetchone()
+            if row is None:
+                return False
+            conn.execute("DELETE FROM artifacts WHERE id = ?", (artifact_id,))
+            conn.execute("DELETE FROM artifacts_fts WHERE rowid = ?", (artifact_id,))
+            still_used = conn.execute("SELECT 1 FROM artifacts WHERE content_hash = ? LIMIT 1", (row["content_hash"],)).fetchone()
+        if not still_used:
+            try:
+                os.remove(self._object_path(row["content_hash"]))
+            except FileNotFoundError:
+                pass
+        return True
+
+    # One-time import of the .docx files the old exporter left in app/memory, as shared
+    # artifacts ("<course>_<type>.docx"); the files themselves are left in place
+    def import_legacy_files(self, folder):
+        conn = self._connect()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'imported_legacy'").fetchone():
+            return 0
+        imported = 0
+        if os.path.isdir(folder):
+            import docx
+
+            for name in sorted(os.listdir(folder)):
+                stem, ext = os.path.splitext(name)
+                artifact_type = next((t for t in ARTIFACT_TYPES if stem.endswith("_" + t)), None)
+                if ext.lower() != ".docx" or artifact_type is None:
+                    continue
+                path = os.path.join(folder, name)
+                try:
+                    paragraphs = [p.text.strip() for p in docx.Document(path).paragraphs]
+                except Exception:
+                    continue  # unreadable file; nothing to import
+                title = next((text for text in paragraphs if text), stem)
+                body = [text for text in paragraphs[paragraphs.index(title) + 1:] if not _LEGACY_BOILERPLATE.match(text)] if title in paragraphs else paragraphs
+                course = stem[:-len(artifact_type) - 1].replace("_", " ").strip() or stem
+                created_at = datetime.datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec="seconds")
+                self.save(artifact_type, "\n".join(body).strip(), course, title=title,
+                          params={"imported_from": name}, created_at=created_at)
+                imported += 1
+        with conn:
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('imported_legacy', ?)", (str(imported),))
+        return imported
+
+
+# Shared store used by the generator tabs and the Artifact Library
+artifact_store = ArtifactStore()
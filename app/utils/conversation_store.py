@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import datetime
+import threading
+from dotenv import load_dotenv
+
+# SQLite-backed AI Co-Pilot conversations, one active conversation per user, so a chat
+# survives logout and restarts. Each turn (question + reply) is one row with its token
+# count; a conversation row holds the rolling summary of its older turns and the id of the
+# last turn folded into it. "Clear Chat" archives the conversation and starts a new one.
+
+load_dotenv()
+CONVERSATION_DB_PATH = os.getenv("CONVERSATION_DB_PATH", "app/memory/conversations.db")
+
+TURN_FIELDS = ("id", "user", "ai", "time", "tokens", "prompt_tokens", "full_history_tokens")
+
+
+class ConversationStore:
+    def __init__(self, path=CONVERSATION_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS conversations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    owner TEXT NOT NULL,
+                    started_at TEXT NOT NULL,
+                    summary TEXT NOT NULL DEFAULT '',
+                    summarized_through INTEGER NOT NULL DEFAULT 0,
+                    archived INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_conversations_owner ON conversations(owner, archived);
+                CREATE TABLE IF NOT EXISTS turns (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    conversation_id INTEGER NOT NULL REFERENCES conversations(id),
+                    user TEXT NOT NULL,
+                    ai TEXT NOT NULL,
+                    time TEXT NOT NULL,
+                    tokens INTEGER NOT NULL,
+                    prompt_tokens INTEGER,
+                    full_history_tokens INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS idx_turns_conversation ON turns(conversation_id, id);
+                """
+            )
+
+    # One connection per thread (Streamlit runs each session on its own thread)
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    # Id of the owner's current conversation, starting one if needed
+    def active_conversation(self, owner):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT id FROM conversations WHERE owner = ? AND archived = 0 ORDER BY id DESC LIMIT 1", (owner or "",)
+        ).fetchone()
+        if row is not None:
+            return row["id"]
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO conversations (owner, started_at) VALUES (?, ?)",
+                (owner or "", datetime.datetime.now().isoformat())
+            )
+        return cursor.lastrowid
+
+    def archive(self, conversation_id):
+        with self._connect() as conn:
+            conn.execute("UPDATE conversations SET archived = 1 WHERE id = ?", (conversation_id,))
+
+    def add_turn(self, conversation_id, user, ai, tokens, prompt_tokens=None, full_history_tokens=None, time=None):
+        time = time or datetime.datetime.now().isoformat()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO turns (conversation_id, user, ai, time, tokens, prompt_tokens, full_history_tokens) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (conversation_id, user, ai, time, tokens, prompt_tokens, full_history_tokens)
+            )
+        return dict(zip(TURN_FIELDS, (cursor.lastrowid, user, ai, time, tokens, prompt_tokens, full_history_tokens)))
+
+    # Turns after `after_id`, oldest first
+    def turns(self, conversation_id, after_id=0):
+        rows = self._connect().execute(
+            f"SELECT {', '.join(TURN_FIELDS)} FROM turns WHERE conversation_id = ? AND id > ? ORDER BY id",
+            (conversation_id, after_id)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    # Up to `limit` turns before `before_id` (default: the latest), oldest first
+    def latest_turns(self, conversation_id, limit, before_id=None):
+        rows = self._connect().execute(
+            f"SELECT {', '.join(TURN_FIELDS)} FROM turns WHERE conversation_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+            (conversation_id, before_id if before_id is not None else 2 ** 62, limit)
+        ).fetchall()
+        return [dict(row) for row in reversed(rows)]
+
+    # Sum of the turns' token counts (what sending the whole history verbatim would cost)
+    def history_tokens(self, conversation_id):
+        return self._connect().execute(
+            "SELECT COALESCE(SUM(tokens), 0) FROM turns WHERE conversation_id = ?", (conversation_id,)
+        ).fetchone()[0]
+
+    # (summary, id of the last turn folded into it)
+    def summary(self, conversation_id):
+        row = self._connect().execute(
+            "SELECT summary, summarized_through FROM conversations WHERE id = ?", (conversation_id,)
+        ).fetchone()
+        return (row["summary"], row["summarized_through"]) if row else ("", 0)
+
+    def set_summary(self, conversation_id, summary, summarized_through):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE conversations SET summary = ?, summarized_through = ? WHERE id = ?",
+                (summary, summarized_through, conversation_id)
+            )
+
+
+# Shared store used by the Co-Pilot
+conversation_store = ConversationStore()
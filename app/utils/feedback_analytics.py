@@ -0,0 +1,287 @@
+import io
+import os
+import json
+import threading
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from app.agents.llm_client import EMBEDDING_MODEL
+from app.utils.feedback_store import feedback_store
+
+# Aggregate insights over the feedback log: per-course weekly rating trends (rolling
+# averages and week-over-week deltas) and clusters of recurring "what needs improvement"
+# complaints.
+#
+# Entries are held as NumPy columns and only rows appended since the last refresh are read
+# from SQLite (as one concatenated string per column, parsed by NumPy), so a rerun costs one
+# indexed query plus a vectorized group-by. Complaints are embedded once each and assigned
+# to clusters incrementally; results are memoized until the log grows again.
+#
+# The log is append-only, so the columns and clusters are also saved as a snapshot in the
+# feedback database every SNAPSHOT_ROWS new entries. A new process loads the snapshot and
+# reads only the entries after it, instead of re-reading the whole log and re-embedding
+# every complaint.
+
+load_dotenv()
+ANALYTICS_ROLLING_WEEKS = int(os.getenv("ANALYTICS_ROLLING_WEEKS", "4"))
+COMPLAINT_SIMILARITY = float(os.getenv("COMPLAINT_SIMILARITY", "0.6"))  # cosine similarity to join a cluster
+EMBED_BATCH_SIZE = 256
+SNAPSHOT_ROWS = 1000  # entries (or clustered complaints) added before the snapshot is rewritten
+SNAPSHOT_NAME = "feedback_analytics"
+
+
+# Sentence-transformer embeddings, unit-normalized so a dot product is cosine similarity
+def embed_texts(texts: list) -> np.ndarray:
+    from app.agents.llm_client import get_embedding_model
+    return np.asarray(
+        get_embedding_model().encode(texts, batch_size=EMBED_BATCH_SIZE, normalize_embeddings=True),
+        dtype=np.float32
+    )
+
+# Monday-based week number since the epoch (1970-01-01 was a Thursday)
+def week_index(days_since_epoch: np.ndarray) -> np.ndarray:
+    return (days_since_epoch + 3) // 7
+
+def week_start(week: np.ndarray) -> np.ndarray:
+    return (week * 7 - 3).astype("datetime64[D]")
+
+
+class FeedbackAnalytics:
+    # embedder names embed_fn's model; saved clusters are reused only with the same one
+    def __init__(self, store=feedback_store, embed_fn=embed_texts, similarity=COMPLAINT_SIMILARITY,
+                 embedder=EMBEDDING_MODEL):
+        self.store = store
+        self.embed_fn = embed_fn
+        self.similarity = similarity
+        self.embedder = embedder
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self._results = {}
+        self._snapshot_loaded = False
+        self._snapshot_id, self._snapshot_clustered_id = 0, 0
+
+        # Column store, one element per entry
+        self._ids = np.empty(0, dtype=np.int64)
+        self._course_codes = np.empty(0, dtype=np.int32)
+        self._days = np.empty(0, dtype=np.int64)
+        self._ratings = np.empty(0, dtype=np.float32)  # NaN when not rated
+        self._course_names = []  # code -> display name (first spelling seen)
+        self._course_lookup = {}  # lower-cased name -> code
+
+        # Complaints of entries up to this id have been clustered
+        self._clustered_id = 0
+        # Leader clustering state: unit-norm centroids plus per-cluster members
+        self._centroids = np.empty((0, 0), dtype=np.float32)
+        self._cluster_sizes = []
+        self._cluster_leaders = []  # text of the complaint that opened each cluster
+        self._cluster_members = []  # entry positions
+
+    def _course_code(self, course: str) -> int:
+        key = course.strip().lower()
+        code = self._course_lookup.get(key)
+        if code is None:
+            code = self._course_lookup[key] = len(self._course_names)
+            self._course_names.append(course.strip())
+        return code
+
+    # Pull entries appended since the last refresh; returns how many were added
+    def refresh(self) -> int:
+        with self._lock:
+            if not self._snapshot_loaded:
+                self._load_snapshot()
+            count, ids, days, ratings, courses = self.store.analytics_columns_since(self._last_id)
+            if not count:
+                return 0
+            # Course names are few: factorize them, then map each distinct spelling to its code
+            local_codes, names = pd.factorize(np.array(courses.split("\x1f"), dtype=object))
+            codes = np.array([self._course_code(name) for name in names], dtype=np.int32)[local_codes]
+            ratings = np.fromstring(ratings, dtype=np.float32, sep=",")
+            ratings[ratings < 0] = np.nan
+
+            self._ids = np.concatenate([self._ids, np.fromstring(ids, dtype=np.int64, sep=",")])
+            self._course_codes = np.concatenate([self._course_codes, codes])
+            self._days = np.concatenate([self._days, np.fromstring(days, dtype=np.int64, sep=",")])
+            self._ratings = np.concatenate([self._ratings, ratings])
+            self._last_id = int(self._ids[-1])
+            self._results.clear()
+            if self._last_id - self._snapshot_id >= SNAPSHOT_ROWS:
+                self._save_snapshot()
+            return count
+
+    # Restore the columns (and, for the same embedder and threshold, the clusters) saved by an
+    # earlier process. Caller holds the lock.
+    def _load_snapshot(self):
+        self._snapshot_loaded = True
+        saved = self.store.load_analytics_snapshot(SNAPSHOT_NAME)
+        if saved is None:
+            return
+        arrays = np.load(io.BytesIO(saved[1]), allow_pickle=False)
+        meta = json.loads(str(arrays["meta"]))
+        self._ids, self._course_codes = arrays["ids"], arrays["course_codes"]
+        self._days, self._ratings = arrays["days"], arrays["ratings"]
+        for name in meta["course_names"]:
+            self._course_code(name)
+        self._last_id = self._snapshot_id = saved[0]
+        if meta["clustered_id"] and (meta["embedder"], meta["similarity"]) == (self.embedder, self.similarity):
+            self._centroids = arrays["centroids"]
+            self._cluster_sizes = arrays["cluster_sizes"].tolist()
+            self._cluster_leaders = meta["cluster_leaders"]
+            bounds = np.cumsum(self._cluster_sizes)[:-1]
+            self._cluster_members = [
+                members.tolist() for members in np.split(arrays["cluster_members"], bounds)
+            ] if self._cluster_sizes else []
+            self._clustered_id = self._snapshot_clustered_id = meta["clustered_id"]
+
+    # Caller holds the lock
+    def _save_snapshot(self):
+        members = [m for cluster in self._cluster_members for m in cluster]
+        meta = {
+            "course_names": self._course_names,
+            "clustered_id": self._clustered_id,
+            "embedder": self.embedder,
+            "similarity": self.similarity,
+            "cluster_leaders": self._cluster_leaders,
+        }
+        buffer = io.BytesIO()
+        np.savez(
+            buffer, ids=self._ids, course_codes=self._course_codes, days=self._days, ratings=self._ratings,
+            centroids=self._centroids, cluster_sizes=np.array(self._cluster_sizes, dtype=np.int64),
+            cluster_members=np.array(members, dtype=np.int64), meta=np.array(json.dumps(meta))
+        )
+        self.store.save_analytics_snapshot(SNAPSHOT_NAME, self._last_id, buffer.getvalue())
+        self._snapshot_id, self._snapshot_clustered_id = self._last_id, self._clustered_id
+
+    def __len__(self):
+        return len(self._ids)
+
+    def courses(self) -> list:
+        return list(self._course_names)
+
+    # Memoize a result until the next refresh that finds new entries
+    def _memoized(self, key, compute):
+        with self._lock:
+            if key not in self._results:
+                self._results[key] = compute()
+            return self._results[key]
+
+    # One row per (course, week) with entries logged, average rating, rolling average
+    # over the last `window` logged weeks and the change from the previous calendar week
+    def rating_trends(self, window: int = ANALYTICS_ROLLING_WEEKS) -> pd.DataFrame:
+        self.refresh()
+        return self._memoized(("trends", window), lambda: self._rating_trends(window))
+
+    def _rating_trends(self, window: int) -> pd.DataFrame:
+        columns = ["course", "week_start", "entries", "avg_rating", "rolling_avg", "wow_delta"]
+        if not len(self._ids):
+            return pd.DataFrame(columns=columns)
+
+        weeks = week_index(self._days)
+        first_week = weeks.min()
+        span = int(weeks.max() - first_week) + 1
+        # Single integer key per (course, week), sorted by course then week
+        keys, groups = np.unique(self._course_codes.astype(np.int64) * span + (weeks - first_week), return_inverse=True)
+        entries = np.bincount(groups, minlength=len(keys))
+        rated = ~np.isnan(self._ratings)
+        rating_sums = np.bincount(groups[rated], weights=self._ratings[rated], minlength=len(keys))
+        rating_counts = np.bincount(groups[rated], minlength=len(keys))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            averages = rating_sums / rating_counts
+
+        course_codes = keys // span
+        group_weeks = keys % span + first_week
+        # Week-over-week change only when the previous row is the same course, one week earlier
+        wow_delta = np.full(len(keys), np.nan)
+        consecutive = (course_codes[1:] == course_codes[:-1]) & (group_weeks[1:] == group_weeks[:-1] + 1)
+        wow_delta[1:][consecutive] = (averages[1:] - averages[:-1])[consecutive]
+
+        trends = pd.DataFrame({
+            "course": np.array(self._course_names, dtype=object)[course_codes],
+            "week_start": week_start(group_weeks),
+            "entries": entries,
+            "avg_rating": averages,
+            "wow_delta": wow_delta,
+        })
+        trends["rolling_avg"] = (
+            trends.groupby(course_codes, sort=False)["avg_rating"]
+            .rolling(window, min_periods=1).mean()
+            .reset_index(level=0, drop=True)
+        )
+        return trends[columns]
+
+    # Latest week per course, for a compact summary table
+    def course_summary(self, window: int = ANALYTICS_ROLLING_WEEKS) -> pd.DataFrame:
+        trends = self.rating_trends(window)
+        if trends.empty:
+            return trends
+        latest = trends.groupby("course", sort=False).tail(1)
+        totals = trends.groupby("course", sort=False)["entries"].sum()
+        return latest.assign(total_entries=latest["course"].map(totals)).sort_values("course").reset_index(drop=True)
+
+    # Embed complaints logged since the last call and fold them into the clusters
+    def _update_clusters(self):
+        rows = self.store.complaints_between(self._clustered_id, self._last_id)
+        self._clustered_id = self._last_id
+        positions = np.searchsorted(self._ids, [entry_id for entry_id, _ in rows]).tolist()
+        pending = [(position, text.strip()) for position, (_, text) in zip(positions, rows)]
+        for batch_start in range(0, len(pending), EMBED_BATCH_SIZE):
+            batch = pending[batch_start:batch_start + EMBED_BATCH_SIZE]
+            vectors = self.embed_fn([text for _, text in batch])
+            if not self._centroids.size:
+                self._centroids = np.empty((0, vectors.shape[1]), dtype=np.float32)
+            for (position, text), vector in zip(batch, vectors):
+                self._assign(position, text, vector)
+
+    def _assign(self, position: int, text: str, vector: np.ndarray):
+        if len(self._centroids):
+            similarities = self._centroids @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.similarity:
+                # Running mean of the members, kept unit-norm
+                size = self._cluster_sizes[best]
+                centroid = self._centroids[best] * size + vector
+                self._centroids[best] = centroid / (np.linalg.norm(centroid) or 1.0)
+                self._cluster_sizes[best] = size + 1
+                self._cluster_members[best].append(position)
+                return
+        self._centroids = np.vstack([self._centroids, vector[None, :]])
+        self._cluster_sizes.append(1)
+        self._cluster_leaders.append(text)
+        self._cluster_members.append([position])
+
+    # Clusters with at least `min_size` complaints, largest first
+    def recurring_complaints(self, min_size: int = 2, course: str = None, limit: int = 10) -> pd.DataFrame:
+        self.refresh()
+        with self._lock:
+            if self._clustered_id < self._last_id:
+                self._update_clusters()
+                self._results = {k: v for k, v in self._results.items() if k[0] != "complaints"}
+                if self._clustered_id - self._snapshot_clustered_id >= SNAPSHOT_ROWS:
+                    self._save_snapshot()
+        return self._memoized(("complaints", min_size, course, limit), lambda: self._recurring_complaints(min_size, course, limit))
+
+    def _recurring_complaints(self, min_size: int, course: str, limit: int) -> pd.DataFrame:
+        code = self._course_lookup.get(course.strip().lower()) if course else None
+        if course and code is None:
+            return pd.DataFrame(columns=["example", "mentions", "courses", "first_seen", "last_seen"])
+        rows = []
+        for leader, members in zip(self._cluster_leaders, self._cluster_members):
+            members = np.asarray(members)
+            if code is not None:
+                members = members[self._course_codes[members] == code]
+            if len(members) < min_size:
+                continue
+            codes, counts = np.unique(self._course_codes[members], return_counts=True)
+            days = self._days[members].astype("datetime64[D]")
+            rows.append({
+                "example": leader,
+                "mentions": len(members),
+                "courses": ", ".join(self._course_names[c] for c in codes[np.argsort(-counts)]),
+                "first_seen": days.min(),
+                "last_seen": days.max(),
+            })
+        rows.sort(key=lambda row: row["mentions"], reverse=True)
+        return pd.DataFrame(rows[:limit], columns=["example", "mentions", "courses", "first_seen", "last_seen"])
+
+
+# Shared analytics over the Feedback Tracker's store
+feedback_analytics = FeedbackAnalytics()
@@ -0,0 +1,173 @@
+import os
+import json
+import sqlite3
+import datetime
+import threading
+from dotenv import load_dotenv
+
+# SQLite-backed feedback log. Each reflection is a single INSERT (atomic and safe with
+# concurrent sessions), and history reads are indexed, paginated queries instead of
+# re-parsing one ever-growing JSON file on every rerun.
+
+load_dotenv()
+FEEDBACK_DB_PATH = os.getenv("FEEDBACK_DB_PATH", "app/memory/feedback.db")
+LEGACY_FEEDBACK_LOG = "app/memory/feedback_log.json"
+
+FEEDBACK_FIELDS = ("course", "timestamp", "what_worked", "what_did_not", "gemini_suggestion", "rating")
+
+
+class FeedbackStore:
+    def __init__(self, path=FEEDBACK_DB_PATH, legacy_json_path=LEGACY_FEEDBACK_LOG):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS feedback (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    course TEXT NOT NULL COLLATE NOCASE,
+                    timestamp TEXT NOT NULL,
+                    what_worked TEXT,
+                    what_did_not TEXT,
+                    gemini_suggestion TEXT,
+                    rating INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS idx_feedback_course_timestamp ON feedback(course, timestamp);
+                CREATE INDEX IF NOT EXISTS idx_feedback_timestamp ON feedback(timestamp);
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+                CREATE TABLE IF NOT EXISTS analytics_snapshot (name TEXT PRIMARY KEY, last_id INTEGER NOT NULL, data BLOB NOT NULL);
+                """
+            )
+        if legacy_json_path:
+            self.migrate_from_json(legacy_json_path)
+
+    # One connection per thread (Streamlit runs each session on its own thread)
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    # One-time import of the old feedback_log.json, recorded in the meta table
+    def migrate_from_json(self, json_path):
+        conn = self._connect()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_json'").fetchone():
+            return 0
+        entries = []
+        if os.path.exists(json_path):
+            with open(json_path, "r") as f:
+                try:
+                    entries = json.load(f)
+                except json.JSONDecodeError:
+                    entries = []
+        with conn:
+            # Take the write lock first so two starting processes cannot both import
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_json'").fetchone():
+                return 0
+            conn.executemany(
+                f"INSERT INTO feedback ({', '.join(FEEDBACK_FIELDS)}) VALUES ({', '.join('?' * len(FEEDBACK_FIELDS))})",
+                [tuple(entry.get(field) for field in FEEDBACK_FIELDS) for entry in entries]
+            )
+            conn.execute("INSERT INTO meta (key, value) VALUES ('migrated_json', ?)", (json_path,))
+        return len(entries)
+
+    # Append one entry; returns its id
+    def append(self, course, what_worked, what_did_not, gemini_suggestion, rating=None, timestamp=None):
+        timestamp = timestamp or datetime.datetime.now().isoformat()
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                f"INSERT INTO feedback ({', '.join(FEEDBACK_FIELDS)}) VALUES ({', '.join('?' * len(FEEDBACK_FIELDS))})",
+                (course, timestamp, what_worked, what_did_not, gemini_suggestion, rating)
+            )
+        return cursor.lastrowid
+
+    # WHERE clause for the optional course / date-range filters (start/end are ISO strings)
+    @staticmethod
+    def _filters(course=None, start=None, end=None):
+        clauses, params = [], []
+        if course:
+            clauses.append("course = ?")
+            params.append(course)
+        if start:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end:
+            clauses.append("timestamp < ?")
+            params.append(end)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    # Newest-first page of full entries
+    def query(self, course=None, start=None, end=None, limit=20, offset=0):
+        where, params = self._filters(course, start, end)
+        rows = self._connect().execute(
+            f"SELECT * FROM feedback{where} ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?",
+            params + [limit if limit is not None else -1, offset]
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    # Newest-first page of summary rows only (no free-text fields), for list views
+    def query_summaries(self, course=None, start=None, end=None, limit=20, offset=0):
+        where, params = self._filters(course, start, end)
+        rows = self._connect().execute(
+            f"SELECT id, course, timestamp, rating FROM feedback{where} ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    # Full entry by id, or None
+    def get(self, entry_id):
+        row = self._connect().execute("SELECT * FROM feedback WHERE id = ?", (entry_id,)).fetchone()
+        return dict(row) if row else None
+
+    # Distinct course names, alphabetical
+    def courses(self):
+        rows = self._connect().execute("SELECT DISTINCT course FROM feedback ORDER BY course").fetchall()
+        return [row[0] for row in rows]
+
+    # Entries appended after `after_id`, oldest first, as the columns analytics needs. Each
+    # column is concatenated in SQL, so no Python object is built per entry: returns (count,
+    # ids, days since the epoch, ratings with -1 for unrated) as comma-separated text and the
+    # trimmed course names joined by \x1f.
+    def analytics_columns_since(self, after_id=0):
+        return tuple(self._connect().execute(
+            """
+            SELECT COUNT(*), group_concat(id),
+                   group_concat(IFNULL(CAST(julianday(substr(timestamp, 1, 10)) - 2440587.5 AS INTEGER), 0)),
+                   group_concat(IFNULL(rating, -1)), group_concat(trim(course), char(31))
+            FROM (SELECT id, course, timestamp, rating FROM feedback WHERE id > ? ORDER BY id)
+            """,
+            (after_id,)
+        ).fetchone())
+
+    # Non-empty "what needs improvement" notes with after_id < id <= up_to_id, oldest first
+    def complaints_between(self, after_id, up_to_id):
+        return self._connect().execute(
+            "SELECT id, what_did_not FROM feedback WHERE id > ? AND id <= ? AND trim(what_did_not) != '' ORDER BY id",
+            (after_id, up_to_id)
+        ).fetchall()
+
+    # Saved analytics state (covering entries up to last_id): (last_id, bytes) or None
+    def load_analytics_snapshot(self, name):
+        row = self._connect().execute("SELECT last_id, data FROM analytics_snapshot WHERE name = ?", (name,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def save_analytics_snapshot(self, name, last_id, data):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analytics_snapshot (name, last_id, data) VALUES (?, ?, ?)",
+                (name, last_id, sqlite3.Binary(data))
+            )
+
+    def count(self, course=None, start=None, end=None):
+        where, params = self._filters(course, start, end)
+        return self._connect().execute(f"SELECT COUNT(*) FROM feedback{where}", params).fetchone()[0]
+
+
+# Shared store used by the Feedback Tracker
+feedback_store = FeedbackStore()
@@ -1,22 +1,248 @@
+import io
 import os
+import re
+import hashlib
 import datetime
+import zipfile
 from docx import Document
+from docx.shared import Pt
 from app.utils.watermark import get_watermark_text
+from app.utils.response_cache import LRUCache
+
+# Word export. Documents are rendered in memory and returned as bytes (ready for
+# st.download_button), with Gemini's markdown turned into real headings, lists, tables and
+# bold/italic runs. Rendered bytes are cached per content hash, so the download buttons that
+# Streamlit re-creates on every rerun cost nothing after the first render; writing to disk
+# is opt-in (persist=True).
+
+EXPORT_CACHE_SIZE = 64  # rendered documents kept in memory
+
+_rendered = LRUCache(EXPORT_CACHE_SIZE)
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*$")
+_BULLET = re.compile(r"^(\s*)[-*+•]\s+(.*)$")
+_NUMBERED = re.compile(r"^(\s*)(\d+)[.)]\s+(.*)$")
+_RULE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+_TABLE_SEPARATOR = re.compile(r"^\s*\|?\s*:?-{2,}:?\s*(\|\s*:?-{2,}:?\s*)*\|?\s*$")
+# Underscore emphasis only at word boundaries (as in CommonMark), so snake_case is left alone
+_INLINE = re.compile(r"(\*\*.+?\*\*|(?<!\w)__.+?__(?!\w)|\*[^*\s][^*]*?\*|(?<!\w)_[^_\s][^_]*?_(?!\w)|`[^`]+`)")
+
+
+# Add text to a paragraph, turning **bold**, *italic* and `code` into formatted runs
+def _add_inline(paragraph, text):
+    for part in _INLINE.split(text):
+        if not part:
+            continue
+        if part.startswith(("**", "__")) and len(part) > 4:
+            paragraph.add_run(part[2:-2]).bold = True
+        elif part.startswith("`"):
+            run = paragraph.add_run(part[1:-1])
+            run.font.name = "Consolas"
+        elif part[0] in "*_" and part[-1] == part[0] and len(part) > 2:
+            paragraph.add_run(part[1:-1]).italic = True
+        else:
+            paragraph.add_run(part)
+
+def _table_cells(line):
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+def _add_table(doc, rows):
+    columns = max(len(row) for row in rows)
+    table = doc.add_table(rows=len(rows), cols=columns)
+    table.style = "Table Grid"
+    for r, (row, cells) in enumerate(zip(rows, (table_row.cells for table_row in table.rows))):
+        for c, cell in enumerate(cells):
+            paragraph = cell.paragraphs[0]
+            _add_inline(paragraph, row[c] if c < len(row) else "")
+            if r == 0 and len(rows) > 1:
+                for run in paragraph.runs:
+                    run.bold = True
+    return table
+
+# List nesting depth for an item's indent (python-docx's template has three levels)
+def _list_level(indent):
+    return min(3, 1 + len(indent.expandtabs(4)) // 2)
+
+def _list_style(kind, level):
+    return f"List {kind}" + (f" {level}" if level > 1 else "")
+
+# A new numbering instance for a numbered list style, starting at `start`. Paragraphs of the
+# style otherwise share the style's single instance, so each list would carry on counting
+# from the previous one.
+def _new_numbering(doc, style_name, start):
+    numbering = doc.part.numbering_part.numbering_definitions._numbering
+    style_num = numbering.num_having_numId(doc.styles[style_name].element.pPr.numPr.numId.val)
+    num = numbering.add_num(style_num.abstractNumId.val)
+    num.add_lvlOverride(ilvl=0).add_startOverride(start)
+    return num.numId
+
+# Paragraph with a named style. python-docx resolves style names by scanning every style in
+# the document on each call (most of the render time for long documents), so ids are looked
+# up once per document and set directly.
+def _styled_paragraph(doc, style_ids, name=None):
+    paragraph = doc.add_paragraph()
+    if name:
+        if name not in style_ids:
+            style_ids[name] = doc.styles[name].style_id
+        paragraph._p.style = style_ids[name]
+    return paragraph
+
+# Convert markdown (as produced by Gemini) into document blocks. Lines of a paragraph keep
+# their line breaks (MCQ options, "Answer:" lines). Each numbered list gets its own numbering
+# starting at its first item's number, so a list resumed after other text keeps its count.
+def add_markdown(doc, markdown):
+    style_ids = {}
+    lists = {}  # level -> numbering id of the numbered list open at that level
+    lines = markdown.splitlines()
+    i, paragraph_lines = 0, []
+    # The document title is level 1, so the content's top heading level maps to level 2
+    levels = [len(match.group(1)) for match in map(_HEADING.match, (line.strip() for line in lines)) if match]
+    top_level = min(levels, default=1)
+
+    def flush_paragraph():
+        if paragraph_lines:
+            paragraph = _styled_paragraph(doc, style_ids)
+            for n, paragraph_line in enumerate(paragraph_lines):
+                if n:
+                    paragraph.add_run().add_break()
+                _add_inline(paragraph, paragraph_line)
+            paragraph_lines.clear()
+
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+        if stripped and not (_BULLET.match(line) or _NUMBERED.match(line)):
+            lists.clear()
+
+        if stripped.startswith("```"):
+            flush_paragraph()
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith("```"):
+                run = _styled_paragraph(doc, style_ids).add_run(lines[i])
+                run.font.name = "Consolas"
+                run.font.size = Pt(9)
+                i += 1
+        elif not stripped:
+            flush_paragraph()
+        elif _HEADING.match(stripped):
+            flush_paragraph()
+            hashes, text = _HEADING.match(stripped).groups()
+            heading = _styled_paragraph(doc, style_ids, f"Heading {min(9, len(hashes) - top_level + 2)}")
+            _add_inline(heading, text.strip("*"))
+        elif _RULE.match(stripped):
+            flush_paragraph()
+            _styled_paragraph(doc, style_ids).add_run("―" * 20)
+        elif stripped.startswith("|") and i + 1 < len(lines) and _TABLE_SEPARATOR.match(lines[i + 1]):
+            flush_paragraph()
+            rows = [_table_cells(line)]
+            i += 2
+            while i < len(lines) and lines[i].strip().startswith("|"):
+                rows.append(_table_cells(lines[i]))
+                i += 1
+            _add_table(doc, rows)
+            continue
+        elif _BULLET.match(line):
+            flush_paragraph()
+            indent, text = _BULLET.match(line).groups()
+            level = _list_level(indent)
+            for deeper in [key for key in lists if key >= level]:
+                del lists[deeper]
+            _add_inline(_styled_paragraph(doc, style_ids, _list_style("Bullet", level)), text)
+        elif _NUMBERED.match(line):
+            flush_paragraph()
+            indent, number, text = _NUMBERED.match(line).groups()
+            level = _list_level(indent)
+            for deeper in [key for key in lists if key > level]:
+                del lists[deeper]
+            style = _list_style("Number", level)
+            if level not in lists:
+                lists[level] = _new_numbering(doc, style, int(number))
+            paragraph = _styled_paragraph(doc, style_ids, style)
+            paragraph._p.get_or_add_pPr().get_or_add_numPr().get_or_add_numId().val = lists[level]
+            _add_inline(paragraph, text)
+        elif stripped.startswith(">"):
+            flush_paragraph()
+            _add_inline(_styled_paragraph(doc, style_ids, "Quote"), stripped.lstrip("> "))
+        else:
+            paragraph_lines.append(stripped)
+        i += 1
+    flush_paragraph()
+
+def _content_key(title, content, subheading):
+    return hashlib.sha256("\x1f".join((title, subheading or "", content)).encode("utf-8")).hexdigest()
+
+# Render a document to .docx bytes (cached per title/subheading/content)
+def render_docx(title: str, content: str, subheading: str = None) -> bytes:
+    key = _content_key(title, content, subheading)
+    data = _rendered.get(key)
+    if data is not None:
+        return data
 
-def export_to_docx(title: str, content: str, filename: str, subheading: str = None, folder="app/memory"):
     doc = Document()
     doc.add_heading(title, level=1)
-
     if subheading:
         doc.add_heading(subheading, level=2)
-
     doc.add_paragraph(f"Generated on: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    doc.add_paragraph("\n" + content)
-    doc.add_paragraph("\n---\n" + get_watermark_text())
+    add_markdown(doc, content)
+    doc.add_paragraph("―" * 20)
+    doc.add_paragraph(get_watermark_text())
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    data = buffer.getvalue()
+    _rendered.put(key, data)
+    return data
+
+# Render a generated artifact as .docx bytes for st.download_button. With persist=True a
+# copy is also written to folder/filename (for batch jobs and the CLI).
+def export_to_docx(title: str, content: str, filename: str, subheading: str = None, folder="app/memory",
+                   persist: bool = False) -> bytes:
+    data = render_docx(title, content, subheading)
+    if persist:
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, filename), "wb") as f:
+            f.write(data)
+    return data
+
+
+# File-like sink for ZipFile that hands written bytes back to a generator
+class _ZipStream(io.RawIOBase):
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
 
-    # Ensure memory folder exists
-    os.makedirs(folder, exist_ok=True)
+# Stream a ZIP of (filename, bytes) pairs piece by piece, without building it all in memory.
+# .docx files are already compressed, so they are stored as-is.
+def iter_zip(files):
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_STORED) as archive:
+        for filename, data in files:
+            archive.writestr(filename, data)
+            yield stream.drain()
+    yield stream.drain()
 
-    full_path = os.path.join(folder, filename)
-    doc.save(full_path)
-    return full_path
\ No newline at end of file
+# ZIP of many artifacts ({"title", "content", "filename", "subheading"?}) as bytes; names
+# that repeat get a numeric suffix instead of overwriting each other
+def export_zip(artifacts) -> bytes:
+    def files():
+        seen = set()
+        for artifact in artifacts:
+            name, ext = os.path.splitext(artifact["filename"])
+            filename, n = artifact["filename"], 1
+            while filename in seen:
+                n += 1
+                filename = f"{name}_{n}{ext}"
+            seen.add(filename)
+            yield filename, render_docx(artifact["title"], artifact["content"], artifact.get("subheading"))
+    return b"".join(iter_zip(files()))
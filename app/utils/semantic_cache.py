@@ -0,0 +1,227 @@
+import os
+import json
+import sqlite3
+import threading
+import time
+import numpy as np
+from dotenv import load_dotenv
+from app.utils.artifact_store import artifact_store, ARTIFACT_STORE_DIR, SYLLABUS, LESSON_PLAN, ASSESSMENT, RESOURCES
+
+# Semantic reuse of past generations. Before a generator calls Gemini, the request is
+# compared with the requests behind earlier artifacts of the same type: "fundamental of java"
+# and "Java programming language" describe the same course, which the exact response cache
+# cannot see. A request has topic fields (course, unit, subject), optional detail fields
+# (objectives, outcomes) and exact fields (weeks, level, question type...) that must match;
+# the score is a weighted cosine similarity of the topic and detail embeddings.
+#
+# Requests are embedded once with the RAG sentence-transformer (all-MiniLM-L6-v2) and kept
+# in SQLite next to the artifact store, so only artifacts saved since the last lookup are
+# embedded; scoring a lookup is one matrix-vector product per field group.
+
+load_dotenv()
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "1") == "1"
+SEMANTIC_CACHE_DB = os.path.join(ARTIFACT_STORE_DIR, "request_index.db")
+SEMANTIC_TOPIC_WEIGHT = float(os.getenv("SEMANTIC_TOPIC_WEIGHT", "0.7"))  # share of the score from the topic fields
+ANY_SETTINGS = "*"  # exact-field key of artifacts whose settings are unknown (imported files)
+
+# type -> (topic fields, detail fields, fields that must match exactly)
+REQUEST_FIELDS = {
+    SYLLABUS: (("course_name",), ("objectives",), ("duration_weeks",)),
+    LESSON_PLAN: (("course_name",), ("target_outcomes",), ("class_duration", "difficulty", "num_weeks")),
+    ASSESSMENT: (("course_name", "unit_name"), (), ("num_questions", "question_type", "bloom_level")),
+    RESOURCES: (("subject",), (), ("difficulty", "format_types")),
+}
+
+# Minimum score to offer a past artifact, per type (SEMANTIC_CACHE_THRESHOLD_<TYPE> in .env).
+# Question banks are unit-specific, so they need a closer match.
+SEMANTIC_CACHE_THRESHOLDS = {
+    artifact_type: float(os.getenv(f"SEMANTIC_CACHE_THRESHOLD_{artifact_type.upper()}", default))
+    for artifact_type, default in ((SYLLABUS, "0.8"), (LESSON_PLAN, "0.8"), (ASSESSMENT, "0.85"), (RESOURCES, "0.8"))
+}
+
+
+# Sentence-transformer embeddings, unit-normalized so a dot product is cosine similarity
+def embed_texts(texts: list) -> np.ndarray:
+    from app.agents.llm_client import get_embedding_model
+    return np.asarray(get_embedding_model().encode(texts, normalize_embeddings=True), dtype=np.float32)
+
+def _text(params, fields):
+    return " · ".join(" ".join(str(params[field]).split()) for field in fields if params.get(field)).lower()
+
+# The request as (topic text, detail text, exact key); None when params lack the topic
+def request_key(artifact_type, params, course=None):
+    topic_fields, detail_fields, exact_fields = REQUEST_FIELDS[artifact_type]
+    topic = _text(params, topic_fields)
+    if not topic and params.get("imported_from"):
+        # Imported .docx files only know their course (from the file name), none of the settings
+        return (course, "", ANY_SETTINGS) if course else None
+    if not topic:
+        return None
+    exact = {field: sorted(params[field]) if isinstance(params.get(field), list) else params.get(field) for field in exact_fields}
+    return topic, _text(params, detail_fields), json.dumps(exact, sort_keys=True)
+
+
+# Request embeddings of the artifacts of one type, one row per artifact
+class _TypeIndex:
+    def __init__(self):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.owners = np.empty(0, dtype=object)
+        self.exact = np.empty(0, dtype=object)  # None once the artifact is gone
+        self.has_detail = np.empty(0, dtype=bool)
+        self.generation_s = np.empty(0, dtype=np.float32)  # NaN when unknown
+        self.topic = None
+        self.detail = None
+
+    def append(self, ids, owners, exact, has_detail, generation_s, topic, detail):
+        self.ids = np.concatenate([self.ids, np.array(ids, dtype=np.int64)])
+        self.owners = np.concatenate([self.owners, np.array(owners, dtype=object)])
+        self.exact = np.concatenate([self.exact, np.array(exact, dtype=object)])
+        self.has_detail = np.concatenate([self.has_detail, np.array(has_detail, dtype=bool)])
+        self.generation_s = np.concatenate([self.generation_s, np.array(generation_s, dtype=np.float32)])
+        self.topic = topic if self.topic is None else np.vstack([self.topic, topic])
+        self.detail = detail if self.detail is None else np.vstack([self.detail, detail])
+
+
+class SemanticCache:
+    def __init__(self, store=artifact_store, embed_fn=embed_texts, path=SEMANTIC_CACHE_DB,
+                 thresholds=None, topic_weight=SEMANTIC_TOPIC_WEIGHT):
+        self.store = store
+        self.embed_fn = embed_fn
+        self.thresholds = dict(SEMANTIC_CACHE_THRESHOLDS, **(thresholds or {}))
+        self.topic_weight = topic_weight
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self._indexes = {artifact_type: _TypeIndex() for artifact_type in REQUEST_FIELDS}
+        self._stats = {"lookups": 0, "hits": 0, "declined": 0, "saved_s": 0.0, "lookup_s": 0.0}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS request_embeddings (
+                artifact_id INTEGER PRIMARY KEY,
+                topic BLOB NOT NULL,
+                detail BLOB NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    # Index artifacts saved since the last refresh, embedding only those not embedded before
+    def refresh(self):
+        with self._lock:
+            artifacts = self.store.since(self._last_id)
+            if not artifacts:
+                return 0
+            self._last_id = artifacts[-1]["id"]
+            keyed = [(a, request_key(a["type"], a["params"], a["course"])) for a in artifacts if a["type"] in REQUEST_FIELDS]
+            keyed = [(a, key) for a, key in keyed if key is not None]
+            if not keyed:
+                return 0
+
+            ids = [a["id"] for a, _ in keyed]
+            stored = {}
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                stored.update({
+                    row[0]: (np.frombuffer(row[1], dtype=np.float32), np.frombuffer(row[2], dtype=np.float32))
+                    for row in self._conn.execute(
+                        f"SELECT artifact_id, topic, detail FROM request_embeddings WHERE artifact_id IN ({', '.join('?' * len(batch))})", batch
+                    )
+                })
+            missing = [(a["id"], key) for a, key in keyed if a["id"] not in stored]
+            if missing:
+                topics = self.embed_fn([key[0] for _, key in missing])
+                with_detail = [i for i, (_, key) in enumerate(missing) if key[1]]
+                details = np.zeros_like(topics)
+                if with_detail:
+                    details[with_detail] = self.embed_fn([missing[i][1][1] for i in with_detail])
+                for i, (artifact_id, _) in enumerate(missing):
+                    stored[artifact_id] = (topics[i], details[i])
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO request_embeddings (artifact_id, topic, detail) VALUES (?, ?, ?)",
+                    [(artifact_id, stored[artifact_id][0].tobytes(), stored[artifact_id][1].tobytes()) for artifact_id, _ in missing]
+                )
+                self._conn.commit()
+
+            for artifact_type, index in self._indexes.items():
+                rows = [(a, key) for a, key in keyed if a["type"] == artifact_type]
+                if rows:
+                    index.append(
+                        [a["id"] for a, _ in rows],
+                        [a["owner"] for a, _ in rows],
+                        [key[2] for _, key in rows],
+                        [bool(key[1]) for _, key in rows],
+                        [np.nan if a["generation_s"] is None else a["generation_s"] for a, _ in rows],
+                        np.stack([stored[a["id"]][0] for a, _ in rows]),
+                        np.stack([stored[a["id"]][1] for a, _ in rows]),
+                    )
+            return len(keyed)
+
+    # Candidates for an embedded request, best first: [(artifact id, score)]
+    # at or above the threshold
+    def _candidates(self, index, key, vectors, owner, threshold):
+        if not len(index.ids):
+            return []
+        _, detail, exact = key
+        settings = (index.exact == exact) | (index.exact == ANY_SETTINGS)
+        mask = settings & ((index.owners == (owner or "")) | (index.owners == ""))
+        scores = index.topic @ vectors[0]
+        if detail:
+            # Detail similarity only counts where both requests have details
+            both = index.has_detail
+            scores = np.where(both, self.topic_weight * scores + (1 - self.topic_weight) * (index.detail @ vectors[1]), scores)
+        scores = np.where(mask, scores, -1.0)
+        positions = np.flatnonzero(scores >= threshold)
+        positions = positions[np.argsort(-scores[positions])]
+        return [(int(index.ids[p]), float(scores[p])) for p in positions]
+
+    # Most similar past artifact for a request, or None. Returns {"artifact" (with content),
+    # "similarity", "saved_s"}; saved_s is the generation time it replaces (the artifact's
+    # own, else the median for its type).
+    def lookup(self, artifact_type, params, owner=None):
+        key = request_key(artifact_type, params) if SEMANTIC_CACHE_ENABLED and artifact_type in REQUEST_FIELDS else None
+        if key is None:
+            return None
+        start = time.perf_counter()
+        self.refresh()
+        vectors = self.embed_fn([key[0], key[1]] if key[1] else [key[0]])
+        index = self._indexes[artifact_type]
+        with self._lock:
+            candidates = self._candidates(index, key, vectors, owner, self.thresholds[artifact_type])
+            known = index.generation_s[~np.isnan(index.generation_s)]
+            typical_s = float(np.median(known)) if len(known) else 0.0
+
+        match = None
+        for artifact_id, score in candidates:
+            artifact = self.store.get(artifact_id)
+            if artifact is None:
+                with self._lock:
+                    index.exact[index.ids == artifact_id] = None  # deleted from the library
+                continue
+            match = {"artifact": artifact, "similarity": score, "saved_s": artifact["generation_s"] or typical_s}
+            break
+
+        with self._lock:
+            self._stats["lookups"] += 1
+            self._stats["lookup_s"] += time.perf_counter() - start
+            if match:
+                self._stats["hits"] += 1
+                self._stats["saved_s"] += match["saved_s"]
+        return match
+
+    # The teacher generated a new artifact instead of reusing the match
+    def decline(self, match):
+        with self._lock:
+            self._stats["declined"] += 1
+            self._stats["saved_s"] -= match["saved_s"]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["reused"] = stats["hits"] - stats["declined"]
+        stats["hit_ratio"] = stats["reused"] / stats["lookups"] if stats["lookups"] else 0.0
+        stats["avg_lookup_ms"] = stats["lookup_s"] / stats["lookups"] * 1000 if stats["lookups"] else 0.0
+        return stats
+
+
+# Shared cache used by the generator tabs
+semantic_cache = SemanticCache()
@@ -0,0 +1,130 @@
+# Scaling of the HNSW backend on synthetic 384-d embeddings (10k / 100k / 1M chunks by default),
+# against exact brute-force search over the same vectors. Like real sentence embeddings, the
+# vectors vary mostly along a few dozen latent directions; isotropic noise would make any ANN
+# index look far worse than it does on real text.
+#
+# For each size: bulk insert rate, save and load time, then recall@k and query latency at a
+# few ef_search settings (the recall/latency dial), incremental inserts into the loaded
+# index, and a background rebuild after deleting a share of the chunks. 1M vectors need
+# several GB of RAM and a long build on few cores; pass --sizes to pick smaller runs.
+#
+# Run from the project root:
+#   python -m benchmarks.ann_benchmark --sizes 10000 100000
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import numpy as np
+
+from app.rag.hnsw_store import HNSWVectorStore
+from benchmarks.vector_store_benchmark import DIMENSIONS, ground_truth
+
+INSERT_BATCH = 5000
+
+
+# n unit vectors from topic clusters in a low-dimensional latent space projected to 384-d,
+# plus queries that are near-paraphrases of stored chunks
+def latent_embeddings(n, num_queries, latent_dimensions=48, clusters=256, seed=0):
+    rng = np.random.default_rng(seed)
+    projection = rng.standard_normal((latent_dimensions, DIMENSIONS)).astype(np.float32)
+    centres = rng.standard_normal((clusters, latent_dimensions)).astype(np.float32)
+    latent = centres[rng.integers(0, clusters, n)] + 0.7 * rng.standard_normal((n, latent_dimensions)).astype(np.float32)
+    vectors = latent @ projection + 0.5 * rng.standard_normal((n, DIMENSIONS)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = vectors[rng.integers(0, n, num_queries)] + 0.05 * rng.standard_normal((num_queries, DIMENSIONS)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return vectors, queries
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def insert(store, vectors, offset=0):
+    for start in range(0, len(vectors), INSERT_BATCH):
+        batch = vectors[start:start + INSERT_BATCH]
+        ids = [str(offset + start + i) for i in range(len(batch))]
+        store.upsert(ids, batch, [f"chunk {chunk_id}" for chunk_id in ids], [{"course": f"course-{int(chunk_id) % 4}"} for chunk_id in ids])
+
+def search(store, queries, truth, top_k):
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = store.query([query], n_results=top_k, include=[])
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(expected & {int(chunk_id) for chunk_id in result["ids"][0]}) / top_k)
+    return statistics.mean(recalls), statistics.median(latencies), percentile(latencies, 0.95)
+
+def exact_search(vectors, queries, top_k):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        scores = vectors @ query
+        top = np.argpartition(-scores, top_k)[:top_k]
+        top = top[np.argsort(-scores[top])]
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies), percentile(latencies, 0.95)
+
+
+def run(n, args):
+    vectors, queries = latent_embeddings(n, args.queries)
+    truth = ground_truth(vectors, queries, args.top_k)
+    path = tempfile.mkdtemp(prefix="teachmate_hnsw_")
+    try:
+        store = HNSWVectorStore(path, m=args.m, ef_construction=args.ef_construction)
+        start = time.perf_counter()
+        insert(store, vectors)
+        build_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store.save()
+        save_s = time.perf_counter() - start
+        start = time.perf_counter()
+        store = HNSWVectorStore(path, m=args.m, ef_construction=args.ef_construction)
+        load_s = time.perf_counter() - start
+
+        print(f"\n{n} vectors: insert {build_s:.1f}s ({n / build_s:.0f}/s), save {save_s:.2f}s, load {load_s:.2f}s")
+        print(f"{'search':<16} {f'recall@{args.top_k}':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        p50, p95 = exact_search(vectors, queries, args.top_k)
+        print(f"{'exact (numpy)':<16} {1.0:>9.3f} {p50:>8.2f} {p95:>8.2f}")
+        for ef in args.ef_search:
+            store.ef_search = ef
+            recall, p50, p95 = search(store, queries, truth, args.top_k)
+            print(f"{f'hnsw ef={ef}':<16} {recall:>9.3f} {p50:>8.2f} {p95:>8.2f}")
+
+        # Incremental inserts into the loaded index (1% more chunks)
+        extra = max(1, n // 100)
+        extra_vectors, _ = latent_embeddings(extra, 1, seed=1)
+        start = time.perf_counter()
+        insert(store, extra_vectors, offset=n)
+        insert_s = time.perf_counter() - start
+        print(f"incremental insert of {extra}: {insert_s:.2f}s ({extra / insert_s:.0f}/s)")
+
+        # Delete a quarter of the chunks, then time the background rebuild that follows
+        start = time.perf_counter()
+        store.delete(ids=[str(i) for i in range(n // 4)])
+        delete_s = time.perf_counter() - start
+        start = time.perf_counter()
+        store.rebuild(wait=True)
+        print(f"delete {n // 4}: {delete_s:.2f}s, rebuild: {time.perf_counter() - start:.1f}s (queries keep using the old graph meanwhile)")
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the HNSW vector backend at scale")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 64, 256])
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        run(n, args)
+
+
+if __name__ == "__main__":
+    main()
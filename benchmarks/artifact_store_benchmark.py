@@ -0,0 +1,105 @@
+# Finding past artifacts: scanning the loose .docx files in a folder (the old app/memory
+# layout, where the only way to search content is to open every file) vs. the artifact
+# store's indexed listing and FTS5 search.
+#
+# Also reports the store's save rate and how much space deduplication saves when the same
+# text is generated more than once.
+#
+# Run from the project root:
+#   python -m benchmarks.artifact_store_benchmark --artifacts 200 2000
+import os
+import time
+import shutil
+import random
+import argparse
+import tempfile
+import statistics
+from docx import Document
+
+from app.utils.artifact_store import ArtifactStore, ARTIFACT_TYPES
+from benchmarks.export_benchmark import sample_syllabus, legacy_export
+from benchmarks.vector_store_benchmark import directory_mb
+
+COURSES = ["Java", "Python", "Data Structures", "Machine Learning", "Databases", "Operating Systems", "Networks", "Statistics"]
+TOPICS = ["recursion", "inheritance", "sorting", "regression", "normalization", "scheduling", "routing", "sampling"]
+
+
+def sample_artifacts(n, duplicate_share, seed=0):
+    rng = random.Random(seed)
+    artifacts = []
+    for i in range(n):
+        if artifacts and rng.random() < duplicate_share:
+            artifacts.append(dict(rng.choice(artifacts)))  # the same request generated again
+            continue
+        course = rng.choice(COURSES)
+        content = sample_syllabus(rng.randint(4, 16)).replace("object-oriented programming", f"{rng.choice(TOPICS)} #{i}")
+        artifacts.append({"type": rng.choice(list(ARTIFACT_TYPES)), "course": course, "title": f"{course} – {i}", "content": content})
+    return artifacts
+
+def timed(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), result
+
+# The old way: open every .docx of the course and look for the word
+def scan_folder(folder, course, word):
+    prefix = course.replace(" ", "_") + "_"
+    matches = []
+    for name in os.listdir(folder):
+        if name.startswith(prefix) and name.endswith(".docx"):
+            text = "\n".join(p.text for p in Document(os.path.join(folder, name)).paragraphs)
+            if word in text.lower():
+                matches.append(name)
+    return matches
+
+
+def run(n, args):
+    artifacts = sample_artifacts(n, args.duplicates)
+    folder = tempfile.mkdtemp(prefix="teachmate_docx_")
+    root = tempfile.mkdtemp(prefix="teachmate_artifacts_")
+    try:
+        # Unique names, so the folder keeps every file (the app overwrote them instead)
+        for i, artifact in enumerate(artifacts):
+            legacy_export(artifact["title"], artifact["content"], f"{artifact['course'].replace(' ', '_')}_{i}_{artifact['type']}.docx", folder)
+
+        store = ArtifactStore(root, legacy_dir=None)
+        start = time.perf_counter()
+        for artifact in artifacts:
+            store.save(artifact["type"], artifact["content"], artifact["course"], owner="teacher1", title=artifact["title"])
+        save_s = time.perf_counter() - start
+
+        print(f"\n{n} artifacts ({args.duplicates:.0%} repeats): saved in {save_s:.2f}s ({n / save_s:.0f}/s), "
+              f"{store.count('teacher1')} stored, {directory_mb(folder):.1f} MB as .docx vs {directory_mb(root):.1f} MB in the store")
+        print(f"{'operation':<42} {'median ms':>10} {'results':>8}")
+        scan_ms, found = timed(lambda: scan_folder(folder, "Java", "recursion"), 1)
+        print(f"{'scan .docx folder (course + word)':<42} {scan_ms:>10.1f} {len(found):>8}")
+        for label, fn in [
+            ("store: course + full text", lambda: store.search("teacher1", course="Java", query="recursion", limit=1000)),
+            ("store: newest 20", lambda: store.search("teacher1")),
+            ("store: newest 20 of one type", lambda: store.search("teacher1", artifact_type="syllabus")),
+            ("store: full text, top 20", lambda: store.search("teacher1", query="recursion quiz")),
+            ("store: count for pagination", lambda: [store.count("teacher1", query="recursion")]),
+        ]:
+            ms, result = timed(fn, args.repeats)
+            print(f"{label:<42} {ms:>10.2f} {len(result):>8}")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark artifact listing and search")
+    parser.add_argument("--artifacts", type=int, nargs="+", default=[200, 2000])
+    parser.add_argument("--duplicates", type=float, default=0.2, help="share of artifacts that repeat an earlier one")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    for n in args.artifacts:
+        run(n, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# Chunk counts and chunking time: the previous 120-word / 20-overlap word window vs. the
+# structure-aware, token-budgeted chunker, for the files in docs/sample_pdfs.
+#
+# Fewer chunks means fewer embeddings to compute and store and a smaller index to search.
+# --offline estimates tokens from word counts instead of loading the embedding model's tokenizer.
+#
+# Run from the project root:
+#   python -m benchmarks.chunking_benchmark
+import os
+import time
+import argparse
+
+from app.rag import rag_retriever
+from app.rag.chunking import StructuredChunker, TokenCounter, RAG_CHUNK_TOKENS
+
+SAMPLE_DIR = "docs/sample_pdfs"
+SUPPORTED = (".pdf", ".docx", ".txt")
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare word-window and structured chunking")
+    parser.add_argument("--sample-dir", default=SAMPLE_DIR)
+    parser.add_argument("--max-tokens", type=int, default=RAG_CHUNK_TOKENS)
+    parser.add_argument("--offline", action="store_true", help="estimate tokens from words (no model download)")
+    args = parser.parse_args()
+
+    counter = TokenCounter() if args.offline else TokenCounter.for_embedding_model()
+    files = [name for name in sorted(os.listdir(args.sample_dir)) if name.lower().endswith(SUPPORTED)]
+
+    print(f"max_tokens={args.max_tokens}{' (estimated tokens)' if args.offline else ''}")
+    print(f"{'document':<40} {'window':>7} {'struct':>7} {'change':>7} {'boilerplate':>12} {'dupes':>6} {'window ms':>10} {'struct ms':>10}")
+    totals = [0, 0]
+    for name in files:
+        path = os.path.join(args.sample_dir, name)
+        window, window_ms = timed(lambda: list(rag_retriever.iter_chunks(rag_retriever.iter_document(path))))
+        chunker = StructuredChunker(max_tokens=args.max_tokens, token_counter=counter)
+        structured, struct_ms = timed(lambda: list(rag_retriever.iter_document_chunks(path, chunker=chunker)))
+        totals[0] += len(window)
+        totals[1] += len(structured)
+        change = (len(structured) - len(window)) / len(window) * 100 if window else 0.0
+        print(f"{name[:40]:<40} {len(window):>7} {len(structured):>7} {change:>6.0f}% "
+              f"{chunker.stats['boilerplate_dropped']:>12} {chunker.stats['duplicates_dropped']:>6} {window_ms:>10.1f} {struct_ms:>10.1f}")
+
+    if totals[0]:
+        print(f"\nTotal: {totals[0]} → {totals[1]} chunks ({(totals[0] - totals[1]) / totals[0] * 100:.0f}% fewer)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# Co-Pilot prompt size per turn over a long conversation: latest message only (the old
+# behaviour, no context), the whole history verbatim, and the conversation manager
+# (rolling summary + recent turns within the token budget), against a local fake model.
+#
+# The fake model's latency grows with prompt length (time to read the prompt) and it writes
+# replies of a fixed length, so prompt size translates into per-turn latency. Summary
+# updates run inline here to count them; in the app they run in the background.
+#
+# Run from the project root:
+#   python -m benchmarks.copilot_memory_benchmark --turns 40 --reply-words 180
+import os
+import time
+import argparse
+import tempfile
+import statistics
+
+os.environ["RESPONSE_CACHE_DB"] = ""  # memory-only cache
+os.environ.setdefault("GEMINI_RPM", "0")  # no client-side rate limiting against the fake model
+
+from app.agents import llm_client
+from app.agents.copilot_agent import build_copilot_prompt, format_turns
+from app.agents.copilot_memory import ConversationManager, count_tokens
+from app.utils.conversation_store import ConversationStore
+
+TOPICS = ["recursion", "sorting algorithms", "linked lists", "binary trees", "hash tables", "graph search", "dynamic programming"]
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+# Stand-in for genai.GenerativeModel: latency per 1k prompt tokens plus a fixed reply
+class FakeModel:
+    def __init__(self, reply_words, seconds_per_1k_tokens):
+        self.reply_words = reply_words
+        self.seconds_per_1k_tokens = seconds_per_1k_tokens
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        time.sleep(count_tokens(prompt) / 1000 * self.seconds_per_1k_tokens)
+        if "running summary" in prompt:
+            return FakeResponse(" ".join(["- summary point"] * 40))
+        return FakeResponse(" ".join(f"word{i}" for i in range(self.reply_words)) + f" ({self.calls})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Co-Pilot prompt size with conversation memory")
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--reply-words", type=int, default=180)
+    parser.add_argument("--seconds-per-1k", type=float, default=0.05, help="fake prompt processing time per 1k tokens")
+    args = parser.parse_args()
+
+    model = FakeModel(args.reply_words, args.seconds_per_1k)
+    llm_client.register_model(llm_client.DEFAULT_MODEL, model)
+    store = ConversationStore(os.path.join(tempfile.mkdtemp(prefix="teachmate_copilot_"), "conversations.db"))
+    manager = ConversationManager(store, background=False)
+
+    rows, history, summary_calls, summary_s = [], [], 0, 0.0
+    for turn in range(1, args.turns + 1):
+        query = f"Follow-up {turn}: how should I teach {TOPICS[turn % len(TOPICS)]} to second-year students?"
+        latest_only = count_tokens(build_copilot_prompt(query))
+        full = count_tokens(build_copilot_prompt(query, recent_turns=history))
+
+        prepared = manager.prepare("teacher1", query)
+        start = time.perf_counter()
+        reply = llm_client.generate_text(prepared["prompt"])
+        reply_s = time.perf_counter() - start
+
+        calls_before = model.calls
+        start = time.perf_counter()
+        manager.record(prepared, query, reply)
+        if model.calls > calls_before:
+            summary_calls += 1
+            summary_s += time.perf_counter() - start
+        history.append({"user": query, "ai": reply})
+        rows.append((turn, latest_only, full, prepared["prompt_tokens"], prepared["turns_verbatim"], reply_s))
+
+    print(f"{args.turns} turns, {args.reply_words}-word replies, budget {manager.token_budget} tokens, "
+          f"{manager.recent_turns} recent turns verbatim")
+    print(f"{'turn':>5} {'latest only':>12} {'full history':>13} {'managed':>8} {'verbatim':>9} {'reply s':>8}")
+    for turn, latest_only, full, managed, verbatim, reply_s in rows:
+        if turn in (1, 2, 5) or turn % 10 == 0:
+            print(f"{turn:>5} {latest_only:>12,} {full:>13,} {managed:>8,} {verbatim:>9} {reply_s:>8.3f}")
+    print(f"\nTotal prompt tokens: full history {sum(r[2] for r in rows):,} vs managed {sum(r[3] for r in rows):,} "
+          f"({1 - sum(r[3] for r in rows) / sum(r[2] for r in rows):.0%} fewer); max managed prompt {max(r[3] for r in rows):,}")
+    print(f"Summary updates: {summary_calls} ({summary_s / max(summary_calls, 1):.3f}s each, off the reply path in the app); "
+          f"median reply {statistics.median(r[5] for r in rows):.3f}s")
+    final_summary, through = store.summary(prepared["conversation_id"])
+    print(f"Summary covers turns up to #{through}, {count_tokens(final_summary)} tokens; "
+          f"history tokens stored: {store.history_tokens(prepared['conversation_id']):,} (check: {count_tokens(format_turns(history)):,})")
+
+
+if __name__ == "__main__":
+    main()
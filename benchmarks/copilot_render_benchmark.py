@@ -0,0 +1,164 @@
+# Co-Pilot tab render time vs. conversation length: the previous renderer (every turn as raw
+# HTML, a form, and two extra st.rerun() calls per message) against the current one (native
+# chat elements, the last COPILOT_VISIBLE_TURNS turns on screen, reply answered in the same
+# run). Runs the tab headless with Streamlit's AppTest and a local fake model, so it measures
+# script time and elements sent to the browser, not browser paint time.
+#
+# Run from the project root:
+#   python -m benchmarks.copilot_render_benchmark --turns 10 100 500
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+WORK_DIR = tempfile.mkdtemp(prefix="teachmate_render_")
+os.environ["CONVERSATION_DB_PATH"] = os.path.join(WORK_DIR, "conversations.db")
+os.environ["RESPONSE_CACHE_DB"] = ""  # memory-only cache
+os.environ.setdefault("GEMINI_RPM", "0")  # no client-side rate limiting against the fake model
+
+from streamlit.testing.v1 import AppTest
+from app.agents.copilot_memory import copilot_memory
+
+# Shared page header: fake model (fixed reply, streamed in a few chunks) and a run counter
+PAGE_HEADER = """
+import streamlit as st
+from app.agents import llm_client
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeModel:
+    def generate_content(self, prompt, stream=False, **kwargs):
+        words = [f"word{i} " for i in range(120)]
+        if stream:
+            return iter([FakeResponse("".join(words[i:i + 20])) for i in range(0, len(words), 20)])
+        return FakeResponse("- summary point")
+
+llm_client.register_model(llm_client.DEFAULT_MODEL, FakeModel())
+st.session_state["username"] = st.session_state.get("username", "{owner}")
+st.session_state["script_runs"] = st.session_state.get("script_runs", 0) + 1
+"""
+
+CURRENT_PAGE = PAGE_HEADER + """
+from app.ui import ai_copilot
+ai_copilot.render()
+"""
+
+# The renderer before native chat elements (whole history as HTML, form, rerun per step)
+LEGACY_PAGE = PAGE_HEADER + '''
+import datetime
+from app.agents.copilot_agent import stream_copilot_response
+from app.agents.copilot_memory import copilot_memory
+from app.ui.ai_copilot import token_note
+
+owner = st.session_state["username"]
+if "copilot_history" not in st.session_state:
+    st.session_state["copilot_history"] = copilot_memory.history(owner)
+for chat in st.session_state["copilot_history"]:
+    if chat["user"]:
+        st.markdown(f"""
+        <div class="chat-message user-message">
+            {chat['user']}
+        </div>
+        <div class="message-timestamp user-timestamp">{datetime.datetime.fromisoformat(chat['time']).strftime('%I:%M %p')}</div>
+        """, unsafe_allow_html=True)
+    if chat["ai"]:
+        st.markdown(f"""
+        <div class="chat-message ai-message">
+            {chat['ai']}
+        </div>
+        <div class="message-timestamp ai-timestamp">{datetime.datetime.fromisoformat(chat['time']).strftime('%I:%M %p')}{token_note(chat)}</div>
+        """, unsafe_allow_html=True)
+with st.form("copilot_chat_form", clear_on_submit=True):
+    user_input = st.text_input("message", key="copilot_input_form")
+    if st.form_submit_button("🚀 Send") and user_input.strip():
+        st.session_state["copilot_history"].append({"user": user_input, "ai": "", "time": datetime.datetime.now().isoformat()})
+        st.rerun()
+if st.session_state["copilot_history"] and not st.session_state["copilot_history"][-1]["ai"]:
+    query = st.session_state["copilot_history"][-1]["user"]
+    with st.spinner("🧠 AI Co-Pilot is thinking..."):
+        prepared = copilot_memory.prepare(owner, query)
+        stream = stream_copilot_response(query, prepared["summary"], prepared["recent_turns"])
+        reply = st.write_stream(stream)
+        st.session_state["copilot_history"][-1] = copilot_memory.record(
+            prepared, query, reply, time=st.session_state["copilot_history"][-1]["time"]
+        )
+        st.rerun()
+'''
+
+
+def write_page(name, source, owner):
+    path = os.path.join(WORK_DIR, f"{name}_page.py")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(source.replace("{owner}", owner))
+    return path
+
+
+# Give `owner` a saved conversation of `turns` turns with ~120-word replies
+def seed(owner, turns):
+    conversation_id = copilot_memory.conversation(owner)
+    reply = " ".join(f"word{i}" for i in range(120))
+    for i in range(turns):
+        copilot_memory.store.add_turn(conversation_id, f"Question {i}: how do I teach recursion?", reply, tokens=180)
+
+
+def elements(at):
+    return len(list(at.main))
+
+
+# (first load ms, median rerun ms, send ms, script runs per send, elements on screen)
+def measure(path, repeats, send):
+    at = AppTest.from_file(path, default_timeout=120)
+    start = time.perf_counter()
+    at.run()
+    load_ms = (time.perf_counter() - start) * 1000
+    rerun_ms = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        at.run()
+        rerun_ms.append((time.perf_counter() - start) * 1000)
+    shown = elements(at)
+    runs_before = at.session_state["script_runs"]
+    start = time.perf_counter()
+    send(at)
+    send_ms = (time.perf_counter() - start) * 1000
+    if at.exception:
+        sys.exit(f"page raised: {at.exception[0].message}")
+    return load_ms, statistics.median(rerun_ms), send_ms, at.session_state["script_runs"] - runs_before, shown
+
+
+def send_legacy(at):
+    at.text_input(key="copilot_input_form").input("And how do I assess it?")
+    at.button[0].click().run()
+
+
+def send_current(at):
+    at.chat_input[0].set_value("And how do I assess it?").run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Co-Pilot tab rendering vs. conversation length")
+    parser.add_argument("--turns", type=int, nargs="+", default=[10, 50, 100, 250, 500])
+    parser.add_argument("--repeats", type=int, default=5, help="idle reruns timed per size")
+    args = parser.parse_args()
+
+    from app.ui.ai_copilot import COPILOT_VISIBLE_TURNS
+    # Warm-up (imports, first AppTest run) so the first size isn't charged for it
+    for name, page, send in (("legacy", LEGACY_PAGE, send_legacy), ("current", CURRENT_PAGE, send_current)):
+        measure(write_page(name, page, f"{name}_warmup"), 1, send)
+
+    print(f"Conversation turns with ~120-word replies; current renderer shows the last {COPILOT_VISIBLE_TURNS} turns")
+    print(f"{'turns':>6} {'renderer':>9} {'load ms':>8} {'rerun ms':>9} {'send ms':>8} {'runs/send':>10} {'elements':>9}")
+    for turns in args.turns:
+        for name, page, send in (("legacy", LEGACY_PAGE, send_legacy), ("current", CURRENT_PAGE, send_current)):
+            owner = f"{name}_{turns}"
+            seed(owner, turns)
+            load_ms, rerun_ms, send_ms, runs, shown = measure(write_page(name, page, owner), args.repeats, send)
+            print(f"{turns:>6} {name:>9} {load_ms:>8.1f} {rerun_ms:>9.1f} {send_ms:>8.1f} {runs:>10} {shown:>9}")
+
+
+if __name__ == "__main__":
+    main()
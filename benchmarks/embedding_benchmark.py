@@ -0,0 +1,53 @@
+# Embedding pipeline benchmark: chunks/sec and peak RSS for the files in docs/sample_pdfs.
+#
+# Run from the project root:
+#   python -m benchmarks.embedding_benchmark --batch-sizes 16 64 128 --workers 1 4
+import os
+import sys
+import time
+import argparse
+import resource
+import tempfile
+
+SAMPLE_DIR = "docs/sample_pdfs"
+SUPPORTED = (".pdf", ".docx", ".txt")
+
+# Peak resident set size of this process in MB (ru_maxrss is KB on Linux, bytes on macOS)
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark upload_and_embed_documents")
+    parser.add_argument("--sample-dir", default=SAMPLE_DIR)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 64, 128])
+    parser.add_argument("--add-batch-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    # Embed into a throwaway store so the real index is never touched
+    os.environ["CHROMA_PERSIST_DIR"] = tempfile.mkdtemp(prefix="teachmate_bench_")
+    from app.rag import rag_retriever
+
+    files = [
+        (os.path.join(args.sample_dir, name), name)
+        for name in sorted(os.listdir(args.sample_dir))
+        if name.lower().endswith(SUPPORTED)
+    ]
+    print(f"{len(files)} documents from {args.sample_dir}, baseline RSS {peak_rss_mb():.1f} MB")
+    print(f"{'workers':>8} {'batch':>6} {'chunks':>7} {'seconds':>8} {'chunks/s':>9} {'peak MB':>8}")
+
+    for workers in args.workers:
+        for batch_size in args.batch_sizes:
+            rag_retriever.save_manifest({})  # force a full re-embed each run
+            start = time.perf_counter()
+            results = rag_retriever.upload_and_embed_documents(
+                files, max_workers=workers, batch_size=batch_size, add_batch_size=args.add_batch_size
+            )
+            elapsed = time.perf_counter() - start
+            total_chunks = sum(results.values())
+            rate = total_chunks / elapsed if elapsed else 0.0
+            print(f"{workers:>8} {batch_size:>6} {total_chunks:>7} {elapsed:>8.2f} {rate:>9.1f} {peak_rss_mb():>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# Word export cost per Streamlit rerun: the previous exporter (render, write to app/memory,
+# return the path) vs. in-memory rendering with the per-content cache, plus ZIP bundling.
+#
+# Every rerun of a tab re-creates its download button and so calls the exporter again with
+# the same content; only the first call should do any work.
+#
+# Run from the project root:
+#   python -m benchmarks.export_benchmark --weeks 16 --reruns 20
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+from docx import Document
+
+from app.utils import file_exporter
+from app.utils.file_exporter import export_to_docx, export_zip
+from app.utils.watermark import get_watermark_text
+
+
+def sample_syllabus(weeks):
+    parts = ["## Course Overview", "An introduction to **object-oriented programming** in *Java*.", ""]
+    for week in range(1, weeks + 1):
+        parts += [
+            f"### Week {week}: Topic {week}",
+            "- **Objectives:** understand classes, objects and `interfaces`",
+            "- **Activities:**",
+            "  - Lecture and live coding",
+            "  - Lab exercise",
+            "1. Reading: chapter " + str(week),
+            "2. Quiz",
+            "",
+        ]
+    parts += ["| Week | Assessment | Weight |", "|------|------------|--------|"]
+    parts += [f"| {week} | Quiz {week} | 5% |" for week in range(1, weeks + 1)]
+    return "\n".join(parts)
+
+# The exporter as it was: one big paragraph, saved to disk on every call
+def legacy_export(title, content, filename, folder):
+    doc = Document()
+    doc.add_heading(title, level=1)
+    doc.add_paragraph("\n" + content)
+    doc.add_paragraph("\n---\n" + get_watermark_text())
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, filename)
+    doc.save(path)
+    return path
+
+def timed_calls(fn, reruns):
+    times = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark .docx export per rerun")
+    parser.add_argument("--weeks", type=int, default=16)
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--bundle", type=int, default=25, help="artifacts in the ZIP bundle")
+    args = parser.parse_args()
+
+    content = sample_syllabus(args.weeks)
+    folder = tempfile.mkdtemp(prefix="teachmate_export_")
+    try:
+        legacy = timed_calls(lambda: legacy_export("Java – Syllabus", content, "java_syllabus.docx", folder), args.reruns)
+        file_exporter._rendered.clear()
+        current = timed_calls(lambda: export_to_docx("Java – Syllabus", content, "java_syllabus.docx", folder=folder), args.reruns)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    print(f"{args.weeks}-week syllabus ({len(content)} chars), {args.reruns} reruns")
+    print(f"{'exporter':<22} {'first ms':>9} {'rerun ms':>9} {'total ms':>9} {'files written':>14}")
+    print(f"{'legacy (disk path)':<22} {legacy[0]:>9.1f} {statistics.median(legacy[1:]):>9.2f} {sum(legacy):>9.1f} {args.reruns:>14}")
+    print(f"{'in-memory + cache':<22} {current[0]:>9.1f} {statistics.median(current[1:]):>9.3f} {sum(current):>9.1f} {0:>14}")
+
+    artifacts = [
+        {"title": f"Course {i} – Syllabus", "content": content, "filename": f"course_{i}_syllabus.docx"}
+        for i in range(args.bundle)
+    ]
+    start = time.perf_counter()
+    bundle = export_zip(artifacts)
+    cold = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    export_zip(artifacts)
+    warm = (time.perf_counter() - start) * 1000
+    print(f"\nZIP of {args.bundle} documents: {len(bundle) / 1024:.0f} KB, {cold:.0f} ms cold, {warm:.1f} ms with rendered documents cached")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# Feedback analytics over a synthetic log: initial load, cold and memoized aggregation,
+# the incremental cost of a few new entries, and a restart (a new engine over the same
+# log, which starts from the saved snapshot).
+#
+# Entries are written straight into a temporary SQLite store. Complaint embeddings use
+# random unit vectors (no model download), drawn from a handful of "topics" so the
+# clustering has something to find.
+#
+# Run from the project root:
+#   python -m benchmarks.feedback_analytics_benchmark --entries 10000 100000
+import os
+import time
+import argparse
+import datetime
+import tempfile
+import numpy as np
+
+from app.utils.feedback_store import FeedbackStore, FEEDBACK_FIELDS
+from app.utils.feedback_analytics import FeedbackAnalytics
+
+COURSES = [f"Course {i}" for i in range(20)]
+TOPICS = [f"Students struggled with topic {i}" for i in range(50)]
+DIMENSIONS = 384
+
+
+def synthetic_rows(count, start, rng):
+    timestamps = start + (rng.random(count) * 365 * 24 * 3600).astype("timedelta64[s]")
+    for i in range(count):
+        yield (
+            COURSES[rng.integers(len(COURSES))],
+            str(timestamps[i]),
+            "Labs went well",
+            TOPICS[rng.integers(len(TOPICS))] if rng.random() < 0.7 else "",
+            "Try more worked examples",
+            int(rng.integers(1, 6)) if rng.random() < 0.9 else None,
+        )
+
+
+def fill(store, count, rng, start):
+    with store._connect() as conn:
+        conn.executemany(
+            f"INSERT INTO feedback ({', '.join(FEEDBACK_FIELDS)}) VALUES ({', '.join('?' * len(FEEDBACK_FIELDS))})",
+            synthetic_rows(count, start, rng)
+        )
+
+
+# One fixed direction per topic plus a little noise
+def fake_embedder(rng):
+    topics = rng.standard_normal((len(TOPICS), DIMENSIONS)).astype(np.float32)
+
+    def embed(texts):
+        vectors = np.stack([topics[int(text.rsplit(" ", 1)[1])] for text in texts])
+        vectors += 0.3 * rng.standard_normal(vectors.shape).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return embed
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the feedback analytics engine on a synthetic log")
+    parser.add_argument("--entries", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--append", type=int, default=50, help="entries added for the incremental run")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    start = np.datetime64("2024-01-01T00:00:00")
+    print(f"{'entries':>8} {'load ms':>8} {'trends ms':>10} {'memo ms':>8} {'+new ms':>8} {'clusters ms':>12} {'+new ms':>8} "
+          f"{'clusters':>9} {'restart: trends ms':>19} {'clusters ms':>12}")
+
+    for count in args.entries:
+        with tempfile.TemporaryDirectory() as folder:
+            store = FeedbackStore(os.path.join(folder, "feedback.db"), legacy_json_path=None)
+            fill(store, count, rng, start)
+            embed = fake_embedder(rng)
+            analytics = FeedbackAnalytics(store, embed_fn=embed)
+
+            _, load = timed(analytics.refresh)
+            _, trends = timed(analytics.rating_trends)
+            _, memo = timed(analytics.rating_trends)
+            _, clusters = timed(analytics.recurring_complaints)
+
+            now = datetime.datetime(2025, 1, 1)
+            for i in range(args.append):
+                store.append(COURSES[i % len(COURSES)], "ok", TOPICS[i % len(TOPICS)], "tip", 4, now.isoformat())
+            _, trends_new = timed(analytics.rating_trends)
+            found, clusters_new = timed(analytics.recurring_complaints)
+
+            # New process: snapshot plus the entries logged after it
+            restarted = FeedbackAnalytics(store, embed_fn=embed)
+            _, restart_trends = timed(restarted.rating_trends)
+            restart_found, restart_clusters = timed(restarted.recurring_complaints)
+            assert restarted.rating_trends().equals(analytics.rating_trends())
+            assert restart_found.equals(found)
+
+            print(f"{count:>8} {load:>8.1f} {trends:>10.1f} {memo:>8.2f} {trends_new:>8.1f} {clusters:>12.1f} {clusters_new:>8.1f} "
+                  f"{len(found):>9} {restart_trends:>19.1f} {restart_clusters:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
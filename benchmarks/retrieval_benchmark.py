@@ -0,0 +1,99 @@
+# Retrieval quality and latency: vector-only vs. BM25-only vs. hybrid (RRF) vs. hybrid + re-ranking
+# over a small fixture corpus of course snippets with labelled relevant passages.
+#
+# Each fixture passage is stored as its own document in a temporary Chroma collection.
+# Reports recall@k, MRR and per-stage latency. --offline swaps the sentence-transformer
+# for a hashed bag-of-words embedder (and skips the cross-encoder), so the pipeline can be
+# timed without downloading models; quality numbers are only meaningful with real models.
+#
+# Run from the project root:
+#   python -m benchmarks.retrieval_benchmark --top-k 3
+import os
+import json
+import zlib
+import argparse
+import tempfile
+import statistics
+
+os.environ["CHROMA_PERSIST_DIR"] = tempfile.mkdtemp(prefix="teachmate_retrieval_")
+
+import numpy as np
+from app.agents import llm_client
+from app.rag import rag_retriever
+from app.rag.hybrid_search import tokenize
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "retrieval_corpus.json")
+
+
+# Deterministic stand-in for the sentence-transformer: hashed token counts, unit-normalized
+class HashingEmbedder:
+    def __init__(self, dimensions=384):
+        self.dimensions = dimensions
+
+    def _embed(self, text):
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for token in tokenize(text):
+            vector[zlib.crc32(token.encode()) % self.dimensions] += 1.0
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def encode(self, texts, batch_size=None, **kwargs):
+        if isinstance(texts, str):
+            return self._embed(texts)
+        return np.stack([self._embed(text) for text in texts])
+
+
+def load_fixture():
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def ingest(documents):
+    for label, text in documents.items():
+        rag_retriever.embed_and_store_chunks(label, [[{"text": text, "page_start": 1, "page_end": 1}]])
+
+
+def evaluate(queries, top_k, mode, rerank):
+    recalls, reciprocal_ranks, stage_times = [], [], {}
+    for item in queries:
+        result = rag_retriever.hybrid_search(item["query"], top_k, mode=mode, rerank=rerank)
+        labels = [doc_id.rsplit("_", 1)[0] for doc_id in result["ids"]]
+        relevant = set(item["relevant"])
+        recalls.append(len(relevant & set(labels)) / len(relevant))
+        rank = next((i for i, label in enumerate(labels, start=1) if label in relevant), None)
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+        for stage, ms in result["timings"].items():
+            stage_times.setdefault(stage, []).append(ms)
+    return statistics.mean(recalls), statistics.mean(reciprocal_ranks), stage_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hybrid retrieval on the fixture corpus")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--offline", action="store_true", help="hashing embedder, no cross-encoder (no model downloads)")
+    args = parser.parse_args()
+
+    if args.offline:
+        llm_client._embedding_model = HashingEmbedder()
+
+    fixture = load_fixture()
+    ingest(fixture["documents"])
+    rag_retriever.hybrid_search("warm up", args.top_k, rerank=not args.offline)
+
+    scenarios = [("vector", False), ("bm25", False), ("hybrid", False)]
+    if not args.offline:
+        scenarios.append(("hybrid", True))
+
+    print(f"{len(fixture['documents'])} passages, {len(fixture['queries'])} queries, top_k={args.top_k}"
+          f"{' (offline embedder)' if args.offline else ''}")
+    print(f"{'mode':<16} {f'recall@{args.top_k}':>9} {'MRR':>6} {'p50 ms':>8} {'p95 ms':>8}  mean ms per stage")
+    for mode, rerank in scenarios:
+        recall, mrr, stage_times = evaluate(fixture["queries"], args.top_k, mode, rerank)
+        totals = sorted(stage_times.pop("total"))
+        p95 = totals[min(len(totals) - 1, int(len(totals) * 0.95))]
+        stages = "  ".join(f"{stage} {statistics.mean(times):.1f}" for stage, times in stage_times.items())
+        name = mode + (" + rerank" if rerank else "")
+        print(f"{name:<16} {recall:>9.2f} {mrr:>6.2f} {statistics.median(totals):>8.1f} {p95:>8.1f}  {stages}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Sectioned vs. monolithic syllabus generation against a local fake model.
+#
+# The fake model sleeps for a fixed request latency plus a per-week "writing" latency,
+# so a monolithic 20-week syllabus costs base + 20 * per_week while sectioned mode costs
+# roughly outline + base + weeks_per_section * per_week. No API key or network is used.
+#
+# Run from the project root:
+#   python -m benchmarks.sectioned_generation_benchmark --weeks 15 20 --per-week 0.2
+import os
+import re
+import time
+import argparse
+
+os.environ["RESPONSE_CACHE_DB"] = ""  # memory-only cache, cleared between runs
+os.environ.setdefault("GEMINI_RPM", "0")  # no client-side rate limiting against the fake model
+
+from app.agents import llm_client
+from app.agents import sectioned_generation
+from app.agents.syllabus_agent import generate_syllabus
+from app.utils.response_cache import response_cache
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+# Stand-in for genai.GenerativeModel with latency proportional to the weeks it is asked to write
+class FakeModel:
+    def __init__(self, base_latency, per_week_latency):
+        self.base_latency = base_latency
+        self.per_week_latency = per_week_latency
+
+    def generate_content(self, prompt, **kwargs):
+        section = re.search(r"Write ONLY weeks (\d+) to (\d+)", prompt)
+        if section:
+            weeks = range(int(section.group(1)), int(section.group(2)) + 1)
+        elif "List exactly" in prompt:
+            weeks = range(1, int(re.search(r"List exactly (\d+)", prompt).group(1)) + 1)
+            time.sleep(self.base_latency)
+            return FakeResponse("\n".join(f"Week {week}: Topic {week}" for week in weeks))
+        else:
+            weeks = range(1, int(re.search(r"Duration: (\d+) weeks", prompt).group(1)) + 1)
+        time.sleep(self.base_latency + self.per_week_latency * len(weeks))
+        return FakeResponse("\n".join(f"Week {week}: details" for week in weeks))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sectioned syllabus generation with a fake model")
+    parser.add_argument("--weeks", type=int, nargs="+", default=[12, 15, 20])
+    parser.add_argument("--base", type=float, default=0.3, help="fixed latency per request (s)")
+    parser.add_argument("--per-week", type=float, default=0.2, help="latency per generated week (s)")
+    args = parser.parse_args()
+
+    llm_client.register_model(llm_client.DEFAULT_MODEL, FakeModel(args.base, args.per_week))
+    print(f"weeks/section={sectioned_generation.SECTION_WEEKS} concurrency={sectioned_generation.SECTION_CONCURRENCY}")
+    print(f"{'weeks':>6} {'monolithic s':>13} {'sectioned s':>12} {'speedup':>8}  in order")
+
+    for weeks in args.weeks:
+        response_cache.clear()
+        _, monolithic = timed(lambda: generate_syllabus("Data Structures", "Trees and graphs", weeks))
+        response_cache.clear()
+        text, sectioned = timed(lambda: generate_syllabus("Data Structures", "Trees and graphs", weeks, sectioned=True))
+
+        order = [int(week) for week in re.findall(r"Week (\d+):", text)]
+        in_order = order == list(range(1, weeks + 1))
+        print(f"{weeks:>6} {monolithic:>13.2f} {sectioned:>12.2f} {monolithic / sectioned:>7.1f}x  {in_order}")
+
+
+if __name__ == "__main__":
+    main()
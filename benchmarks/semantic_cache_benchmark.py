@@ -0,0 +1,113 @@
+# Semantic reuse of past artifacts: how often a reworded request finds the artifact made for
+# the same course (and how often an unrelated request is wrongly offered one) at several
+# similarity thresholds, plus lookup latency and the generation time reuse would save.
+#
+# One syllabus and one resource list are stored per course; the remaining wordings of each
+# course (as found in app/memory: "Java", "fundamental of java", "java programming
+# language"...) should reuse them, and the unrelated requests should not. --offline swaps
+# the sentence-transformer for a hashed bag-of-words embedder (no model download); the
+# quality numbers are only meaningful with the real model.
+#
+# Run from the project root:
+#   python -m benchmarks.semantic_cache_benchmark --thresholds 0.7 0.8 0.9
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+from app.utils.artifact_store import ArtifactStore, SYLLABUS, RESOURCES
+from app.utils.semantic_cache import SemanticCache, embed_texts
+
+# Wordings of the same course; the first is stored, the others are looked up
+COURSES = [
+    (["Java", "Fundamental of Java", "Java programming language", "Introduction to Java programming", "Core Java"],
+     ["Students will write object-oriented programs in Java.", "Learn classes, objects and inheritance in Java."]),
+    (["Machine Learning", "Fundamentals of machine learning", "Introduction to ML", "Machine learning basics"],
+     ["Students will train and evaluate supervised models.", "Understand regression, classification and model evaluation."]),
+    (["Fundamentals of AI", "Artificial intelligence", "Introduction to artificial intelligence", "AI fundamentals"],
+     ["Students will understand search, reasoning and learning agents.", "Learn the core ideas of intelligent agents and search."]),
+    (["Data Structures", "Data structures and algorithms", "Fundamentals of data structures"],
+     ["Students will implement lists, trees and graphs.", "Implement and analyse trees, heaps and graphs."]),
+    (["Natural Language Processing", "NLP", "Introduction to natural language processing"],
+     ["Students will build text classification pipelines.", "Learn tokenization, embeddings and text classifiers."]),
+    (["Large language models", "LLMs", "Introduction to large language models"],
+     ["Students will understand transformers and prompting.", "Learn how transformer language models are trained and prompted."]),
+    (["Python", "Python programming", "Fundamentals of Python"],
+     ["Students will write Python scripts with functions and files.", "Learn Python syntax, functions and file handling."]),
+]
+# Requests that should not reuse any of the above
+UNRELATED = [
+    ("JavaScript", "Students will build interactive web pages."),
+    ("Operating Systems", "Students will understand processes, memory and file systems."),
+    ("Database Systems", "Students will design relational schemas and write SQL."),
+    ("Computer Networks", "Students will understand TCP/IP and routing."),
+    ("Deep learning for computer vision", "Students will train convolutional networks on images."),
+    ("Statistics", "Students will apply hypothesis testing and regression."),
+]
+
+
+def syllabus_params(course, objectives):
+    return {"course_name": course, "objectives": objectives, "duration_weeks": 15, "sectioned": False}
+
+def resources_params(subject, _objectives=None):
+    return {"subject": subject, "difficulty": "Beginner", "format_types": ["YouTube Videos", "PDFs"]}
+
+
+def run(cache, artifact_type, make_params, threshold, owner):
+    cache.thresholds[artifact_type] = threshold
+    latencies, hits, correct, false_hits, saved = [], 0, 0, 0, 0.0
+    positives = [(names[0], name, objectives[1]) for names, objectives in COURSES for name in names[1:]]
+    for expected, name, objectives in positives:
+        start = time.perf_counter()
+        match = cache.lookup(artifact_type, make_params(name, objectives), owner)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if match:
+            hits += 1
+            correct += match["artifact"]["course"] == expected
+            saved += match["saved_s"]
+    for name, objectives in UNRELATED:
+        start = time.perf_counter()
+        match = cache.lookup(artifact_type, make_params(name, objectives), owner)
+        latencies.append((time.perf_counter() - start) * 1000)
+        false_hits += match is not None
+    print(f"{artifact_type:<10} {threshold:>9.2f} {hits / len(positives):>9.0%} {correct / max(hits, 1):>8.0%} "
+          f"{false_hits / len(UNRELATED):>10.0%} {statistics.median(latencies):>9.2f} {saved:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark semantic reuse of past artifacts")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.7, 0.75, 0.8, 0.85, 0.9])
+    parser.add_argument("--generation-s", type=float, default=25.0, help="recorded generation time of each stored artifact")
+    parser.add_argument("--offline", action="store_true", help="hashing embedder (no model download)")
+    args = parser.parse_args()
+
+    embed_fn = embed_texts
+    if args.offline:
+        from benchmarks.retrieval_benchmark import HashingEmbedder
+        embed_fn = HashingEmbedder().encode
+
+    root = tempfile.mkdtemp(prefix="teachmate_semantic_")
+    try:
+        store = ArtifactStore(root, legacy_dir=None)
+        for names, objectives in COURSES:
+            store.save(SYLLABUS, f"Syllabus for {names[0]}", names[0], owner="teacher1", params=syllabus_params(names[0], objectives[0]), generation_s=args.generation_s)
+            store.save(RESOURCES, f"Resources for {names[0]}", names[0], owner="teacher1", params=resources_params(names[0]), generation_s=args.generation_s)
+        cache = SemanticCache(store, embed_fn, path=f"{root}/request_index.db")
+        start = time.perf_counter()
+        cache.refresh()
+        print(f"Indexed {2 * len(COURSES)} stored requests in {(time.perf_counter() - start) * 1000:.0f} ms (includes model load)")
+
+        print(f"{'type':<10} {'threshold':>9} {'hit rate':>9} {'correct':>8} {'false hit':>10} {'p50 ms':>9} {'saved s':>9}")
+        for threshold in args.thresholds:
+            run(cache, SYLLABUS, syllabus_params, threshold, "teacher1")
+        for threshold in args.thresholds:
+            run(cache, RESOURCES, resources_params, threshold, "teacher1")
+        stats = cache.stats()
+        print(f"\nOverall: {stats['hits']}/{stats['lookups']} lookups reused an artifact, {stats['avg_lookup_ms']:.2f} ms per lookup")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# Cold-start benchmark: import cost of the app shell with lazy tabs vs. eager loading.
+#
+# Each scenario runs in a fresh interpreter so nothing is already imported.
+# "eager" reproduces the old startup: every tab module imported and the Gemini and
+# embedding models constructed up front.
+#
+# Run from the project root:
+#   python -m benchmarks.startup_benchmark --runs 5
+import sys
+import argparse
+import statistics
+import subprocess
+
+TAB_MODULES = [
+    "app.ui.syllabus_generator",
+    "app.ui.lesson_plan_creator",
+    "app.ui.assessment_builder",
+    "app.ui.resource_recommender",
+    "app.ui.feedback_tracker",
+    "app.ui.artifact_library",
+    "app.ui.ai_copilot",
+    "app.ui.rag_uploader",
+    "app.ui.rag_qa",
+]
+
+SHELL = "import streamlit, app.utils.response_cache, app.agents.llm_client"
+
+EAGER = "; ".join(
+    [SHELL]
+    + [f"import {module}" for module in TAB_MODULES]
+    + [
+        "from app.agents.llm_client import get_model, get_embedding_model",
+        "get_model()",
+        "get_embedding_model()",
+    ]
+)
+
+# Time a snippet in a fresh interpreter, returning seconds
+def time_snippet(snippet):
+    code = f"import time; _t = time.perf_counter(); {snippet}; print(time.perf_counter() - _t)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TeachMate cold-start import time")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    scenarios = [("eager (all tabs + models)", EAGER), ("lazy shell (dashboard)", SHELL)]
+    scenarios += [(f"lazy shell + {module.rsplit('.', 1)[1]}", f"{SHELL}; import {module}") for module in TAB_MODULES]
+
+    print(f"{'scenario':<40} {'median s':>9} {'min s':>7}")
+    for name, snippet in scenarios:
+        timings = [time_snippet(snippet) for _ in range(args.runs)]
+        print(f"{name:<40} {statistics.median(timings):>9.3f} {min(timings):>7.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# Vector backends on synthetic all-MiniLM-L6-v2-sized embeddings (384-d, unit length,
+# clustered like topics in a course): Chroma vs. the flat NumPy store in float16 and int8.
+#
+# Reports build time (in upload-sized write batches), time to open a persisted collection,
+# query latency, recall@k against exact float32 search, size on disk and the RSS growth
+# from opening and querying each store.
+#
+# Run from the project root:
+#   python -m benchmarks.vector_store_benchmark --sizes 2000 20000
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import numpy as np
+
+from app.rag.vector_store import FlatVectorStore
+
+DIMENSIONS = 384
+WRITE_BATCH = 256  # chunks per write, as in document uploads (RAG_ADD_BATCH_SIZE)
+CHUNK_TEXT = " ".join(["lorem"] * 150)  # about one chunk's worth of text
+
+
+# n unit vectors scattered around `clusters` topic centres, plus queries drawn near stored vectors
+def synthetic_embeddings(n, num_queries, dimensions=DIMENSIONS, clusters=64, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dimensions)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, n)] + 0.8 * rng.standard_normal((n, dimensions)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = vectors[rng.integers(0, n, num_queries)] + 0.3 * rng.standard_normal((num_queries, dimensions)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return vectors, queries
+
+# Exact top-k ids by cosine similarity (a few queries at a time to bound memory)
+def ground_truth(vectors, queries, top_k, block=16):
+    truth = []
+    for start in range(0, len(queries), block):
+        scores = queries[start:start + block] @ vectors.T
+        truth += [set(np.argpartition(-row, top_k)[:top_k].tolist()) for row in scores]
+    return truth
+
+# Current resident set size in MB (Linux); None where /proc is unavailable
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return None
+
+def directory_mb(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names) / (1024 * 1024)
+
+
+def open_chroma(path):
+    import chromadb
+    return chromadb.PersistentClient(path=path).get_or_create_collection("bench")
+
+def fill(collection, vectors):
+    ids = [str(i) for i in range(len(vectors))]
+    for start in range(0, len(vectors), WRITE_BATCH):
+        end = start + WRITE_BATCH
+        collection.upsert(
+            ids=ids[start:end],
+            embeddings=vectors[start:end].tolist(),
+            documents=[f"chunk {i} {CHUNK_TEXT}" for i in range(start, min(end, len(vectors)))],
+            metadatas=[{"course": f"course-{i % 4}"} for i in range(start, min(end, len(vectors)))]
+        )
+
+def run(name, opener, vectors, queries, truth, top_k):
+    path = tempfile.mkdtemp(prefix="teachmate_vectors_")
+    try:
+        start = time.perf_counter()
+        fill(opener(path), vectors)
+        build_s = time.perf_counter() - start
+
+        rss_before = current_rss_mb()
+        start = time.perf_counter()
+        collection = opener(path)  # reopen from disk, as after a restart
+        collection.query(query_embeddings=[queries[0].tolist()], n_results=top_k, include=[])
+        open_ms = (time.perf_counter() - start) * 1000
+
+        latencies, recalls = [], []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            result = collection.query(query_embeddings=[query.tolist()], n_results=top_k, include=["documents", "metadatas"])
+            latencies.append((time.perf_counter() - start) * 1000)
+            recalls.append(len(expected & {int(chunk_id) for chunk_id in result["ids"][0]}) / top_k)
+        rss_after = current_rss_mb()
+
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        rss = f"{rss_after - rss_before:>8.1f}" if rss_before is not None else f"{'n/a':>8}"
+        print(f"{name:<14} {build_s:>8.2f} {open_ms:>8.1f} {statistics.median(latencies):>8.2f} {p95:>8.2f} "
+              f"{statistics.mean(recalls):>9.3f} {directory_mb(path):>8.1f} {rss}")
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Chroma with the flat NumPy vector store")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 20000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--skip-chroma", action="store_true")
+    args = parser.parse_args()
+
+    backends = [
+        ("flat float16", lambda path: FlatVectorStore(path, "float16")),
+        ("flat int8", lambda path: FlatVectorStore(path, "int8")),
+    ]
+    if not args.skip_chroma:
+        backends.append(("chroma", open_chroma))
+
+    for n in args.sizes:
+        vectors, queries = synthetic_embeddings(n, args.queries)
+        truth = ground_truth(vectors, queries, args.top_k)
+        print(f"\n{n} vectors, {args.queries} queries, top_k={args.top_k}")
+        print(f"{'backend':<14} {'build s':>8} {'open ms':>8} {'p50 ms':>8} {'p95 ms':>8} {f'recall@{args.top_k}':>9} {'disk MB':>8} {'RSS +MB':>8}")
+        for name, opener in backends:
+            run(name, opener, vectors, queries, truth, args.top_k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+from app.rag.chunking import StructuredChunker, TokenCounter
+
+
+def block(page, text, heading=False, margin=False):
+    return {"page": page, "text": text, "heading": heading, "margin": margin}
+
+
+def test_heading_repeated_in_every_chapter_is_kept():
+    blocks = []
+    for chapter in range(1, 6):
+        page = 2 * chapter
+        blocks += [
+            block(page - 1, f"Chapter {chapter}: Topic {chapter}", heading=True),
+            block(page - 1, f"Explanation of topic {chapter} with worked examples."),
+            block(page, "Exercises", heading=True),
+            block(page, f"Practise topic {chapter} on the problems below."),
+            block(page, f"Page {page}", margin=True),
+        ]
+
+    chunker = StructuredChunker(max_tokens=200, min_tokens=1, token_counter=TokenCounter())
+    chunks = list(chunker.chunk(blocks))
+
+    exercises = [chunk for chunk in chunks if chunk["text"].startswith("Exercises")]
+    assert len(exercises) == 5
+    assert all(chunk["section"] == "Exercises" for chunk in exercises)
+    # The running footer is still dropped from the third page on
+    assert chunker.stats["boilerplate_dropped"] == 3
@@ -0,0 +1,59 @@
+import io
+from docx import Document
+from app.utils.file_exporter import render_docx
+
+
+def _runs(data, text):
+    doc = Document(io.BytesIO(data))
+    paragraph = next(p for p in doc.paragraphs if text in p.text)
+    return paragraph, [(run.text, bool(run.bold), bool(run.italic)) for run in paragraph.runs]
+
+
+def test_snake_case_identifiers_are_not_italicized():
+    data = render_docx("Identifiers", "Call get_user_name() then set_user_id(5) and read MAX_RETRY_COUNT.")
+    paragraph, runs = _runs(data, "get_user_name")
+    assert paragraph.text == "Call get_user_name() then set_user_id(5) and read MAX_RETRY_COUNT."
+    assert not any(italic or bold for _, bold, italic in runs)
+
+
+def test_underscore_emphasis_at_word_boundaries():
+    data = render_docx("Emphasis", "Use _recursion_ with __care__ in my_module.")
+    paragraph, runs = _runs(data, "recursion")
+    assert paragraph.text == "Use recursion with care in my_module."
+    assert ("recursion", False, True) in runs
+    assert ("care", True, False) in runs
+
+
+def test_single_line_breaks_are_kept():
+    mcq = "What does a stack use?\nA) FIFO queue\nB) LIFO structure\nC) Tree\nD) Graph\nAnswer: B"
+    paragraph, _ = _runs(render_docx("Quiz", mcq), "FIFO")
+    assert paragraph.text == mcq
+
+
+def _numbering(data):
+    doc = Document(io.BytesIO(data))
+    numbering = doc.part.numbering_part.numbering_definitions._numbering
+    items = {}
+    for paragraph in doc.paragraphs:
+        num_pr = paragraph._p.pPr.numPr if paragraph._p.pPr is not None else None
+        if num_pr is not None and num_pr.numId is not None:
+            num = numbering.num_having_numId(num_pr.numId.val)
+            start = num.xpath("./w:lvlOverride/w:startOverride/@w:val")
+            items[paragraph.text] = (num_pr.numId.val, int(start[0]) if start else None)
+    return items
+
+
+def test_each_numbered_list_restarts():
+    markdown = "## Part A\n1. Define a stack\n2. Define a queue\n\n## Part B\n1. Compare them\n2. Give an example"
+    items = _numbering(render_docx("Questions", markdown))
+    assert items["Define a stack"] == items["Define a queue"]
+    assert items["Compare them"] == items["Give an example"]
+    assert items["Define a stack"][0] != items["Compare them"][0]
+    assert items["Define a stack"][1] == items["Compare them"][1] == 1
+
+
+def test_numbered_list_resumed_after_text_keeps_its_count():
+    markdown = "1. What is a stack?\nA) FIFO\nB) LIFO\nAnswer: B\n\n2. What is a queue?\nA) FIFO\nB) LIFO\nAnswer: A"
+    items = _numbering(render_docx("Quiz", markdown))
+    assert items["What is a stack?"][1] == 1
+    assert items["What is a queue?"][1] == 2
@@ -0,0 +1,36 @@
+import time
+from tests.test_rag_namespacing import HashingEmbedder, write_notes
+from app.agents import llm_client
+from app.rag import rag_retriever
+from app.rag.ingestion_jobs import IngestionQueue, ACTIVE_STATUSES, DONE, FAILED
+
+
+def wait_for(jobs_queue, job_ids, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        jobs = jobs_queue.jobs(job_ids)
+        if not any(job["status"] in ACTIVE_STATUSES for job in jobs):
+            return jobs
+        time.sleep(0.05)
+    raise AssertionError("ingestion jobs did not finish")
+
+
+def test_one_failing_file_does_not_stop_the_rest_of_the_batch(tmp_path):
+    llm_client._embedding_model = HashingEmbedder()
+    owner = "teacher_batch_upload"
+    first, broken, last = tmp_path / "first.txt", tmp_path / "broken.pdf", tmp_path / "last.txt"
+    write_notes(first, 3, 300)
+    broken.write_bytes(b"not a pdf")
+    write_notes(last, 1, 20)
+
+    # One worker: a failed document's reader must not keep the next document waiting
+    jobs_queue = IngestionQueue(max_workers=1)
+    job_ids = jobs_queue.submit_many(
+        [(str(path), path.name) for path in (first, broken, last)], owner=owner, course="B", remove_file=True
+    )
+    jobs = wait_for(jobs_queue, job_ids)
+
+    assert [job["status"] for job in jobs] == [DONE, FAILED, DONE]
+    assert jobs[0]["num_chunks"] > 1 and jobs[2]["num_chunks"] == 1
+    assert sorted(doc["source"] for doc in rag_retriever.list_documents(owner)) == ["first.txt", "last.txt"]
+    assert not any(path.exists() for path in (first, broken, last))
@@ -0,0 +1,47 @@
+import os
+import re
+import tempfile
+import zlib
+import numpy as np
+
+os.environ["RAG_VECTOR_BACKEND"] = "flat"
+os.environ["RAG_FLAT_DIR"] = tempfile.mkdtemp(prefix="teachmate_flat_")
+
+from app.agents import llm_client
+from app.rag import rag_retriever
+
+
+# Offline stand-in for the sentence-transformer: hashed bag of words, unit-normalized
+class HashingEmbedder:
+    def encode(self, texts, batch_size=None, **kwargs):
+        vectors = np.zeros((len(texts), 256), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                vectors[row, zlib.crc32(word.encode()) % 256] += 1.0
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+
+
+def write_notes(path, paragraphs, words):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(paragraphs):
+            f.write(f"Topic {i}. " + " ".join(f"word{i}_{j}" for j in range(words)) + "\n\n")
+
+
+def test_same_filename_in_other_course_is_untouched(tmp_path):
+    llm_client._embedding_model = HashingEmbedder()
+    owner = "teacher_shared_names"
+    course_notes, plain_notes = tmp_path / "a" / "notes.txt", tmp_path / "notes.txt"
+    course_notes.parent.mkdir()
+    write_notes(course_notes, 10, 300)
+    write_notes(plain_notes, 1, 20)
+
+    stored = rag_retriever.upload_and_embed_document(str(course_notes), "notes.txt", owner=owner, course="A")
+    assert stored > 1
+    assert rag_retriever.upload_and_embed_document(str(plain_notes), "notes.txt", owner=owner) == 1
+
+    # The course-less upload must not prune course A's chunks, and deleting it must not delete them
+    assert len(rag_retriever.list_document_chunks("notes.txt", owner, "A", limit=100)["ids"]) == stored
+    assert rag_retriever.list_document_chunks("notes.txt", owner)["ids"] == ["notes.txt_0"]
+    assert rag_retriever.delete_document("notes.txt", owner) == 1
+    assert len(rag_retriever.list_document_chunks("notes.txt", owner, "A", limit=100)["ids"]) == stored
+    assert [doc["course"] for doc in rag_retriever.list_documents(owner)] == ["A"]
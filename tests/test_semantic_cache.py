@@ -0,0 +1,40 @@
+import os
+import re
+import tempfile
+import zlib
+import numpy as np
+from docx import Document
+
+os.environ.setdefault("ARTIFACT_STORE_DIR", tempfile.mkdtemp(prefix="teachmate_artifacts_"))
+
+from app.utils.artifact_store import ArtifactStore, SYLLABUS
+from app.utils.semantic_cache import SemanticCache
+
+
+# Offline stand-in for the sentence-transformer: hashed bag of words, unit-normalized
+def embed(texts):
+    vectors = np.zeros((len(texts), 256), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in re.findall(r"\w+", text.lower()):
+            vectors[row, zlib.crc32(word.encode()) % 256] += 1.0
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+
+
+def test_imported_legacy_file_is_offered(tmp_path):
+    legacy_dir = tmp_path / "memory"
+    legacy_dir.mkdir()
+    doc = Document()
+    doc.add_heading("Java Programming Syllabus", level=1)
+    doc.add_paragraph("Week 1: Variables and types")
+    doc.save(legacy_dir / "Java_Programming_syllabus.docx")
+
+    store = ArtifactStore(root=str(tmp_path / "artifacts"), legacy_dir=str(legacy_dir))
+    cache = SemanticCache(store, embed, path=str(tmp_path / "request_index.db"))
+
+    params = {"course_name": "Java Programming", "objectives": "Learn OOP basics", "duration_weeks": 12}
+    match = cache.lookup(SYLLABUS, params, owner="teacher1")
+    assert match is not None
+    assert match["artifact"]["params"]["imported_from"] == "Java_Programming_syllabus.docx"
+    assert "Variables and types" in match["artifact"]["content"]
+
+    assert cache.lookup(SYLLABUS, dict(params, course_name="Organic Chemistry"), owner="teacher1") is None